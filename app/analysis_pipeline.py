@@ -0,0 +1,582 @@
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from linkedin_extractor import linkedin_profile_extractor, linkedin_job_company_extractor, extract_linkedin_id, extract_linkedin_job_id
+from disk_cache import make_cache_key
+from json_stream import iter_sections
+from candidate_index import candidate_index
+from analysis_store import analysis_store, ANALYSIS_ID_KEY
+from job_queue import JobQueue
+from single_flight import single_flight
+from resume_extraction import spool_upload, ResumeTooLargeError
+from upstream_scheduler import priority_lane, BATCH
+from metrics import propagate_context
+from io_steps import Blocking, Call, run_steps
+from prompt_engineering import (
+    analyze_linkedin_profile_steps,
+    upload_resume_and_analyze,
+    upload_resume_and_analyze_steps,
+    analyze_linkedin_jd_steps,
+    job_matching_system,
+    reanalyze_steps,
+    stream_analyze_linkedin_profile,
+    stream_analyze_linkedin_jd,
+    stream_job_matching_system,
+    stream_reanalyze)
+
+# Upper bounds for batch matching: jobs per request and jobs processed at the same time
+MATCH_BATCH_MAX_JOBS = int(os.getenv("MATCH_BATCH_MAX_JOBS", "100"))
+MATCH_BATCH_CONCURRENCY = int(os.getenv("MATCH_BATCH_CONCURRENCY", "5"))
+
+# Upper bound of the number of candidates returned by a shortlist
+SHORTLIST_MAX_K = int(os.getenv("SHORTLIST_MAX_K", "50"))
+
+# Background job queue settings
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+JOB_QUEUE_RETENTION = float(os.getenv("JOB_QUEUE_RETENTION", str(24 * 3600)))
+
+logger = logging.getLogger(__name__)
+
+
+def _profile_id(profile_url):
+    return 'linkedin:' + extract_linkedin_id(profile_url).strip().lower()
+
+
+def _resume_id(resume_data):
+    return 'resume:' + make_cache_key(resume_data)[:16]
+
+
+def _upload_name(file):
+    # The file name of an upload, or the base name of a file opened from disk (e.g. by bulk_ingest.py)
+    name = getattr(file, 'filename', None) or getattr(file, 'name', None)
+    return os.path.basename(name) if isinstance(name, str) else None
+
+
+def _job_key(job_url):
+    # Falls back to the URL itself when it holds no job ID
+    return extract_linkedin_job_id(job_url) or job_url.strip().lower()
+
+
+def _lead(flight, events, result_of=lambda event, data: data if event == 'done' else None):
+    # Pass the leader's events through and publish its final result to the requests waiting on the same flight
+    result = error = None
+    try:
+        for event, path, data in events:
+            result = result_of(event, data) or result
+            yield event, path, data
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if result is None and error is None:
+            error = RuntimeError(f"The {flight.op} computation ended without a result")
+        single_flight.finish(flight, result=result, error=None if result is not None else error)
+
+
+def _single_flight_steps(op, key, make_steps):
+    # Steps counterpart of single_flight.do: the leader runs make_steps(), the others wait for its result.
+    # Keys include use_cache, so a refresh never joins (and returns the result of) an analysis that reads the caches.
+    flight, leader = single_flight.begin(op, key)
+    if not leader:
+        return (yield Call(flight.wait, flight.wait_async))
+    try:
+        result = yield from make_steps()
+    except BaseException as e:
+        single_flight.finish(flight, error=e)
+        raise
+    single_flight.finish(flight, result=result)
+    return result
+
+
+def _replay(result):
+    # Stream a finished analysis like a cached result
+    for path, value in iter_sections(result):
+        yield 'section', path, value
+    yield 'done', None, result
+
+
+def _follow(flight):
+    # Wait for the identical analysis already in flight, then replay its result
+    yield 'status', None, {'stage': 'waiting'}
+    yield from _replay(flight.wait())
+
+
+def index_profile_analysis(profile_id, analysis, metadata=None):
+    """
+    Adds a profile analysis to the candidate index. A failure is logged and never fails the analysis itself.
+    """
+    if not isinstance(analysis, dict) or 'error' in analysis:
+        return
+    try:
+        candidate_index.add(profile_id, analysis, metadata)
+    except Exception as e:
+        logger.warning("Could not index profile %s: %s", profile_id, e)
+
+
+def delete_analysis(analysis_id):
+    """
+    Deletes a stored analysis and, for a profile, removes it from the candidate index. Returns True if it
+    was stored. A failure to update the index is logged: shortlists skip candidates whose analysis is gone.
+    """
+    deleted = analysis_store.delete(analysis_id)
+    try:
+        candidate_index.remove_analysis(analysis_id)
+    except Exception as e:
+        logger.warning("Could not remove analysis %s from the candidate index: %s", analysis_id, e)
+    return deleted
+
+
+def _shortlisted(job_analysis, k):
+    # The k best indexed profiles whose stored analysis (if they were stored) still exists. Profiles
+    # whose analysis was deleted without reaching the index are removed from it, and the search runs again.
+    while True:
+        results = candidate_index.search(job_analysis, k=k)
+        records = [(profile_id, score, candidate_index.get(profile_id)) for profile_id, score in results]
+        records = [(profile_id, score, record) for profile_id, score, record in records if record is not None]
+        analysis_ids = {record['metadata'].get(ANALYSIS_ID_KEY) for _, _, record in records} - {None}
+        deleted = analysis_ids - analysis_store.existing(analysis_ids)
+        if not deleted:
+            return records
+        if not sum(candidate_index.remove_analysis(analysis_id) for analysis_id in deleted):
+            return [(profile_id, score, record) for profile_id, score, record in records
+                    if record['metadata'].get(ANALYSIS_ID_KEY) not in deleted]
+
+
+def store_analysis(kind, source_key, analysis, source=None, source_data=None):
+    """
+    Persists a completed analysis in the analysis store (and profiles in the candidate index).
+
+    Parameters:
+    - kind (str): 'profile' or 'job'.
+    - source_key (str): The normalized identity of what was analyzed (see AnalysisStore.save).
+    - analysis (dict): The analysis result.
+    - source (str): The profile or job URL, or the resume's file name.
+    - source_data (dict): The extracted LinkedIn data that was analyzed, kept to re-analyze only what changes.
+
+    Returns:
+    - dict: The analysis with its stored ID under 'analysisId'. If storing fails, the failure is
+      logged and the analysis is returned without an ID.
+    """
+    if not isinstance(analysis, dict) or 'error' in analysis:
+        return analysis
+    try:
+        analysis_id = analysis_store.save(kind, source_key, analysis, source=source, source_data=source_data)
+    except Exception as e:
+        logger.warning("Could not store %s analysis %s: %s", kind, source_key, e)
+        analysis_id = None
+    if kind == 'profile':
+        index_profile_analysis(source_key, analysis, {'source': source, ANALYSIS_ID_KEY: analysis_id})
+    return dict(analysis, **{ANALYSIS_ID_KEY: analysis_id}) if analysis_id else analysis
+
+
+def _store_when_done(events, kind, source_key, source, source_data=None):
+    # Pass streamed events through, storing the complete analysis carried by the 'done' event
+    for event, path, data in events:
+        if event == 'done':
+            data = store_analysis(kind, source_key, data, source, source_data)
+        yield event, path, data
+
+
+def _previous_analysis(kind, source_key, use_cache):
+    # The stored analysis of a LinkedIn profile or job and the data it was made from, unless a fresh analysis is forced
+    if not use_cache:
+        return None
+    try:
+        return analysis_store.get_with_source_data(kind, source_key)
+    except Exception as e:
+        logger.warning("Could not read the previous %s analysis %s: %s", kind, source_key, e)
+        return None
+
+
+def _analyze_extraction_steps(kind, source_key, extracted, use_cache):
+    # Re-analyze only the sections affected by what changed since the stored analysis, if there is one
+    previous = yield Blocking(_previous_analysis, kind, source_key, use_cache)
+    if previous is not None:
+        return (yield from reanalyze_steps(kind, previous[0], previous[1], extracted, use_cache=use_cache))
+    if kind == 'profile':
+        return (yield from analyze_linkedin_profile_steps(extracted, use_cache=use_cache))
+    return (yield from analyze_linkedin_jd_steps(extracted, use_cache=use_cache))
+
+
+def _stream_extraction_analysis(kind, source_key, extracted, use_cache):
+    # Streaming counterpart of _analyze_extraction_steps
+    previous = _previous_analysis(kind, source_key, use_cache)
+    if previous is not None:
+        return stream_reanalyze(kind, previous[0], previous[1], extracted, use_cache=use_cache)
+    if kind == 'profile':
+        return stream_analyze_linkedin_profile(extracted, use_cache=use_cache)
+    return stream_analyze_linkedin_jd(extracted, use_cache=use_cache)
+
+
+def _job_source_key(job_url):
+    return 'linkedin-job:' + _job_key(job_url)
+
+
+def analyze_profile_url(profile_url, use_cache=True):
+    """
+    Extracts a LinkedIn profile from its URL and analyzes it. A profile analyzed before is re-analyzed
+    incrementally: only the sections depending on fields that changed since then are regenerated.
+
+    Parameters:
+    - profile_url (str): The URL of the LinkedIn profile.
+    - use_cache (bool): Set to False to re-fetch the profile and force a fresh, complete analysis.
+
+    Returns:
+    - dict: The profile analysis, with its stored ID under 'analysisId'.
+    """
+    return run_steps(analyze_profile_url_steps(profile_url, use_cache))
+
+
+def analyze_profile_url_steps(profile_url, use_cache=True):
+    # Steps of analyze_profile_url (see io_steps)
+    profile_id = _profile_id(profile_url)
+
+    def analyze():
+        profile_data = yield Blocking(linkedin_profile_extractor, profile_url, use_cache=use_cache)
+        analysis = yield from _analyze_extraction_steps('profile', profile_id, profile_data, use_cache)
+        return (yield Blocking(store_analysis, 'profile', profile_id, analysis, source=profile_url, source_data=profile_data))
+
+    # Concurrent requests for the same profile share a single extraction and analysis
+    return (yield from _single_flight_steps('profile', (profile_id, use_cache), analyze))
+
+
+def analyze_job_url(job_url, use_cache=True):
+    """
+    Extracts a LinkedIn job posting and its company from the job URL and analyzes them. Like profiles,
+    a job analyzed before is re-analyzed incrementally.
+
+    Parameters:
+    - job_url (str): The URL of the LinkedIn job posting.
+    - use_cache (bool): Set to False to re-fetch the job and force a fresh, complete analysis.
+
+    Returns:
+    - dict: The job description analysis, with its stored ID under 'analysisId'.
+    """
+    return run_steps(analyze_job_url_steps(job_url, use_cache))
+
+
+def analyze_job_url_steps(job_url, use_cache=True):
+    # Steps of analyze_job_url (see io_steps)
+    def analyze():
+        job_data = yield Blocking(linkedin_job_company_extractor, job_url, use_cache=use_cache)
+        analysis = yield from _analyze_extraction_steps('job', _job_source_key(job_url), job_data, use_cache)
+        return (yield Blocking(store_analysis, 'job', _job_source_key(job_url), analysis, source=job_url, source_data=job_data))
+
+    # Concurrent requests for the same job share a single extraction and analysis
+    return (yield from _single_flight_steps('job', (_job_key(job_url), use_cache), analyze))
+
+
+def analyze_resume_file(file, use_cache=True):
+    """
+    Structures an uploaded PDF resume and analyzes it like a LinkedIn profile.
+
+    Parameters:
+    - file: The uploaded file object.
+    - use_cache (bool): Set to False to force fresh structuring and analysis.
+
+    Returns:
+    - tuple: (analysis, status_code). The analysis carries its stored ID under 'analysisId'. On failure
+      the analysis is a dictionary with an 'error' key.
+    """
+    return run_steps(analyze_resume_file_steps(file, use_cache))
+
+
+def analyze_resume_file_steps(file, use_cache=True):
+    # Steps of analyze_resume_file (see io_steps)
+    try:
+        spooled_resume = yield Blocking(spool_upload, file)
+    except ResumeTooLargeError as e:
+        return {'error': str(e)}, 413
+
+    def analyze():
+        resume_data, status_code = yield from upload_resume_and_analyze_steps(spooled_resume, use_cache=use_cache)
+        if 'error' in resume_data:
+            return resume_data, status_code
+        analysis = yield from analyze_linkedin_profile_steps(resume_data, use_cache=use_cache)
+        return (yield Blocking(store_analysis, 'profile', _resume_id(resume_data), analysis, source=_upload_name(file))), 200
+
+    # Concurrent uploads of the same PDF share a single structuring and analysis
+    with spooled_resume:
+        return (yield from _single_flight_steps('resume', (spooled_resume.sha256, use_cache), analyze))
+
+
+def stream_profile_url_analysis(profile_url, use_cache=True):
+    """
+    Streaming variant of analyze_profile_url.
+
+    Yields (event, path, data) tuples: 'status' events announcing each stage, one 'section' event per
+    completed section of the analysis, and a final 'done' event carrying the full analysis.
+    """
+    profile_id = _profile_id(profile_url)
+    flight, leader = single_flight.begin('profile', (profile_id, use_cache))
+    if not leader:
+        yield from _follow(flight)
+        return
+
+    def events():
+        yield 'status', None, {'stage': 'extracting'}
+        profile_data = linkedin_profile_extractor(profile_url, use_cache=use_cache)
+        yield 'status', None, {'stage': 'analyzing'}
+        yield from _store_when_done(
+            _stream_extraction_analysis('profile', profile_id, profile_data, use_cache),
+            'profile', profile_id, profile_url, profile_data)
+
+    yield from _lead(flight, events())
+
+
+def stream_job_url_analysis(job_url, use_cache=True):
+    """
+    Streaming variant of analyze_job_url, yielding the same events as stream_profile_url_analysis.
+    """
+    flight, leader = single_flight.begin('job', (_job_key(job_url), use_cache))
+    if not leader:
+        yield from _follow(flight)
+        return
+
+    def events():
+        yield 'status', None, {'stage': 'extracting'}
+        job_data = linkedin_job_company_extractor(job_url, use_cache=use_cache)
+        yield 'status', None, {'stage': 'analyzing'}
+        yield from _store_when_done(
+            _stream_extraction_analysis('job', _job_source_key(job_url), job_data, use_cache),
+            'job', _job_source_key(job_url), job_url, job_data)
+
+    yield from _lead(flight, events())
+
+
+def stream_resume_file_analysis(file, use_cache=True):
+    """
+    Streaming variant of analyze_resume_file. The resume is structured in one go, then its analysis is
+    streamed section by section. A resume that cannot be read produces an 'error' event.
+    """
+    try:
+        spooled_resume = spool_upload(file)
+    except ResumeTooLargeError as e:
+        yield 'error', None, {'error': str(e)}
+        return
+
+    with spooled_resume:
+        # Resume flights share the same (analysis, status code) result as analyze_resume_file
+        flight, leader = single_flight.begin('resume', (spooled_resume.sha256, use_cache))
+        if not leader:
+            yield 'status', None, {'stage': 'waiting'}
+            analysis, status_code = flight.wait()
+            if 'error' in analysis:
+                yield 'error', None, analysis
+                return
+            yield from _replay(analysis)
+            return
+
+        def events():
+            yield 'status', None, {'stage': 'structuring'}
+            resume_data, status_code = upload_resume_and_analyze(spooled_resume, use_cache=use_cache)
+            if 'error' in resume_data:
+                yield 'error', None, dict(resume_data, status=status_code)
+                return
+            yield 'status', None, {'stage': 'analyzing'}
+            yield from _store_when_done(
+                stream_analyze_linkedin_profile(resume_data, use_cache=use_cache),
+                'profile', _resume_id(resume_data), _upload_name(file))
+
+        def result_of(event, data):
+            if event == 'done':
+                return data, 200
+            if event == 'error':
+                return {'error': data['error']}, data['status']
+            return None
+
+        yield from _lead(flight, events(), result_of)
+
+
+def stream_match(profile_analysis, job_analysis, use_cache=True, mode='full'):
+    """
+    Streaming variant of job_matching_system, yielding each criterion of "Details" as soon as it is available.
+    """
+    yield 'status', None, {'stage': 'matching'}
+    yield from stream_job_matching_system(profile_analysis, job_analysis, use_cache=use_cache, mode=mode)
+
+
+def compatibility_score(match_result):
+    """
+    Reads the "Overall Compatibility Score" of a match result as a number.
+
+    The model returns the score as a number or as a string such as "85" or "85%". Returns None when
+    the score is missing or cannot be read.
+    """
+    score = match_result.get("Overall Compatibility Score") if isinstance(match_result, dict) else None
+    if isinstance(score, (int, float)):
+        return float(score)
+    found = re.search(r"\d+(\.\d+)?", str(score)) if score is not None else None
+    return float(found.group()) if found else None
+
+
+def _in_batch_lane(function):
+    # Bulk work (batches, shortlists, background jobs) yields upstream capacity to interactive requests
+    def run(*args, **kwargs):
+        with priority_lane(BATCH):
+            return function(*args, **kwargs)
+    return run
+
+
+def _match_one_job(profile_analysis, job, use_cache, mode):
+    # A job is either a LinkedIn job URL or an existing job analysis
+    if isinstance(job, str):
+        job_analysis = analyze_job_url(job, use_cache=use_cache)
+    else:
+        job_analysis = job
+    return job_analysis, job_matching_system(profile_analysis, job_analysis, use_cache=use_cache, mode=mode)
+
+
+def match_profile_against_jobs(profile_analysis, jobs, concurrency=MATCH_BATCH_CONCURRENCY, use_cache=True, mode='full'):
+    """
+    Matches one profile analysis against many jobs, yielding each result as soon as it is ready.
+
+    Jobs are extracted, analyzed and matched with bounded concurrency. A job that fails produces an
+    entry with an 'error' key instead of interrupting the batch. Each yielded entry carries the rank
+    of its score among the jobs finished so far, and the final entry is the complete ranking.
+
+    Parameters:
+    - profile_analysis (dict): The analysis of the candidate's profile or resume.
+    - jobs (list): LinkedIn job URLs (str) and/or job description analyses (dict).
+    - concurrency (int): Maximum number of jobs processed at the same time.
+    - use_cache (bool): Set to False to force fresh extractions and analyses.
+    - mode (str): Matching mode of job_matching_system, 'full' or 'fast'.
+
+    Yields:
+    - dict: {'type': 'result', ...} once per job with the full match result, then a compact
+      {'type': 'ranking', 'results': [...]} sorted by descending "Overall Compatibility Score", with failed jobs last.
+    """
+    finished = []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs) or 1)), thread_name_prefix="match-batch")
+    try:
+        futures = {
+            executor.submit(propagate_context(_in_batch_lane(_match_one_job)), profile_analysis, job, use_cache, mode): (index, job)
+            for index, job in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            index, job = futures[future]
+            entry = {
+                'type': 'result',
+                'index': index,
+                'jobUrl': job if isinstance(job, str) else None,
+            }
+            try:
+                job_analysis, match_result = future.result()
+                entry.update({
+                    'jobTitle': job_analysis.get('jobTitle'),
+                    'companyName': (job_analysis.get('companyInfo') or {}).get('name'),
+                    'score': compatibility_score(match_result),
+                    'match': match_result,
+                })
+            except Exception as e:
+                logger.warning("Batch match failed for job %s: %s", index, e)
+                entry.update({'score': None, 'error': str(e)})
+
+            finished.append(entry)
+            scores = sorted((item['score'] for item in finished if item['score'] is not None), reverse=True)
+            entry['rank'] = scores.index(entry['score']) + 1 if entry['score'] is not None else None
+            yield entry
+
+        ranking = sorted(finished, key=lambda item: (item['score'] is None, -(item['score'] or 0), item['index']))
+        yield {
+            'type': 'ranking',
+            'results': [
+                {key: value for key, value in item.items() if key not in ('type', 'match', 'rank')}
+                for item in ranking
+            ],
+            'failed': sum(1 for item in finished if 'error' in item),
+        }
+    finally:
+        # Stop pending jobs if the client goes away before the batch is complete
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shortlist_candidates(job_analysis, k=10, match=False, concurrency=MATCH_BATCH_CONCURRENCY, use_cache=True, mode='full'):
+    """
+    Finds the k indexed profiles that best fit a job analysis, and optionally matches only those.
+
+    Retrieval runs on the local candidate index and takes milliseconds. With `match`, the shortlisted
+    profiles are then scored by job_matching_system with bounded concurrency and re-ranked by their
+    "Overall Compatibility Score", so the matcher never runs on the whole candidate pool.
+
+    Parameters:
+    - job_analysis (dict): The job description analysis.
+    - k (int): Number of candidates to return.
+    - match (bool): Set to True to run job_matching_system on each shortlisted candidate.
+    - concurrency (int): Maximum number of matches run at the same time.
+    - use_cache (bool): Set to False to force fresh match results.
+    - mode (str): Matching mode of job_matching_system, 'full' or 'fast'.
+
+    Returns:
+    - dict: {'indexed': <number of indexed profiles>, 'candidates': [...]}, best candidates first.
+    """
+    candidates = []
+    for profile_id, retrieval_score, record in _shortlisted(job_analysis, min(k, SHORTLIST_MAX_K)):
+        metadata = record['metadata']
+        candidates.append({
+            'profileId': profile_id,
+            'analysisId': metadata.get(ANALYSIS_ID_KEY),
+            'fullName': record['analysis'].get('fullName'),
+            'source': metadata.get('source') or metadata.get('profileUrl'),
+            'retrievalScore': round(retrieval_score, 3),
+            'analysis': record['analysis'],
+        })
+
+    if match and candidates:
+        def match_candidate(candidate):
+            try:
+                match_result = job_matching_system(candidate['analysis'], job_analysis, use_cache=use_cache, mode=mode)
+                return {'score': compatibility_score(match_result), 'match': match_result}
+            except Exception as e:
+                logger.warning("Shortlist match failed for %s: %s", candidate['profileId'], e)
+                return {'score': None, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(candidates))), thread_name_prefix="shortlist") as executor:
+            for candidate, result in zip(candidates, executor.map(propagate_context(_in_batch_lane(match_candidate)), candidates)):
+                candidate.update(result)
+        candidates.sort(key=lambda candidate: (candidate['score'] is None, -(candidate['score'] or 0), -candidate['retrievalScore']))
+
+    return {'indexed': len(candidate_index), 'candidates': candidates}
+
+
+def _run_resume_job(payload):
+    # The upload was spooled to JOB_UPLOAD_DIR when the job was submitted; the job owns the file from then on.
+    # A job requeued after its worker died finds the file there, unless an earlier attempt already removed it.
+    if not os.path.exists(payload['path']):
+        raise FileNotFoundError("The uploaded resume is no longer available; upload it again.")
+    try:
+        with open(payload['path'], 'rb') as file:
+            analysis, status_code = analyze_resume_file(file, use_cache=payload.get('use_cache', True))
+    finally:
+        try:
+            os.remove(payload['path'])
+        except OSError:
+            pass
+    if 'error' in analysis:
+        raise ValueError(analysis['error'])
+    return analysis
+
+
+# Handlers of the background jobs, by job type. Each takes the payload given to job_queue.submit().
+# Their upstream calls run in the batch lane.
+JOB_HANDLERS = {job_type: _in_batch_lane(handler) for job_type, handler in {
+    'profile': lambda payload: analyze_profile_url(payload['profile_url'], use_cache=payload.get('use_cache', True)),
+    'job': lambda payload: analyze_job_url(payload['job_url'], use_cache=payload.get('use_cache', True)),
+    'resume': _run_resume_job,
+    'match': lambda payload: job_matching_system(
+        payload['profile_data'], payload['job_data'], use_cache=payload.get('use_cache', True), mode=payload.get('mode', 'full')),
+}.items()}
+
+# Queue shared by every web worker process through its SQLite file; worker threads start with the first request
+# (or the first submitted job) of each process
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "job_queue.sqlite3"))
+# Resumes uploaded as background jobs are spooled next to the queue rather than to the system's temporary
+# directory, so a job requeued after its worker died (or after a reboot) still finds its file
+JOB_UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(JOB_QUEUE_PATH)), "job_uploads")
+os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+job_queue = JobQueue(
+    JOB_QUEUE_PATH,
+    JOB_HANDLERS,
+    workers=JOB_QUEUE_WORKERS,
+    retention=JOB_QUEUE_RETENTION)
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import threading
+from disk_cache import make_cache_key, canonical_json
+from schemas import ProfileAnalysis, JobAnalysis
+
+# Key under which the stored ID is returned alongside an analysis
+ANALYSIS_ID_KEY = 'analysisId'
+
+# Kinds of stored analyses. Resume analyses are profile analyses.
+ANALYSIS_KINDS = ('profile', 'job')
+
+# Record of the analyses of each kind, which they are stored as
+ANALYSIS_RECORDS = {'profile': ProfileAnalysis, 'job': JobAnalysis}
+
+# Largest page of the listing API
+MAX_PAGE_SIZE = 100
+
+
+def strip_analysis_id(analysis):
+    """
+    Returns an analysis without its stored ID, so the ID never reaches prompts or cache keys.
+    """
+    if isinstance(analysis, dict) and ANALYSIS_ID_KEY in analysis:
+        return {key: value for key, value in analysis.items() if key != ANALYSIS_ID_KEY}
+    return analysis
+
+
+def _encode_cursor(updated_at, analysis_id):
+    return base64.urlsafe_b64encode(json.dumps([updated_at, analysis_id]).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        updated_at, analysis_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return float(updated_at), str(analysis_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class AnalysisStore:
+    """
+    Completed profile and job analyses, stored in a single SQLite file under stable IDs.
+
+    The ID of an analysis is derived from what was analyzed (the LinkedIn profile or job ID, or the
+    resume's content hash), so analyzing the same source again updates the same record. The extracted
+    data an analysis was made from can be kept with it, to re-analyze only what changed. Like the
+    caches, the store is shared by every worker process and each thread uses its own connection.
+
+    Parameters:
+    - path (str): Location of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS analyses (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT,
+                title TEXT,
+                analysis TEXT NOT NULL,
+                source_data TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )''')
+        # Stores created before the extracted data was kept get the column added
+        if 'source_data' not in {row[1] for row in conn.execute('PRAGMA table_info(analyses)')}:
+            conn.execute('ALTER TABLE analyses ADD COLUMN source_data TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS analyses_kind_updated_at ON analyses (kind, updated_at DESC, id DESC)')
+        conn.execute('CREATE INDEX IF NOT EXISTS analyses_updated_at ON analyses (updated_at DESC, id DESC)')
+
+    def _connection(self):
+        # Connections cannot be shared across threads or across a fork, so keep one per thread and process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def analysis_id(kind, source_key):
+        """
+        Returns the stable ID of the analysis of a source, e.g. ('profile', 'linkedin:john-doe').
+        """
+        return f"{kind}_{make_cache_key(kind, source_key)[:20]}"
+
+    def save(self, kind, source_key, analysis, source=None, source_data=None):
+        """
+        Stores (or replaces) the analysis of a source and returns its ID.
+
+        Parameters:
+        - kind (str): 'profile' or 'job'.
+        - source_key (str): What was analyzed, normalized (e.g. 'linkedin:john-doe', 'resume:<sha256>').
+        - analysis (dict): The analysis result.
+        - source (str): Where the analysis came from, shown in listings (e.g. the profile URL).
+        - source_data (dict): The extracted data that was analyzed (e.g. the LinkedIn profile dictionary).
+
+        Returns:
+        - str: The analysis ID.
+        """
+        analysis_id = self.analysis_id(kind, source_key)
+        analysis = strip_analysis_id(analysis)
+        title = analysis.get('fullName') if kind == 'profile' else analysis.get('jobTitle')
+        now = time.time()
+        self._connection().execute(
+            '''INSERT INTO analyses (id, kind, source, title, analysis, source_data, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (id) DO UPDATE SET source = excluded.source, title = excluded.title, analysis = excluded.analysis,
+                                              source_data = excluded.source_data, updated_at = excluded.updated_at''',
+            (analysis_id, kind, source, title, ANALYSIS_RECORDS[kind].from_dict(analysis).to_json(),
+             canonical_json(source_data) if source_data is not None else None, now, now))
+        return analysis_id
+
+    def get_with_source_data(self, kind, source_key):
+        """
+        Returns the stored analysis of a source and the extracted data it was made from, as a
+        (source_data, analysis) tuple, or None if the source has no analysis stored with its data.
+        """
+        analysis_id = self.analysis_id(kind, source_key)
+        row = self._connection().execute(
+            'SELECT source_data, analysis FROM analyses WHERE id = ? AND source_data IS NOT NULL', (analysis_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), dict(json.loads(row[1]), **{ANALYSIS_ID_KEY: analysis_id})
+
+    def get(self, analysis_id, kind=None):
+        """
+        Returns a stored analysis (with its ID under ANALYSIS_ID_KEY), or None if there is none of that kind.
+        """
+        row = self._connection().execute('SELECT kind, analysis FROM analyses WHERE id = ?', (analysis_id,)).fetchone()
+        if row is None or (kind is not None and row[0] != kind):
+            return None
+        return dict(json.loads(row[1]), **{ANALYSIS_ID_KEY: analysis_id})
+
+    def list(self, kind=None, limit=20, cursor=None):
+        """
+        Lists stored analyses, most recently updated first, one page at a time.
+
+        Parameters:
+        - kind (str): Only list analyses of this kind ('profile' or 'job').
+        - limit (int): Page size, at most MAX_PAGE_SIZE.
+        - cursor (str): The 'nextCursor' of the previous page.
+
+        Returns:
+        - dict: {'items': [{'id', 'kind', 'source', 'title', 'createdAt', 'updatedAt'}, ...], 'nextCursor': str or None}
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        conditions, params = [], []
+        if kind is not None:
+            conditions.append('kind = ?')
+            params.append(kind)
+        if cursor:
+            # Keyset pagination: continue after the last item of the previous page
+            updated_at, analysis_id = _decode_cursor(cursor)
+            conditions.append('(updated_at < ? OR (updated_at = ? AND id < ?))')
+            params.extend([updated_at, updated_at, analysis_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = self._connection().execute(
+            f'SELECT id, kind, source, title, created_at, updated_at FROM analyses {where} '
+            f'ORDER BY updated_at DESC, id DESC LIMIT ?', params + [limit + 1]).fetchall()
+
+        items = [
+            {'id': row[0], 'kind': row[1], 'source': row[2], 'title': row[3], 'createdAt': row[4], 'updatedAt': row[5]}
+            for row in rows[:limit]
+        ]
+        next_cursor = _encode_cursor(items[-1]['updatedAt'], items[-1]['id']) if len(rows) > limit else None
+        return {'items': items, 'nextCursor': next_cursor}
+
+    def existing(self, analysis_ids):
+        """
+        Returns the set of the given analysis IDs that are stored.
+        """
+        analysis_ids = list(analysis_ids)
+        if not analysis_ids:
+            return set()
+        rows = self._connection().execute(
+            f"SELECT id FROM analyses WHERE id IN ({', '.join('?' * len(analysis_ids))})", analysis_ids).fetchall()
+        return {row[0] for row in rows}
+
+    def delete(self, analysis_id):
+        """
+        Removes a stored analysis. Returns True if it existed.
+        """
+        return self._connection().execute('DELETE FROM analyses WHERE id = ?', (analysis_id,)).rowcount > 0
+
+
+# Store shared by every worker process through its SQLite file
+analysis_store = AnalysisStore(
+    os.getenv("ANALYSIS_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "analysis_store.sqlite3")))
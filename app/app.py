@@ -1,28 +1,281 @@
 # Import necessary modules from Flask for web app creation and response handling
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g, send_from_directory, url_for, abort
 # Import json for parsing JSON data
 import json
-# Import LinkedIn data extraction functions from linkedin_extractor.py
-from linkedin_extractor import (
-    linkedin_profile_extractor, 
-    linkedin_job_description_extractor, 
-    linkedin_company_info_extractor, 
-    linkedin_job_company_extractor)
-# Import analysis functions from prompt_engineering.py that utilize OpenAI's GPT models
-from prompt_engineering import (
-    analyze_linkedin_profile, 
-    upload_resume_and_analyze,
-    analyze_linkedin_jd, 
-    job_matching_system)
+import math
+import time
+import mimetypes
+# Import the extraction + analysis pipelines built on linkedin_extractor.py and prompt_engineering.py
+from analysis_pipeline import (
+    analyze_profile_url,
+    analyze_job_url,
+    analyze_resume_file,
+    match_profile_against_jobs,
+    stream_profile_url_analysis,
+    stream_job_url_analysis,
+    stream_resume_file_analysis,
+    stream_match,
+    shortlist_candidates,
+    delete_analysis as delete_stored_analysis,
+    job_queue,
+    JOB_UPLOAD_DIR,
+    MATCH_BATCH_MAX_JOBS,
+    MATCH_BATCH_CONCURRENCY)
+# Import the resume size limit enforced while spooling uploads
+from resume_extraction import RESUME_MAX_BYTES, ResumeTooLargeError, spool_upload
+# Import the job states of the background queue
+from job_queue import DONE, FAILED
+# Import the store of completed analyses, referenced by ID in match requests
+from analysis_store import analysis_store, ANALYSIS_KINDS
+# Import the counters of incremental re-analyses
+from incremental_analysis import reanalysis_stats
+# Import the upstream schedulers, whose exhausted retries are reported as 503
+from upstream_scheduler import linkedin_scheduler, openai_scheduler, UpstreamUnavailableError
+# Import the coalescer of identical in-flight analyses
+from single_flight import single_flight
+# Import the matching function from prompt_engineering.py that utilizes OpenAI's GPT models
+from prompt_engineering import job_matching_system, analysis_cache, token_usage, truncation_stats, validation_stats, model_route_stats
+from linkedin_session import LinkedinResponseError
+# Import the caches whose statistics are exported as metrics
+from linkedin_extractor import linkedin_cache
+from resume_extraction import resume_text_cache
+from resume_sections import sectionizer_stats
+# Import the instrumentation: stage spans, the Server-Timing header and the Prometheus registry
+from metrics import registry, request_duration, start_request_timing, server_timing_header
+# Import the fingerprinted static assets and the compression of JSON responses
+from static_assets import AssetManifest, IMMUTABLE_CACHE_CONTROL
+from compression import compress_body
+
+# Matching modes of job_matching_system: 'full' adds the model's suggestions to the local scores, 'fast' skips the model
+MATCH_MODES = ('full', 'fast')
+
+# Longest time a client can wait on a job in a single poll
+JOB_MAX_WAIT = 60
 
 # Initialize Flask app
 app = Flask(__name__) 
+# Reject request bodies well above the resume size limit before they are read
+app.config['MAX_CONTENT_LENGTH'] = RESUME_MAX_BYTES + 1024 * 1024
+
+# Assets built by static_assets.py, read once at startup
+asset_manifest = AssetManifest()
+
+@app.template_global()
+def asset_url(filename):
+    """
+    Returns the URL of a static file: its fingerprinted, long-cached copy once the assets are built, the file itself otherwise.
+    """
+    built_name = asset_manifest.built_name(filename)
+    if built_name is None:
+        return url_for('static', filename=filename)
+    return url_for('asset', filename=built_name)
+
+def error_status(e):
+    """
+    Returns the HTTP status of an exception raised by an analysis: 503 if LinkedIn or OpenAI is unavailable
+    or saturated, 404 (or 400) when LinkedIn has no such profile or job, and 500 otherwise.
+    """
+    if isinstance(e, UpstreamUnavailableError):
+        return 503
+    if isinstance(e, LinkedinResponseError) and e.status_code in (400, 404, 410):
+        return 404 if e.status_code == 410 else e.status_code
+    return 500
+
+def error_response(e):
+    """
+    Returns the JSON error response of an exception raised by an analysis, with the status of error_status
+    and, for a 503, a Retry-After header when the delay is known.
+    """
+    response = jsonify({'error': str(e)})
+    if not isinstance(e, UpstreamUnavailableError):
+        return response, error_status(e)
+    if e.retry_after:
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+    return response, 503
+
+def sse_response(events):
+    """
+    Streams (event, path, data) tuples to the client as Server-Sent Events.
+
+    'section' events are sent as {"path": [...], "value": ...}, every other event as its data. An exception
+    raised while streaming is reported as a final 'error' event, since the status code has already been sent.
+    """
+    def format_event(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def generate():
+        try:
+            for event, path, data in events:
+                if event == 'section':
+                    data = {'path': list(path), 'value': data}
+                yield format_event(event, data)
+        except Exception as e:
+            yield format_event('error', {'error': str(e), 'status': error_status(e)})
+
+    # Disable caching and proxy buffering so each event reaches the browser immediately
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+def collect_app_metrics():
+    """
+    Exports the counters kept by the analysis modules (token usage, model costs, truncations, caches, coalescing, re-analyses, upstream schedulers, job queue) as metrics.
+    """
+    metrics = [
+        ('linkedin_analyzer_openai_calls_total', 'counter', 'OpenAI completions per analysis task.',
+         [({'task': task}, usage['calls']) for task, usage in token_usage.items()]),
+        ('linkedin_analyzer_openai_tokens_total', 'counter', 'Prompt and completion tokens per analysis task.',
+         [({'task': task, 'kind': 'prompt'}, usage['promptTokens']) for task, usage in token_usage.items()]
+         + [({'task': task, 'kind': 'completion'}, usage['completionTokens']) for task, usage in token_usage.items()]),
+        ('linkedin_analyzer_prompt_compaction_saved_tokens_total', 'counter', 'Prompt tokens saved by compaction per analysis task.',
+         [({'task': task}, usage['compactionSavedTokens']) for task, usage in token_usage.items()]),
+        ('linkedin_analyzer_openai_cost_usd_total', 'counter', 'Estimated OpenAI cost in USD per analysis task and model.',
+         [({'task': task, 'model': model}, counters['costUsd']) for task, routes in model_route_stats().items()
+          for model, counters in routes['models'].items()]),
+    ]
+
+    cache_stats = {'analysis': analysis_cache.stats(), 'linkedin': linkedin_cache.stats(), 'resume_text': resume_text_cache.stats()}
+    for name, metric_type, key, documentation in (
+            ('linkedin_analyzer_cache_hits_total', 'counter', 'hits', 'Cache lookups that found a valid entry.'),
+            ('linkedin_analyzer_cache_misses_total', 'counter', 'misses', 'Cache lookups that found no valid entry.'),
+            ('linkedin_analyzer_cache_hit_ratio', 'gauge', 'hitRate', 'Share of cache lookups that were hits.'),
+            ('linkedin_analyzer_cache_entries', 'gauge', 'entries', 'Entries stored in the cache.'),
+            ('linkedin_analyzer_cache_bytes', 'gauge', 'bytes', 'Total size of the values stored in the cache.')):
+        metrics.append((name, metric_type, documentation, [({'cache': cache}, stats[key]) for cache, stats in cache_stats.items()]))
+
+    coalescing = single_flight.stats()
+    metrics.append(('linkedin_analyzer_coalesced_calls_total', 'counter', 'Analyses served by joining an identical one in flight.',
+                     [({'operation': operation}, stats['saved']) for operation, stats in coalescing.items()]))
+
+    metrics.append(('linkedin_analyzer_reanalysis_sections_total', 'counter',
+                    'Sections of repeat profile and job analyses reused from the stored analysis or regenerated.',
+                    [({'kind': kind, 'outcome': 'reused'}, stats['sectionsReused']) for kind, stats in reanalysis_stats.items()]
+                    + [({'kind': kind, 'outcome': 'regenerated'}, stats['sectionsRegenerated']) for kind, stats in reanalysis_stats.items()]))
+
+    metrics.append(('linkedin_analyzer_openai_truncations_total', 'counter',
+                    'Completions cut off by their token cap per analysis task, by how their output was recovered.',
+                    [({'task': task, 'outcome': outcome}, counts[key]) for task, counts in truncation_stats.items()
+                     for outcome, key in (('truncated', 'truncated'), ('continued', 'completedByContinuation'),
+                                          ('repaired', 'repaired'), ('failed', 'failed'))]))
+    metrics.append(('linkedin_analyzer_openai_continuations_total', 'counter',
+                    'Follow-up completions asked for to finish truncated outputs.',
+                    [({'task': task}, counts['continuations']) for task, counts in truncation_stats.items()]))
+    metrics.append(('linkedin_analyzer_resume_tokens_total', 'counter',
+                    'Tokens of the text of the resumes structured (raw) and of what their prompts got after local sectioning (prompt).',
+                    [({'stage': 'raw'}, sectionizer_stats['rawTokens']), ({'stage': 'prompt'}, sectionizer_stats['promptTokens'])]))
+    metrics.append(('linkedin_analyzer_schema_violations_total', 'counter',
+                    'Model outputs that did not fit the record of their analysis task (see schemas.py).',
+                    [({'task': task}, counts['violations']) for task, counts in validation_stats.items()]))
+
+    upstreams = {'linkedin': linkedin_scheduler.stats(), 'openai': openai_scheduler.stats()}
+    for name, metric_type, key, documentation in (
+            ('linkedin_analyzer_upstream_concurrency_limit', 'gauge', 'concurrencyLimit', 'Adaptive limit of concurrent upstream calls.'),
+            ('linkedin_analyzer_upstream_in_flight', 'gauge', 'inFlight', 'Upstream calls in flight.'),
+            ('linkedin_analyzer_upstream_retries_total', 'counter', 'retries', 'Upstream calls retried after a rate limit or transient error.'),
+            ('linkedin_analyzer_upstream_rate_limited_total', 'counter', 'rateLimited', 'Upstream calls answered with HTTP 429.'),
+            ('linkedin_analyzer_upstream_gave_up_total', 'counter', 'gaveUp', 'Upstream calls that failed after every retry.')):
+        metrics.append((name, metric_type, documentation, [({'upstream': upstream}, stats[key]) for upstream, stats in upstreams.items()]))
+    metrics.append(('linkedin_analyzer_upstream_queued', 'gauge', 'Upstream calls waiting to be admitted, per priority lane.',
+                    [({'upstream': upstream, 'lane': lane}, count)
+                     for upstream, stats in upstreams.items() for lane, count in stats['queued'].items()]))
+
+    queue = job_queue.stats()
+    metrics.append(('linkedin_analyzer_job_queue_depth', 'gauge', 'Background jobs waiting to run.', [({}, queue['depth'])]))
+    metrics.append(('linkedin_analyzer_job_queue_running', 'gauge', 'Background jobs running.', [({}, queue['running'])]))
+    return metrics
+
+registry.add_collector(collect_app_metrics)
+
+# Start the background job workers in every process serving requests, not only in those submitting jobs,
+# so that queued jobs and jobs recovered from a dead worker run
+@app.before_request
+def start_job_workers():
+    job_queue.start()
+
+# Time every request: its stages are reported in a Server-Timing header and its duration in the metrics
+@app.before_request
+def start_timing():
+    g.request_started = time.perf_counter()
+    start_request_timing()
+
+@app.after_request
+def add_server_timing(response):
+    duration = time.perf_counter() - g.get('request_started', time.perf_counter())
+    # Streamed responses only include the stages that ran before the first event
+    stages = server_timing_header()
+    response.headers['Server-Timing'] = f'{stages}, total;dur={duration * 1000:.1f}' if stages else f'total;dur={duration * 1000:.1f}'
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_duration.observe(duration, route=route, method=request.method, status=response.status_code)
+    return response
+
+# Compress JSON responses for the clients that accept it; streams and files are left as they are
+@app.after_request
+def compress_json(response):
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers or response.mimetype != 'application/json':
+        return response
+    response.vary.add('Accept-Encoding')
+    body, encoding = compress_body(response.get_data(), request.headers.get('Accept-Encoding'), response.mimetype)
+    if encoding is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+# Define route for the metrics in the Prometheus text format
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def resolve_analysis(data, kind):
+    """
+    Returns the analysis of a kind ('profile' or 'job') given in a request body, either inline as
+    `<kind>_data` or as the ID of a stored analysis in `<kind>_id`. Returns None if neither is given.
+
+    Raises LookupError if the ID does not match a stored analysis of that kind.
+    """
+    if data.get(f'{kind}_data'):
+        return data[f'{kind}_data']
+    analysis_id = data.get(f'{kind}_id')
+    if not analysis_id:
+        return None
+    analysis = analysis_store.get(analysis_id, kind=kind)
+    if analysis is None:
+        raise LookupError(f"No {kind} analysis with ID '{analysis_id}'")
+    return analysis
+
+def number_argument(value, name, convert=int, minimum=1):
+    """
+    Returns a number given in a request (a JSON value or a query string argument) converted with `convert`.
+
+    Raises ValueError, with a message for the client, if it is not a number or is below `minimum`.
+    """
+    try:
+        number = convert(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number') from None
+    if number != number or number < minimum:
+        raise ValueError(f'{name} must be at least {minimum}')
+    return number
 
 # Define route for the index page, which serves the main HTML template
 @app.route('/')
 def index():
-    # Render and return the index.html template
-    return render_template('index.html')
+    # Render the index.html template; browsers revalidate it on every load, and get a 304 while it is unchanged
+    response = Response(render_template('index.html'), mimetype='text/html')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.add_etag()
+    return response.make_conditional(request)
+
+# Define route for the built assets, sent precompressed when the client accepts it and cached for a year
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    variant, encoding = asset_manifest.variant(filename, request.headers.get('Accept-Encoding'))
+    if variant is None:
+        abort(404)
+    response = send_from_directory(asset_manifest.build_dir, variant, mimetype=mimetypes.guess_type(filename)[0], conditional=True)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 # Define route for extracting and analyzing LinkedIn profile data
 @app.route('/extract_analyze_profile', methods=['POST'])
@@ -31,17 +284,17 @@ def extract_and_analyze_profile():
     data = request.json  
     # Get profile URL from the request data
     profile_url = data.get('profile_url')
+    # Clients can set 'refresh' to skip cached analyses and force a new one
+    use_cache = not data.get('refresh', False)
     if profile_url:
         try:
-            # Extract profile data from LinkedIn
-            profile_data = linkedin_profile_extractor(profile_url)
-            # Analyze extracted profile data using OpenAI
-            analysis_result = analyze_linkedin_profile(profile_data)
+            # Extract profile data from LinkedIn and analyze it using OpenAI
+            analysis_result = analyze_profile_url(profile_url, use_cache=use_cache)
             # Return the analysis result in JSON format
             return jsonify(analysis_result), 200
         except Exception as e:
             # Handle any errors during extraction or analysis
-            return jsonify({'error': str(e)}), 500
+            return error_response(e)
     else:
         # Return error if profile URL is missing
         return jsonify({'error': 'Profile URL is required'}), 400
@@ -54,19 +307,16 @@ def handle_resume_upload():
     if not file:
         # Return error if no file is provided
         return jsonify({'error': 'No resume file provided'}), 400
+    # Clients can set the 'refresh' form field to skip cached analyses and force a new one
+    use_cache = request.form.get('refresh', '').lower() not in ('1', 'true')
     try:
-        # Analyze the uploaded resume
-        resume_data = upload_resume_and_analyze(file)
-        if 'error' in resume_data:
-            # Check for errors in resume analysis
-            return jsonify(resume_data), 500  
-        # Analyze the structured resume data
-        analysis_result = analyze_linkedin_profile(resume_data)
-        # Return analysis result
-        return jsonify(analysis_result), 200
+        # Structure the uploaded resume and analyze the structured resume data
+        analysis_result, status_code = analyze_resume_file(file, use_cache=use_cache)
+        # Return analysis result, or the error raised while reading the resume
+        return jsonify(analysis_result), status_code
     except Exception as e:
         # Handle any exceptions during the process
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 # Define route for extracting and analyzing job data from LinkedIn
 @app.route('/extract_analyze_job', methods=['POST'])
@@ -75,17 +325,17 @@ def extract_analyze_job():
     data = request.json 
     # Get job URL from the request data
     job_url = data.get('job_url')
+    # Clients can set 'refresh' to skip cached analyses and force a new one
+    use_cache = not data.get('refresh', False)
     if job_url:
         try:  
-            # Extract and combine job and company data from LinkedIn
-            job_data = linkedin_job_company_extractor(job_url)
-            # Analyze the job description using OpenAI
-            jd_analysis_result = analyze_linkedin_jd(job_data)
+            # Extract and combine job and company data from LinkedIn, then analyze it using OpenAI
+            jd_analysis_result = analyze_job_url(job_url, use_cache=use_cache)
             # Return the job description analysis result
             return jsonify(jd_analysis_result), 200
         except Exception as e:
             # Handle errors during extraction or analysis
-            return jsonify({'error': str(e)}), 500
+            return error_response(e)
     else:
         # Return error if job URL is missing
         return jsonify({'error': 'Job URL is required'}), 400
@@ -99,21 +349,284 @@ def match_profiles():
         # Return error if request data is not JSON
         return jsonify({'error': 'Request must be JSON'}), 400
 
-    # Get profile and job data from the request
-    profile_data = data.get('profile_data')
-    job_data = data.get('job_data')
+    # Get profile and job data from the request, inline or as stored analysis IDs
+    try:
+        profile_data = resolve_analysis(data, 'profile')
+        job_data = resolve_analysis(data, 'job')
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     if not profile_data or not job_data:
         # Return error if either profile or job data is missing
-        return jsonify({'error': 'Both profile_data and job_data are required'}), 400
+        return jsonify({'error': 'A profile (profile_data or profile_id) and a job (job_data or job_id) are required'}), 400
+
+    mode = data.get('mode', 'full')
+    if mode not in MATCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
 
     try:
         # Match the profile with the job description
-        match_result = job_matching_system(profile_data, job_data)
+        match_result = job_matching_system(profile_data, job_data, use_cache=not data.get('refresh', False), mode=mode)
         # Return the match result
         return jsonify(match_result), 200
     except Exception as e:
         # Handle any errors during matching
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+# Define streaming variants of the analysis routes, pushing each section of the result as soon as it is generated
+@app.route('/extract_analyze_profile/stream', methods=['POST'])
+def stream_extract_and_analyze_profile():
+    data = request.json or {}
+    profile_url = data.get('profile_url')
+    if not profile_url:
+        return jsonify({'error': 'Profile URL is required'}), 400
+    return sse_response(stream_profile_url_analysis(profile_url, use_cache=not data.get('refresh', False)))
+
+@app.route('/upload_analyze_resume/stream', methods=['POST'])
+def stream_resume_upload():
+    file = request.files.get('resume')
+    if not file:
+        return jsonify({'error': 'No resume file provided'}), 400
+    use_cache = request.form.get('refresh', '').lower() not in ('1', 'true')
+    return sse_response(stream_resume_file_analysis(file, use_cache=use_cache))
+
+@app.route('/extract_analyze_job/stream', methods=['POST'])
+def stream_extract_analyze_job():
+    data = request.json or {}
+    job_url = data.get('job_url')
+    if not job_url:
+        return jsonify({'error': 'Job URL is required'}), 400
+    return sse_response(stream_job_url_analysis(job_url, use_cache=not data.get('refresh', False)))
+
+@app.route('/match_profiles/stream', methods=['POST'])
+def stream_match_profiles():
+    data = request.json or {}
+    try:
+        profile_data = resolve_analysis(data, 'profile')
+        job_data = resolve_analysis(data, 'job')
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    if not profile_data or not job_data:
+        return jsonify({'error': 'A profile (profile_data or profile_id) and a job (job_data or job_id) are required'}), 400
+    mode = data.get('mode', 'full')
+    if mode not in MATCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
+    return sse_response(stream_match(profile_data, job_data, use_cache=not data.get('refresh', False), mode=mode))
+
+# Define route for matching one profile against many jobs, streaming results as NDJSON
+@app.route('/match_batch', methods=['POST'])
+def match_batch():
+    # Parse JSON data from the POST request
+    data = request.json
+    if not data:
+        # Return error if request data is not JSON
+        return jsonify({'error': 'Request must be JSON'}), 400
+
+    # Get the profile analysis and the jobs: LinkedIn job URLs, job analyses and/or stored job analysis IDs
+    try:
+        profile_data = resolve_analysis(data, 'profile')
+        stored_jobs = [resolve_analysis({'job_id': job_id}, 'job') for job_id in data.get('job_ids') or []]
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    jobs = list(data.get('job_urls') or []) + list(data.get('job_data') or []) + stored_jobs
+    if not profile_data or not jobs:
+        # Return error if the profile or the jobs are missing
+        return jsonify({'error': 'A profile (profile_data or profile_id) and at least one of job_urls, job_data or job_ids are required'}), 400
+    if len(jobs) > MATCH_BATCH_MAX_JOBS:
+        return jsonify({'error': f'At most {MATCH_BATCH_MAX_JOBS} jobs can be matched in one batch'}), 400
+
+    mode = data.get('mode', 'full')
+    if mode not in MATCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
+
+    try:
+        concurrency = min(number_argument(data.get('concurrency', MATCH_BATCH_CONCURRENCY), 'concurrency'), MATCH_BATCH_CONCURRENCY)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    use_cache = not data.get('refresh', False)
+
+    # Stream one JSON line per job as soon as it is matched, followed by the final ranking
+    def generate():
+        for entry in match_profile_against_jobs(profile_data, jobs, concurrency=concurrency, use_cache=use_cache, mode=mode):
+            yield json.dumps(entry) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Define route for shortlisting the analyzed profiles that best fit a job, optionally matching only those
+@app.route('/shortlist', methods=['POST'])
+def shortlist():
+    # Parse JSON data from the POST request
+    data = request.json
+    if not data:
+        # Return error if request data is not JSON
+        return jsonify({'error': 'Request must be JSON'}), 400
+
+    # Get the job: an existing job analysis (inline or by ID) or a LinkedIn job URL
+    try:
+        job_data = resolve_analysis(data, 'job')
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    job_url = data.get('job_url')
+    if not job_data and not job_url:
+        return jsonify({'error': 'job_data, job_id or job_url is required'}), 400
+
+    mode = data.get('mode', 'full')
+    if mode not in MATCH_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
+
+    try:
+        k = number_argument(data.get('k', 10), 'k')
+        concurrency = min(number_argument(data.get('concurrency', MATCH_BATCH_CONCURRENCY), 'concurrency'), MATCH_BATCH_CONCURRENCY)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    use_cache = not data.get('refresh', False)
+    try:
+        if not job_data:
+            job_data = analyze_job_url(job_url, use_cache=use_cache)
+        result = shortlist_candidates(
+            job_data,
+            k=k,
+            match=bool(data.get('match', False)),
+            concurrency=concurrency,
+            use_cache=use_cache,
+            mode=mode)
+        return jsonify(result), 200
+    except Exception as e:
+        # Handle any errors during retrieval or matching
+        return error_response(e)
+
+# Define route for listing stored analyses, most recent first, one page at a time
+@app.route('/analyses', methods=['GET'])
+def list_analyses():
+    kind = request.args.get('kind')
+    if kind is not None and kind not in ANALYSIS_KINDS:
+        return jsonify({'error': f"kind must be one of {', '.join(ANALYSIS_KINDS)}"}), 400
+    try:
+        page = analysis_store.list(kind=kind, limit=int(request.args.get('limit', 20)), cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page), 200
+
+# Define routes for reading and deleting a stored analysis
+@app.route('/analyses/<analysis_id>', methods=['GET'])
+def get_analysis(analysis_id):
+    analysis = analysis_store.get(analysis_id)
+    if analysis is None:
+        return jsonify({'error': 'Analysis not found'}), 404
+    return jsonify(analysis), 200
+
+@app.route('/analyses/<analysis_id>', methods=['DELETE'])
+def delete_analysis(analysis_id):
+    if not delete_stored_analysis(analysis_id):
+        return jsonify({'error': 'Analysis not found'}), 404
+    return '', 204
+
+# Define route for the counters of duplicate calls saved by coalescing, re-analyses, truncated completions, schema violations,
+# resume sectioning, model routes and upstream calls
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        'coalescing': single_flight.stats(),
+        'reanalysis': reanalysis_stats,
+        'truncation': {
+            task: dict(counts,
+                       truncationRate=round(counts['truncated'] / counts['completions'], 4) if counts['completions'] else 0.0,
+                       continuationSuccessRate=round(counts['completedByContinuation'] / counts['truncated'], 4) if counts['truncated'] else None)
+            for task, counts in truncation_stats.items()
+        },
+        'validation': validation_stats,
+        'resumeSectioning': dict(sectionizer_stats,
+                                 savedTokensPerResume=round((sectionizer_stats['rawTokens'] - sectionizer_stats['promptTokens'])
+                                                            / sectionizer_stats['resumes'], 1) if sectionizer_stats['resumes'] else None),
+        'models': model_route_stats(),
+        'upstreams': {'linkedin': linkedin_scheduler.stats(), 'openai': openai_scheduler.stats()},
+    }), 200
+
+# Define route for submitting a profile, job, resume or match analysis as a background job
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    # A resume is uploaded as multipart form data; every other job type is described by a JSON body
+    file = request.files.get('resume')
+    if file:
+        try:
+            spooled = spool_upload(file, directory=JOB_UPLOAD_DIR)
+        except ResumeTooLargeError as e:
+            return jsonify({'error': str(e)}), 413
+        use_cache = request.form.get('refresh', '').lower() not in ('1', 'true')
+        job_type, payload = 'resume', {'path': spooled.path, 'use_cache': use_cache}
+    else:
+        data = request.json
+        if not data:
+            # Return error if request data is not JSON
+            return jsonify({'error': 'Request must be JSON'}), 400
+        job_type = data.get('type')
+        use_cache = not data.get('refresh', False)
+        if job_type == 'profile' and data.get('profile_url'):
+            payload = {'profile_url': data['profile_url'], 'use_cache': use_cache}
+        elif job_type == 'job' and data.get('job_url'):
+            payload = {'job_url': data['job_url'], 'use_cache': use_cache}
+        elif job_type == 'match':
+            try:
+                profile_data = resolve_analysis(data, 'profile')
+                job_data = resolve_analysis(data, 'job')
+            except LookupError as e:
+                return jsonify({'error': str(e)}), 404
+            if not profile_data or not job_data:
+                return jsonify({'error': 'A match job needs a profile (profile_data or profile_id) and a job (job_data or job_id)'}), 400
+            mode = data.get('mode', 'full')
+            if mode not in MATCH_MODES:
+                return jsonify({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}), 400
+            payload = {'profile_data': profile_data, 'job_data': job_data, 'use_cache': use_cache, 'mode': mode}
+        else:
+            return jsonify({'error': "type must be 'profile' (with profile_url), 'job' (with job_url) or 'match'"}), 400
+
+    job_id = job_queue.submit(job_type, payload)
+    return jsonify({
+        'jobId': job_id,
+        'status': 'queued',
+        'statusUrl': f'/jobs/{job_id}',
+        'streamUrl': f'/jobs/{job_id}/stream',
+    }), 202
+
+# Define route for the statistics of the background queue
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    return jsonify(job_queue.stats()), 200
+
+# Define route for polling a background job; ?wait=<seconds> holds the request until the job is finished
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        wait = min(number_argument(request.args.get('wait', 0) or 0, 'wait', convert=float, minimum=0), JOB_MAX_WAIT)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = job_queue.wait(job_id, timeout=wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+# Define route for subscribing to a background job: status events until a final 'done' or 'error' event
+@app.route('/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        while True:
+            job = job_queue.wait(job_id, timeout=15)
+            if job is None:
+                yield 'error', None, {'error': 'Job not found'}
+                return
+            if job['status'] == DONE:
+                yield 'done', None, job['result']
+                return
+            if job['status'] == FAILED:
+                yield 'error', None, {'error': job['error']}
+                return
+            # Sent at least every 15 seconds, so the status also keeps the connection alive
+            yield 'status', None, {'stage': job['status'], 'position': job.get('position')}
+
+    return sse_response(events())
 
 # Run the Flask
 if __name__ == '__main__':
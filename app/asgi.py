@@ -0,0 +1,189 @@
+"""
+Async entry point of the web app, for production serving:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+The analysis and match routes are served by async handlers: while an analysis waits on OpenAI it holds
+no thread, so a single process keeps thousands of analyses in flight with a small, fixed thread count.
+LinkedIn calls (linkedin_api is synchronous) and PDF extraction run on the bounded blocking pool of
+io_steps. Every other route, including the streaming variants, is served by the Flask app (app.py),
+mounted underneath.
+"""
+import os
+import math
+import time
+from types import SimpleNamespace
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Mount
+from io_steps import Blocking, run_steps_async
+from analysis_pipeline import analyze_profile_url_steps, analyze_job_url_steps, analyze_resume_file_steps, job_queue
+from prompt_engineering import job_matching_system_steps
+from upstream_scheduler import UpstreamUnavailableError
+from metrics import request_duration, start_request_timing, server_timing_header
+from compression import compress_body
+from app import app as flask_app, resolve_analysis, error_status, MATCH_MODES
+
+# Threads of the Flask app mounted under the async routes
+WSGI_WORKERS = int(os.getenv("WSGI_WORKERS", "32"))
+
+# Largest request body read by the async routes, the Flask app's MAX_CONTENT_LENGTH
+MAX_CONTENT_LENGTH = flask_app.config['MAX_CONTENT_LENGTH']
+
+
+class RequestTooLargeError(ValueError):
+    pass
+
+
+def error_response(e):
+    # Same responses as app.error_response: 503 (with Retry-After when known) for an unavailable upstream,
+    # 404 for a missing LinkedIn profile or job, 500 otherwise
+    if not isinstance(e, UpstreamUnavailableError):
+        return JSONResponse({'error': str(e)}, status_code=error_status(e))
+    headers = {'Retry-After': str(math.ceil(e.retry_after))} if e.retry_after else None
+    return JSONResponse({'error': str(e)}, status_code=503, headers=headers)
+
+
+def compress_response(request, response):
+    # Compresses a JSON response for the clients that accept it, like the Flask app
+    response.headers['Vary'] = 'Accept-Encoding'
+    body, encoding = compress_body(response.body, request.headers.get('Accept-Encoding'), response.media_type)
+    if encoding is not None:
+        response.body = body
+        response.headers['Content-Length'] = str(len(body))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def timed_route(path, endpoint):
+    # Reports the stages of each request in a Server-Timing header and its duration in the metrics, like the Flask app
+    async def timed_endpoint(request):
+        started = time.perf_counter()
+        start_request_timing()
+        response = compress_response(request, await endpoint(request))
+        duration = time.perf_counter() - started
+        stages = server_timing_header()
+        response.headers['Server-Timing'] = f'{stages}, total;dur={duration * 1000:.1f}' if stages else f'total;dur={duration * 1000:.1f}'
+        request_duration.observe(duration, route=path, method=request.method, status=response.status_code)
+        return response
+    return Route(path, timed_endpoint, methods=['POST'])
+
+
+def _limited_request(request, limit):
+    # The request with its body capped at `limit` bytes: reading past the cap raises RequestTooLargeError,
+    # so a body sent without a Content-Length (chunked) is not read to the end either
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > limit:
+                raise RequestTooLargeError(f'The request body exceeds {limit} bytes')
+        return message
+    return Request(request.scope, receive)
+
+
+def _too_large_response(limit):
+    return JSONResponse({'error': f'The request body exceeds {limit} bytes'}, status_code=413)
+
+
+async def _json_body(request):
+    # The JSON body of a request, or None if it has none (like Flask's request.json)
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def extract_and_analyze_profile(request):
+    data = await _json_body(request) or {}
+    profile_url = data.get('profile_url')
+    if not profile_url:
+        return JSONResponse({'error': 'Profile URL is required'}, status_code=400)
+    try:
+        analysis_result = await run_steps_async(analyze_profile_url_steps(profile_url, use_cache=not data.get('refresh', False)))
+        return JSONResponse(analysis_result)
+    except Exception as e:
+        return error_response(e)
+
+
+async def extract_analyze_job(request):
+    data = await _json_body(request) or {}
+    job_url = data.get('job_url')
+    if not job_url:
+        return JSONResponse({'error': 'Job URL is required'}, status_code=400)
+    try:
+        jd_analysis_result = await run_steps_async(analyze_job_url_steps(job_url, use_cache=not data.get('refresh', False)))
+        return JSONResponse(jd_analysis_result)
+    except Exception as e:
+        return error_response(e)
+
+
+async def handle_resume_upload(request):
+    # Rejects an oversized upload before reading it, like Flask with MAX_CONTENT_LENGTH; the form parser
+    # spools the file part to disk past 1 MB, so even an accepted upload is not held in memory
+    content_length = request.headers.get('Content-Length', '')
+    if content_length.isdigit() and int(content_length) > MAX_CONTENT_LENGTH:
+        return _too_large_response(MAX_CONTENT_LENGTH)
+    try:
+        form = await _limited_request(request, MAX_CONTENT_LENGTH).form()
+    except RequestTooLargeError:
+        return _too_large_response(MAX_CONTENT_LENGTH)
+    upload = form.get('resume')
+    if not upload or isinstance(upload, str):
+        return JSONResponse({'error': 'No resume file provided'}, status_code=400)
+    use_cache = str(form.get('refresh', '')).lower() not in ('1', 'true')
+    try:
+        # spool_upload reads the upload in a thread of the blocking pool, like a Flask FileStorage
+        file = SimpleNamespace(read=upload.file.read, filename=upload.filename)
+        analysis_result, status_code = await run_steps_async(analyze_resume_file_steps(file, use_cache=use_cache))
+        return JSONResponse(analysis_result, status_code=status_code)
+    except Exception as e:
+        return error_response(e)
+    finally:
+        await upload.close()
+
+
+async def match_profiles(request):
+    data = await _json_body(request)
+    if not data:
+        return JSONResponse({'error': 'Request must be JSON'}, status_code=400)
+
+    try:
+        # Stored analyses are read from SQLite in the blocking pool, so a slow disk or a locked database
+        # does not stall the event loop
+        profile_data = await Blocking(resolve_analysis, data, 'profile').run_async()
+        job_data = await Blocking(resolve_analysis, data, 'job').run_async()
+    except LookupError as e:
+        return JSONResponse({'error': str(e)}, status_code=404)
+    if not profile_data or not job_data:
+        return JSONResponse({'error': 'A profile (profile_data or profile_id) and a job (job_data or job_id) are required'}, status_code=400)
+
+    mode = data.get('mode', 'full')
+    if mode not in MATCH_MODES:
+        return JSONResponse({'error': f"mode must be one of {', '.join(MATCH_MODES)}"}, status_code=400)
+
+    try:
+        match_result = await run_steps_async(job_matching_system_steps(
+            profile_data, job_data, use_cache=not data.get('refresh', False), mode=mode))
+        return JSONResponse(match_result)
+    except Exception as e:
+        return error_response(e)
+
+
+app = Starlette(routes=[
+    timed_route('/extract_analyze_profile', extract_and_analyze_profile),
+    timed_route('/extract_analyze_job', extract_analyze_job),
+    timed_route('/upload_analyze_resume', handle_resume_upload),
+    timed_route('/match_profiles', match_profiles),
+    Mount('/', app=WSGIMiddleware(flask_app, workers=WSGI_WORKERS)),
+], on_startup=[job_queue.start])
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "5000")))
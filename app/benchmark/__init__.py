@@ -0,0 +1,3 @@
+"""
+Offline benchmark harness with simulated LinkedIn and OpenAI backends. See benchmark/run.py.
+"""
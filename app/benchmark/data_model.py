@@ -0,0 +1,89 @@
+"""
+Micro-benchmark of the typed records (schemas.py) against the plain dictionaries they replace.
+
+Run from the app/ directory:
+
+    python -m benchmark.data_model --count 5000
+
+Holds --count copies of the recorded profile and job analyses (benchmark/fixtures.json) in memory, as
+parsed dictionaries and as records, and reports the memory each representation takes (measured with
+tracemalloc) and the time to serialize them the way the code used to (json.dumps with indent=4) and
+with to_json().
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARK_DIR)
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from schemas import ProfileAnalysis, JobAnalysis
+
+# Recorded analysis of each record type
+FIXTURES = {ProfileAnalysis: 'profile_analysis', JobAnalysis: 'jd_analysis'}
+
+
+def _texts(count):
+    # JSON texts of distinct analyses, so that no two copies share their strings
+    with open(os.path.join(BENCHMARK_DIR, 'fixtures.json')) as fixtures_file:
+        fixtures = json.load(fixtures_file)['openai']
+    texts = []
+    for index in range(count):
+        for record_type, task in FIXTURES.items():
+            analysis = dict(fixtures[task], overview=f"{fixtures[task]['overview']} ({index})")
+            texts.append((record_type, json.dumps(analysis)))
+    return texts
+
+
+def _measure_memory(build):
+    # Bytes still allocated once build() has returned, and what it returned
+    tracemalloc.start()
+    try:
+        built = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current, built
+
+
+def _best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the memory and serialization time of records and dictionaries.')
+    parser.add_argument('--count', type=int, default=5000, help='Copies of each recorded analysis.')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each serialization; the best one is reported.')
+    args = parser.parse_args(argv)
+
+    texts = _texts(args.count)
+    dict_bytes, dicts = _measure_memory(lambda: [json.loads(text) for _, text in texts])
+    record_bytes, records = _measure_memory(lambda: [record_type.from_dict(json.loads(text)) for record_type, text in texts])
+    # Records keep their fields' order and values, so both representations serialize to the same data
+    assert [record.to_dict() for record in records] == dicts
+
+    parse_time = _best_time(lambda: [record_type.from_dict(json.loads(text)) for record_type, text in texts], args.repeat)
+    indented_time = _best_time(lambda: [json.dumps(analysis, indent=4) for analysis in dicts], args.repeat)
+    canonical_time = _best_time(lambda: [record.to_json() for record in records], args.repeat)
+
+    print(f"{len(texts)} analyses ({args.count} profile and {args.count} job analyses)")
+    print(f"memory        dict {dict_bytes / 2 ** 20:8.1f} MiB   record {record_bytes / 2 ** 20:8.1f} MiB"
+          f"   ({record_bytes / dict_bytes:.0%} of the dictionaries)")
+    print(f"serialization json.dumps(indent=4) {indented_time * 1000:8.1f} ms   to_json() {canonical_time * 1000:8.1f} ms"
+          f"   ({indented_time / canonical_time:.1f}x faster)")
+    print(f"parsing       json.loads + from_dict {parse_time * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+import re
+import copy
+import json
+import math
+import hashlib
+import time
+import asyncio
+import random
+import threading
+from types import SimpleNamespace
+
+# Phrases identifying the analysis task of a prompt, checked in order
+TASK_MARKERS = [
+    ('resume_structuring', 'Given the following resume'),
+    ('job_matching', 'Evaluate the compatibility'),
+    ('profile_analysis', 'Analyze the LinkedIn profile'),
+    ('jd_analysis', 'Analyze the job description'),
+    ('profile_update', 'The LinkedIn profile below has changed'),
+    ('jd_update', 'The job description below has changed'),
+]
+
+# Tasks answered with the fixture of another task: partial re-analyses pick their sections from a full analysis
+FIXTURE_TASKS = {'profile_update': 'profile_analysis', 'jd_update': 'jd_analysis'}
+
+# Heading of the JSON schema a prompt asks the model to fill, followed by the schema
+_SCHEMA_HEADING = re.compile(r"Schema[^\n]*:\*\*\s*")
+
+
+class FakeUpstreamError(RuntimeError):
+    """
+    Raised by the fake clients to simulate a failed LinkedIn or OpenAI call.
+    """
+
+
+class LatencyModel:
+    """
+    A log-normal latency distribution described by its median and 95th percentile, in seconds.
+    """
+
+    def __init__(self, median, p95):
+        self.median = median
+        self.p95 = max(p95, median)
+        self._sigma = math.log(self.p95 / median) / 1.645 if median > 0 else 0.0
+
+    def sample(self, rng):
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(rng.gauss(0.0, self._sigma))
+
+    def to_dict(self):
+        return {'median': self.median, 'p95': self.p95}
+
+
+def percentile(values, fraction):
+    """
+    Returns the value at a given fraction (e.g. 0.95) of a list of numbers, or None if the list is empty.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(math.ceil(len(values) * fraction)) - 1, len(values) - 1)] if fraction > 0 else values[0]
+
+
+class UpstreamSimulator:
+    """
+    Simulates the latency and failures of upstream calls and records how long each stage took.
+
+    Parameters:
+    - latencies (dict): Stage name (e.g. 'linkedin.get_profile', 'openai.profile_analysis') -> LatencyModel.
+    - error_rates (dict): Stage prefix ('linkedin', 'openai') or full stage name -> probability of failure.
+    - time_scale (float): Multiplier applied to every sampled latency, to shorten runs on CI.
+    - seed (int): Seed of the random generator, so runs are reproducible.
+    """
+
+    def __init__(self, latencies, error_rates=None, time_scale=1.0, seed=0):
+        self.latencies = latencies
+        self.error_rates = error_rates or {}
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._durations = {}
+        self._errors = {}
+
+    def _error_rate(self, stage):
+        return self.error_rates.get(stage, self.error_rates.get(stage.split('.')[0], 0.0))
+
+    def _draw(self, stage, scale):
+        with self._rng_lock:
+            latency = self.latencies[stage].sample(self._rng) * self.time_scale * scale
+            failed = self._rng.random() < self._error_rate(stage)
+        return latency, failed
+
+    def call(self, stage, scale=1.0):
+        """
+        Sleeps for a latency drawn from the stage's distribution (multiplied by `scale`), then fails with the stage's error rate.
+        """
+        latency, failed = self._draw(stage, scale)
+        time.sleep(latency)
+        self._record(stage, latency, failed)
+
+    async def acall(self, stage, scale=1.0):
+        """
+        Async counterpart of call(), suspending the calling task instead of its thread.
+        """
+        latency, failed = self._draw(stage, scale)
+        await asyncio.sleep(latency)
+        self._record(stage, latency, failed)
+
+    def _record(self, stage, latency, failed):
+        with self._stats_lock:
+            self._durations.setdefault(stage, []).append(latency)
+            if failed:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+        if failed:
+            raise FakeUpstreamError(f"Simulated failure of {stage}")
+
+    def reset(self):
+        with self._stats_lock:
+            self._durations = {}
+            self._errors = {}
+
+    def summary(self):
+        """
+        Returns, for each stage, the number of calls and failures and the latency percentiles in seconds.
+        """
+        with self._stats_lock:
+            return {
+                stage: {
+                    'calls': len(durations),
+                    'errors': self._errors.get(stage, 0),
+                    'p50': percentile(durations, 0.50),
+                    'p95': percentile(durations, 0.95),
+                    'p99': percentile(durations, 0.99),
+                    'total': sum(durations),
+                }
+                for stage, durations in sorted(self._durations.items())
+            }
+
+
+def make_fake_linkedin(simulator, fixtures):
+    """
+    Returns a stand-in for the linkedin_api Linkedin class answering with recorded fixture payloads.
+
+    Profiles and jobs carry the requested ID at the start of their summary or description, so that two
+    IDs give two different analysis inputs (and analysis cache keys), as real profiles and jobs would.
+    Every job belongs to the recorded company.
+    """
+
+    class FakeLinkedin:
+        def __init__(self, username, password, refresh_cookies=False, cookies_dir=None, **kwargs):
+            self.username = username
+
+        def _answer(self, method):
+            simulator.call(f'linkedin.{method}')
+            return copy.deepcopy(fixtures['linkedin'][method])
+
+        def get_profile(self, public_id=None, urn_id=None):
+            profile = self._answer('get_profile')
+            profile['summary'] = f"[{public_id or urn_id}] {profile.get('summary') or ''}"
+            return profile
+
+        def get_profile_skills(self, public_id=None, urn_id=None):
+            return self._answer('get_profile_skills')
+
+        def get_job(self, job_id):
+            job = self._answer('get_job')
+            job['description'] = dict(job.get('description') or {}, text=f"[{job_id}] {(job.get('description') or {}).get('text', '')}")
+            return job
+
+        def get_company(self, public_id):
+            return self._answer('get_company')
+
+    return FakeLinkedin
+
+
+class FakeOpenAI:
+    """
+    A stand-in for the OpenAI client's chat completions, answering each analysis task with its fixture.
+
+    Only `client.chat.completions.create` is implemented, with and without stream=True. A prompt asking for
+    some sections of an analysis (a group of a sectioned analysis, or a partial re-analysis) is answered with
+    those sections only. Generating the output dominates a completion's latency, so the latency drawn from
+    the task's model, which stands for the fixture's full answer, is scaled by the share of its tokens the
+    answer emits. The token cap of the call plays no part.
+    """
+
+    def __init__(self, simulator, fixtures):
+        self._simulator = simulator
+        self._fixtures = fixtures
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def task_of(prompt):
+        for task, marker in TASK_MARKERS:
+            if marker in prompt:
+                return task
+        raise ValueError("The fake OpenAI client does not recognize this prompt")
+
+    def _create(self, messages, stream=False, **kwargs):
+        task, content, usage = self._answer(messages)
+        self._simulator.call(f'openai.{task}', self._latency_scale(task, usage))
+        return self._response(content, usage, stream, kwargs)
+
+    @staticmethod
+    def _requested_sections(prompt, fixture):
+        # The part of the fixture whose sections (and, one level down, members) the prompt's schema asks for
+        heading = _SCHEMA_HEADING.search(prompt)
+        if heading is None:
+            return fixture
+        try:
+            schema, _ = json.JSONDecoder().raw_decode(prompt, heading.end())
+        except ValueError:
+            return fixture
+        answer = {}
+        for section, expected in schema.items():
+            if section not in fixture:
+                continue
+            value = fixture[section]
+            if isinstance(expected, dict) and isinstance(value, dict) and set(expected) & set(value):
+                value = {member: value[member] for member in expected if member in value}
+            answer[section] = value
+        return answer
+
+    def _answer(self, messages):
+        # The task of a completion, its content and its token usage
+        prompt = messages[-1]['content']
+        task = self.task_of(prompt)
+        answer = self._requested_sections(prompt, self._fixtures['openai'][FIXTURE_TASKS.get(task, task)])
+        if task == 'resume_structuring':
+            # Each resume is structured into a distinct profile, whose analysis is not answered from the cache
+            answer = dict(answer, summary=f"[{hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]}] {answer.get('summary') or ''}")
+        content = json.dumps(answer)
+        return task, content, SimpleNamespace(prompt_tokens=_tokens(prompt), completion_tokens=_tokens(content))
+
+    def _latency_scale(self, task, usage):
+        # Share of the full fixture's tokens emitted by a completion
+        return usage.completion_tokens / _tokens(json.dumps(self._fixtures['openai'][FIXTURE_TASKS.get(task, task)]))
+
+    def _response(self, content, usage, stream, kwargs):
+        if not stream:
+            choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason='stop', index=0)
+            return SimpleNamespace(choices=[choice], usage=usage, model=kwargs.get('model'))
+        return self._chunks(content, usage, kwargs.get('model'))
+
+    @staticmethod
+    def _chunks(content, usage, model):
+        # Small deltas like the real API, then a final chunk with the usage and no choices
+        for start in range(0, len(content), 16):
+            delta = SimpleNamespace(content=content[start:start + 16])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None, index=0)], usage=None, model=model)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason='stop', index=0)], usage=None, model=model)
+        yield SimpleNamespace(choices=[], usage=usage, model=model)
+
+
+def _tokens(text):
+    # Rough token count of the fakes, 4 characters per token
+    return (len(text) + 3) // 4
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """
+    The AsyncOpenAI counterpart of FakeOpenAI, whose completions wait on the event loop. A stream is an
+    async iterator of the same chunks, like the AsyncStream of the real client.
+    """
+
+    async def _create(self, messages, stream=False, **kwargs):
+        task, content, usage = self._answer(messages)
+        await self._simulator.acall(f'openai.{task}', self._latency_scale(task, usage))
+        if not stream:
+            return self._response(content, usage, stream, kwargs)
+        return self._async_chunks(content, usage, kwargs.get('model'))
+
+    async def _async_chunks(self, content, usage, model):
+        for chunk in self._chunks(content, usage, model):
+            yield chunk
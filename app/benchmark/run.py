@@ -0,0 +1,344 @@
+"""
+Offline benchmark of the web routes, with simulated LinkedIn and OpenAI backends.
+
+Run from the app/ directory:
+
+    python -m benchmark.run --concurrency 1,4,16 --requests 40 --time-scale 0.1
+
+Every request uses a new profile, job, resume or match: the simulated LinkedIn profiles and jobs carry
+the requested ID and each resume is structured into a distinct profile, so neither the LinkedIn caches
+nor the analysis cache hide upstream latency. All jobs share one company, whose fetch is cached after
+the first job like a popular employer's would be (pass --repeat to send identical requests instead). Results are printed and saved as JSON in
+benchmark/results/, and --compare <results.json> reports the change against an earlier run. Pass
+--server async to serve the routes with the async app (asgi.py) instead of the threaded Flask server.
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import argparse
+import tempfile
+import socket
+import platform
+import threading
+import subprocess
+import urllib.request
+import urllib.error
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark.fakes import LatencyModel, UpstreamSimulator, FakeOpenAI, FakeAsyncOpenAI, make_fake_linkedin, percentile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(BENCHMARK_DIR)
+
+ROUTES = ('profile', 'job', 'resume', 'match')
+
+# Default upstream latencies in seconds (median, p95), in line with what the live services show
+DEFAULT_LATENCIES = {
+    'linkedin.get_profile': (0.6, 1.8),
+    'linkedin.get_profile_skills': (0.4, 1.2),
+    'linkedin.get_job': (0.5, 1.5),
+    'linkedin.get_company': (0.4, 1.2),
+    'openai.resume_structuring': (6.0, 14.0),
+    'openai.profile_analysis': (8.0, 18.0),
+    'openai.jd_analysis': (7.0, 16.0),
+    'openai.job_matching': (4.0, 9.0),
+    # Partial re-analyses of a profile or job analyzed before (e.g. with --repeat). Like every completion, they
+    # take the share of these latencies (those of a full analysis) that their output is of the full fixture.
+    'openai.profile_update': (8.0, 18.0),
+    'openai.jd_update': (7.0, 16.0),
+}
+
+
+def _configure_environment(work_dir, execution):
+    # Isolate every cache, queue and index in a scratch directory, and provide dummy credentials
+    defaults = {
+        'OPENAI_API_KEY': 'benchmark',
+        'LINKEDIN_USERNAME': 'benchmark@example.com',
+        'LINKEDIN_PASSWORD': 'benchmark',
+        'LINKEDIN_ACCOUNTS': '[]',
+        'LINKEDIN_ACCOUNT_REQUESTS_PER_HOUR': str(10 ** 9),
+        # The simulated upstreams have no quotas: the schedulers' per-minute budgets would throttle the runs
+        'LINKEDIN_REQUESTS_PER_MINUTE': str(10 ** 9),
+        'OPENAI_REQUESTS_PER_MINUTE': str(10 ** 9),
+        'OPENAI_TOKENS_PER_MINUTE': str(10 ** 12),
+        'LINKEDIN_COOKIES_DIR': os.path.join(work_dir, 'linkedin_cookies'),
+        'LINKEDIN_CACHE_PATH': os.path.join(work_dir, 'linkedin_cache.sqlite3'),
+        'ANALYSIS_CACHE_PATH': os.path.join(work_dir, 'analysis_cache.sqlite3'),
+        'RESUME_TEXT_CACHE_PATH': os.path.join(work_dir, 'resume_text.sqlite3'),
+        'CANDIDATE_INDEX_PATH': os.path.join(work_dir, 'candidate_index.jsonl'),
+        'JOB_QUEUE_PATH': os.path.join(work_dir, 'job_queue.sqlite3'),
+        'ANALYSIS_STORE_PATH': os.path.join(work_dir, 'analysis_store.sqlite3'),
+        'ANALYSIS_EXECUTION': execution,
+    }
+    for name, value in defaults.items():
+        os.environ[name] = value
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+
+def _install_fakes(simulator, fixtures):
+    # The LinkedIn pool logs in lazily, so replacing the client class before the first call is enough
+    import linkedin_session
+    import prompt_engineering
+
+    linkedin_session.Linkedin = make_fake_linkedin(simulator, fixtures)
+    prompt_engineering.client = FakeOpenAI(simulator, fixtures)
+    prompt_engineering.async_client = FakeAsyncOpenAI(simulator, fixtures)
+
+
+def _start_server(kind):
+    # Returns the base URL of the server and a function stopping it
+    if kind == 'threaded':
+        from werkzeug.serving import make_server
+        from app import app
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, name='benchmark-server', daemon=True).start()
+        return f'http://127.0.0.1:{server.server_port}', server.shutdown
+
+    import uvicorn
+    from asgi import app
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level='warning', backlog=2048))
+    thread = threading.Thread(target=server.run, kwargs={'sockets': [listener]}, name='benchmark-server', daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+    return f'http://127.0.0.1:{listener.getsockname()[1]}', stop
+
+
+def _sample_threads(peak, stop):
+    # Records the highest number of live threads of the process (server, pools and benchmark clients)
+    while not stop.wait(0.05):
+        peak[0] = max(peak[0], threading.active_count())
+
+
+def _resume_pdf(text, marker):
+    # A distinct PDF per request, so its content hash (and cache key) is new every time
+    import fitz
+
+    with fitz.open() as doc:
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"{text}\n\nRef {marker}", fontsize=10)
+        return doc.tobytes()
+
+
+def _multipart(field, filename, content):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+               f'Content-Type: application/pdf\r\n\r\n'.encode())
+    body.write(content)
+    body.write(f'\r\n--{boundary}--\r\n'.encode())
+    return body.getvalue(), f'multipart/form-data; boundary={boundary}'
+
+
+def _build_request(route, index, fixtures, run_id, repeat):
+    # Returns (path, body, content type) of the request number `index` of a route
+    marker = 'repeat' if repeat else f'{run_id}-{index}'
+    if route == 'profile':
+        return '/extract_analyze_profile', json.dumps({'profile_url': f'https://www.linkedin.com/in/bench-{marker}/'}).encode(), 'application/json'
+    if route == 'job':
+        return '/extract_analyze_job', json.dumps({'job_url': f'https://www.linkedin.com/jobs/view/bench-{marker}/'}).encode(), 'application/json'
+    if route == 'resume':
+        body, content_type = _multipart('resume', 'resume.pdf', _resume_pdf(fixtures['resume_text'], marker))
+        return '/upload_analyze_resume', body, content_type
+    profile = dict(fixtures['openai']['profile_analysis'], overview=f"{fixtures['openai']['profile_analysis']['overview']} ({marker})")
+    body = {'profile_data': profile, 'job_data': fixtures['openai']['jd_analysis']}
+    return '/match_profiles', json.dumps(body).encode(), 'application/json'
+
+
+def _send(base_url, path, body, content_type):
+    request = urllib.request.Request(base_url + path, data=body, headers={'Content-Type': content_type}, method='POST')
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except OSError:
+        status = None
+    return time.perf_counter() - started, status
+
+
+def run_scenario(base_url, route, concurrency, requests, fixtures, simulator, repeat):
+    """
+    Sends `requests` requests to a route with `concurrency` clients and returns the measured statistics.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    prepared = [_build_request(route, index, fixtures, run_id, repeat) for index in range(requests)]
+    simulator.reset()
+
+    peak_threads, stop = [threading.active_count()], threading.Event()
+    sampler = threading.Thread(target=_sample_threads, args=(peak_threads, stop), daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda request: _send(base_url, *request), prepared))
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+
+    latencies = [latency for latency, status in results if status == 200]
+    return {
+        'route': route,
+        'concurrency': concurrency,
+        'requests': requests,
+        'succeeded': len(latencies),
+        'failed': requests - len(latencies),
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'latency': {
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies, default=None),
+        },
+        'stages': simulator.summary(),
+        # Includes the `concurrency` benchmark client threads
+        'peakThreads': peak_threads[0],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_seconds(value):
+    return '-' if value is None else f'{value:.3f}'
+
+
+def print_report(report):
+    print(f"\nCommit {report['commit'] or 'unknown'} - {report['config'].get('server', 'threaded')} server - time scale {report['config']['timeScale']}")
+    print(f"{'route':<8} {'conc':>4} {'ok':>5} {'fail':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'threads':>8}")
+    for scenario in report['scenarios']:
+        latency = scenario['latency']
+        print(f"{scenario['route']:<8} {scenario['concurrency']:>4} {scenario['succeeded']:>5} {scenario['failed']:>5} "
+              f"{scenario['throughput']:>8.2f} {_format_seconds(latency['p50']):>8} {_format_seconds(latency['p95']):>8} "
+              f"{_format_seconds(latency['p99']):>8} {scenario.get('peakThreads', '-'):>8}")
+        for stage, stats in scenario['stages'].items():
+            print(f"{'':<14}{stage:<30} calls {stats['calls']:>5}  errors {stats['errors']:>3}  "
+                  f"p50 {_format_seconds(stats['p50'])}  p95 {_format_seconds(stats['p95'])}")
+
+
+def print_comparison(report, baseline):
+    """
+    Prints the change in throughput and latency of each scenario against a baseline report.
+    """
+    previous = {(scenario['route'], scenario['concurrency']): scenario for scenario in baseline['scenarios']}
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('createdAt')}):")
+    print(f"{'route':<8} {'conc':>4} {'req/s':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+
+    def change(new, old):
+        if new is None or not old:
+            return '-'
+        return f'{(new - old) / old * 100:+.1f}%'
+
+    for scenario in report['scenarios']:
+        old = previous.get((scenario['route'], scenario['concurrency']))
+        if old is None:
+            continue
+        print(f"{scenario['route']:<8} {scenario['concurrency']:>4} {change(scenario['throughput'], old['throughput']):>10} "
+              + ' '.join(f"{change(scenario['latency'][key], old['latency'][key]):>10}" for key in ('p50', 'p95', 'p99')))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--routes', default=','.join(ROUTES), help=f"Comma-separated routes among {', '.join(ROUTES)}.")
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated numbers of concurrent clients.')
+    parser.add_argument('--requests', type=int, default=32, help='Requests per route and concurrency level.')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='Multiplier of every simulated latency (e.g. 0.05 on CI).')
+    parser.add_argument('--latencies', help='JSON file overriding latencies as {"stage": [median, p95]}.')
+    parser.add_argument('--linkedin-error-rate', type=float, default=0.0, help='Probability that a LinkedIn call fails.')
+    parser.add_argument('--openai-error-rate', type=float, default=0.0, help='Probability that an OpenAI call fails.')
+    parser.add_argument('--repeat', action='store_true', help='Send identical requests, to measure caching and coalescing.')
+    parser.add_argument('--execution', choices=('single', 'sectioned'), default='single',
+                        help='Execution mode of the profile, job and match analyses.')
+    parser.add_argument('--server', choices=('threaded', 'async'), default='threaded',
+                        help='Serve the routes with the threaded Flask server or the async app (asgi.py).')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the simulated latencies and failures.')
+    parser.add_argument('--fixtures', default=os.path.join(BENCHMARK_DIR, 'fixtures.json'), help='Recorded upstream payloads.')
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results'), help='Directory where results are saved.')
+    parser.add_argument('--compare', help='Results file of an earlier run to compare with.')
+    args = parser.parse_args(argv)
+
+    routes = [route for route in args.routes.split(',') if route]
+    unknown = set(routes) - set(ROUTES)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+    concurrency_levels = [int(level) for level in args.concurrency.split(',') if level]
+
+    latencies = dict(DEFAULT_LATENCIES)
+    if args.latencies:
+        with open(args.latencies) as latencies_file:
+            latencies.update({stage: tuple(value) for stage, value in json.load(latencies_file).items()})
+    with open(args.fixtures) as fixtures_file:
+        fixtures = json.load(fixtures_file)
+
+    work_dir = tempfile.mkdtemp(prefix='linkedin-analyzer-benchmark-')
+    _configure_environment(work_dir, args.execution)
+    simulator = UpstreamSimulator(
+        {stage: LatencyModel(*value) for stage, value in latencies.items()},
+        error_rates={'linkedin': args.linkedin_error_rate, 'openai': args.openai_error_rate},
+        time_scale=args.time_scale,
+        seed=args.seed)
+    _install_fakes(simulator, fixtures)
+    base_url, stop_server = _start_server(args.server)
+
+    report = {
+        'commit': _git_commit(),
+        'createdAt': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {
+            'timeScale': args.time_scale,
+            'requests': args.requests,
+            'repeat': args.repeat,
+            'execution': args.execution,
+            'server': args.server,
+            'seed': args.seed,
+            'errorRates': {'linkedin': args.linkedin_error_rate, 'openai': args.openai_error_rate},
+            'latencies': {stage: LatencyModel(*value).to_dict() for stage, value in latencies.items()},
+        },
+        'scenarios': [],
+    }
+    try:
+        for route in routes:
+            for concurrency in concurrency_levels:
+                print(f"Running {route} with {concurrency} concurrent clients...", file=sys.stderr)
+                report['scenarios'].append(
+                    run_scenario(base_url, route, concurrency, args.requests, fixtures, simulator, args.repeat))
+    finally:
+        stop_server()
+
+    print_report(report)
+    os.makedirs(args.output, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    results_path = os.path.join(args.output, f"{stamp}-{report['commit'] or 'unknown'}.json")
+    with open(results_path, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"\nResults saved to {results_path}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            print_comparison(report, json.load(baseline_file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""
+Command-line batch analysis of many LinkedIn profiles, job postings and PDF resumes.
+
+Run from the app/ directory:
+
+    python bulk_ingest.py manifest.csv --output results.jsonl --concurrency 8
+
+The manifest is a CSV file (with a `source` column and an optional `type` column, or one source per
+row), a text file with one source per line, or a folder whose PDF files are analyzed as resumes. Each
+source is a LinkedIn profile URL, a LinkedIn job URL or the path of a PDF resume; its type is inferred
+when not given.
+
+Every finished item is appended to the output JSONL file as soon as it completes, and that file is the
+checkpoint: running the same command again skips the items already analyzed and retries the failed ones.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ITEM_TYPES = ('profile', 'job', 'resume')
+
+# Column names accepted for the source of an item in a CSV manifest
+SOURCE_COLUMNS = ('source', 'url', 'path')
+
+
+def infer_item_type(source):
+    """
+    Returns the type of a manifest source: 'resume' for a PDF file, 'job' or 'profile' for a LinkedIn URL.
+
+    Raises ValueError if the source is none of them.
+    """
+    lowered = source.strip().lower()
+    if lowered.endswith('.pdf'):
+        return 'resume'
+    if 'linkedin.com/jobs/' in lowered:
+        return 'job'
+    if 'linkedin.com/in/' in lowered:
+        return 'profile'
+    raise ValueError(f"Cannot tell whether '{source}' is a profile, a job or a resume; give its type in the manifest")
+
+
+def _item(item_type, source, base_dir):
+    source = source.strip()
+    item_type = (item_type or '').strip().lower() or infer_item_type(source)
+    if item_type not in ITEM_TYPES:
+        raise ValueError(f"Unknown item type '{item_type}' for '{source}'")
+    if item_type == 'resume':
+        # Resume paths are relative to the manifest, so a manifest and its PDFs can be moved together
+        source = os.path.normpath(os.path.join(base_dir, source))
+    return {'id': f'{item_type}:{source}', 'type': item_type, 'source': source}
+
+
+def read_manifest(path):
+    """
+    Reads the items of a manifest (see the module documentation), without duplicates and in manifest order.
+
+    Returns:
+    - list: {'id', 'type', 'source'} dictionaries.
+    """
+    items = []
+    if os.path.isdir(path):
+        items = [_item('resume', name, path) for name in sorted(os.listdir(path)) if name.lower().endswith('.pdf')]
+    elif path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as manifest:
+            rows = [row for row in csv.reader(manifest) if row and any(cell.strip() for cell in row)]
+        header = [cell.strip().lower() for cell in rows[0]] if rows else []
+        source_column = next((header.index(name) for name in SOURCE_COLUMNS if name in header), None)
+        if source_column is not None:
+            type_column = header.index('type') if 'type' in header else None
+            items = [_item(row[type_column] if type_column is not None else None, row[source_column], os.path.dirname(path))
+                     for row in rows[1:]]
+        else:
+            items = [_item(None, row[0], os.path.dirname(path)) for row in rows]
+    else:
+        with open(path, encoding='utf-8') as manifest:
+            items = [_item(None, line, os.path.dirname(path)) for line in manifest
+                     if line.strip() and not line.lstrip().startswith('#')]
+
+    unique = {}
+    for item in items:
+        unique.setdefault(item['id'], item)
+    return list(unique.values())
+
+
+def completed_items(output_path):
+    """
+    Returns the IDs of the items already analyzed successfully according to an output JSONL file.
+
+    A line cut short by an interrupted run is ignored, so that item is analyzed again.
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding='utf-8') as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('status') == 'done':
+                completed.add(record['item'])
+            else:
+                completed.discard(record.get('item'))
+    return completed
+
+
+def analyze_item(item, use_cache=True):
+    """
+    Extracts and analyzes one manifest item through the same pipeline as the web routes.
+
+    Returns:
+    - dict: The analysis, with its stored ID under 'analysisId'.
+    """
+    # Imported here so that --help and manifest errors do not need the API credentials
+    from analysis_pipeline import analyze_profile_url, analyze_job_url, analyze_resume_file
+
+    if item['type'] == 'profile':
+        return analyze_profile_url(item['source'], use_cache=use_cache)
+    if item['type'] == 'job':
+        return analyze_job_url(item['source'], use_cache=use_cache)
+    with open(item['source'], 'rb') as resume:
+        analysis, status_code = analyze_resume_file(resume, use_cache=use_cache)
+    if 'error' in analysis:
+        raise RuntimeError(f"{analysis['error']} (HTTP {status_code})")
+    return analysis
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return '--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f'{hours}h{rest // 60:02d}m{rest % 60:02d}s' if hours else f'{rest // 60}m{rest % 60:02d}s'
+
+
+class Progress:
+    """
+    Counts finished items and reports the throughput of the current run and the estimated time left.
+    """
+
+    def __init__(self, total, skipped):
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, succeeded):
+        with self._lock:
+            if succeeded:
+                self.done += 1
+            else:
+                self.failed += 1
+
+    def line(self):
+        with self._lock:
+            finished = self.done + self.failed
+            elapsed = time.monotonic() - self.started
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.skipped - finished
+        eta = remaining / rate if rate > 0 else None
+        return (f"{self.skipped + finished}/{self.total} items ({self.done} done, {self.failed} failed, "
+                f"{self.skipped} from earlier runs) | {rate * 60:.1f} items/min | "
+                f"elapsed {_format_duration(elapsed)} | ETA {_format_duration(eta if remaining else 0)}")
+
+
+def _report_progress(progress, stop, interval, stream):
+    # Rewrites a single status line on a terminal, or prints one line per interval otherwise
+    interactive = stream.isatty()
+    while not stop.wait(interval):
+        stream.write(('\r' + progress.line() + '\033[K') if interactive else progress.line() + '\n')
+        stream.flush()
+
+
+def run(items, output_path, concurrency=4, use_cache=True, progress_interval=2.0, stream=sys.stderr):
+    """
+    Analyzes the items not yet completed in `output_path`, appending one JSON line per finished item.
+
+    Parameters:
+    - items (list): Items returned by read_manifest.
+    - output_path (str): The output JSONL file, also used as the checkpoint.
+    - concurrency (int): Items processed at the same time.
+    - use_cache (bool): Set to False to re-fetch and re-analyze every item.
+    - progress_interval (float): Seconds between progress reports.
+
+    Returns:
+    - Progress: The counters of the run.
+    """
+    completed = completed_items(output_path)
+    pending = [item for item in items if item['id'] not in completed]
+    progress = Progress(len(items), len(items) - len(pending))
+    write_lock = threading.Lock()
+
+    def process(item):
+        started = time.monotonic()
+        record = {'item': item['id'], 'type': item['type'], 'source': item['source']}
+        try:
+            record.update(status='done', analysis=analyze_item(item, use_cache=use_cache))
+        except Exception as e:
+            record.update(status='failed', error=f'{type(e).__name__}: {e}')
+        record.update(durationSeconds=round(time.monotonic() - started, 3),
+                      finishedAt=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        # One complete line per item, flushed to disk right away, so an interruption loses at most the items in flight
+        with write_lock, open(output_path, 'a', encoding='utf-8') as output:
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            os.fsync(output.fileno())
+        progress.record(record['status'] == 'done')
+        return record
+
+    stop = threading.Event()
+    reporter = threading.Thread(target=_report_progress, args=(progress, stop, progress_interval, stream), daemon=True)
+    reporter.start()
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix='bulk')
+    try:
+        for future in as_completed([executor.submit(process, item) for item in pending]):
+            future.result()
+    finally:
+        # On an interruption, items not started yet are dropped; the next run picks them up
+        executor.shutdown(wait=True, cancel_futures=True)
+        stop.set()
+        reporter.join()
+        stream.write(('\r' if stream.isatty() else '') + progress.line() + '\n')
+        stream.flush()
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze LinkedIn profiles, job postings and PDF resumes in bulk.')
+    parser.add_argument('manifest', help='CSV or text file listing the sources, or a folder of PDF resumes.')
+    parser.add_argument('--output', required=True, help='JSONL file receiving one result per item; also the checkpoint.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Items processed at the same time.')
+    parser.add_argument('--refresh', action='store_true', help='Re-fetch and re-analyze instead of using the caches.')
+    parser.add_argument('--progress-interval', type=float, default=2.0, help='Seconds between progress reports.')
+    args = parser.parse_args(argv)
+
+    try:
+        items = read_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    try:
+        progress = run(items, args.output, concurrency=args.concurrency, use_cache=not args.refresh,
+                       progress_interval=args.progress_interval)
+    except KeyboardInterrupt:
+        print("Interrupted. Run the same command again to resume.", file=sys.stderr)
+        return 130
+    return 1 if progress.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
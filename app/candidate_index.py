@@ -0,0 +1,395 @@
+import os
+import re
+import json
+import math
+import heapq
+import time
+import fcntl
+import hashlib
+import logging
+import threading
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from disk_cache import canonical_json
+from match_scoring import normalize_skill
+from analysis_store import ANALYSIS_ID_KEY
+
+logger = logging.getLogger(__name__)
+
+# Weight of each profile analysis field in the index; skills dominate the ranking
+FIELD_WEIGHTS = {
+    'hardSkills': 3.0,
+    'softSkills': 1.5,
+    'languages': 1.0,
+    'highestDegree': 1.0,
+    'overview': 0.5,
+}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms found in nearly every profile (e.g. "english") barely change the ranking but cost a full scan
+MIN_TERM_IDF = float(os.getenv("CANDIDATE_INDEX_MIN_TERM_IDF", "0.05"))
+
+# Superseded, removed and malformed lines (and their postings, kept in memory until then) are dropped once they
+# outnumber the live ones and this
+COMPACT_MIN_DEAD_LINES = int(os.getenv("CANDIDATE_INDEX_COMPACT_MIN_LINES", "1000"))
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+_STOP_WORDS = {
+    'a', 'an', 'and', 'or', 'of', 'the', 'in', 'on', 'for', 'to', 'with', 'at', 'by', 'as', 'is', 'are', 'be', 'their',
+    'his', 'her', 'they', 'this', 'that', 'from', 'has', 'have', 'who', 'which', 'into', 'its', 'it', 'while', 'also',
+}
+
+
+def _words(text):
+    return [word for word in _WORD.findall(str(text or '').lower()) if word not in _STOP_WORDS]
+
+
+def _skill_terms(skills):
+    # Each skill is indexed as a whole phrase and as its individual words
+    terms = []
+    for skill in skills if isinstance(skills, list) else [skills]:
+        normalized = normalize_skill(skill or '')
+        if normalized:
+            terms.append('skill:' + normalized)
+            terms.extend(_words(normalized))
+    return terms
+
+
+def profile_terms(analysis):
+    """
+    Returns the weighted terms of a profile analysis, as a Counter of term -> weight.
+    """
+    terms = Counter()
+    for term in _skill_terms(analysis.get('hardSkills') or []):
+        terms[term] += FIELD_WEIGHTS['hardSkills']
+    for term in _skill_terms(analysis.get('softSkills') or []):
+        terms[term] += FIELD_WEIGHTS['softSkills']
+    for term in _words(' '.join(map(str, analysis.get('languages') or []))):
+        terms[term] += FIELD_WEIGHTS['languages']
+    degree = analysis.get('highestDegree') or {}
+    degree_text = ' '.join(str(degree.get(key) or '') for key in ('level', 'fieldOfStudy')) if isinstance(degree, dict) else degree
+    for term in _words(degree_text):
+        terms[term] += FIELD_WEIGHTS['highestDegree']
+    for term in _words(analysis.get('overview')):
+        terms[term] += FIELD_WEIGHTS['overview']
+    return terms
+
+
+def job_query_terms(job_analysis):
+    """
+    Returns the weighted query terms of a job description analysis, as a Counter of term -> weight.
+    """
+    skills = job_analysis.get('skillsRequired') or {}
+    terms = Counter()
+    for term in _skill_terms(skills.get('hardSkills') or []):
+        terms[term] += FIELD_WEIGHTS['hardSkills']
+    for term in _skill_terms(skills.get('softSkills') or []):
+        terms[term] += FIELD_WEIGHTS['softSkills']
+    for term in _words(' '.join(map(str, job_analysis.get('languageRequirements') or []))):
+        terms[term] += FIELD_WEIGHTS['languages']
+    for term in _words((job_analysis.get('academicRequirements') or {}).get('degreeLevel')):
+        terms[term] += FIELD_WEIGHTS['highestDegree']
+    for term in _words(job_analysis.get('jobTitle')) + _words(job_analysis.get('overview')):
+        terms[term] += FIELD_WEIGHTS['overview']
+    return terms
+
+
+class CandidateIndex:
+    """
+    An in-memory BM25 index of profile analyses, persisted as an append-only JSONL file.
+
+    Every new or changed profile analysis is appended to the file and indexed immediately; adding an
+    analysis identical to the indexed one (e.g. a cache hit) writes nothing. Removing a profile appends
+    a tombstone line. The file is replayed on first use to rebuild the index, skipping malformed lines,
+    and is compacted (and the index rebuilt without the postings of dead lines) whenever superseded,
+    removed and malformed lines outnumber the live ones. Before each use, lines appended by other
+    processes (other workers, the ingestion CLI) are replayed too, and a file compacted by another
+    process is reloaded. Appends and compactions take a lock file, so processes never write over each other.
+
+    Postings are stored in compact typed arrays (4-byte document numbers and 4-byte weights), and the
+    analyses themselves stay on disk and are read back by file offset, so tens of thousands of profiles
+    fit comfortably in memory. Re-indexing a profile replaces its previous version.
+
+    Parameters:
+    - path (str): Location of the JSONL file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset(None)
+
+    def _reset(self, file_id):
+        # Empty index of the file identified by file_id ((device, inode), or None if it does not exist yet)
+        self._file_id = file_id
+        self._read_size = 0
+        self._dead_lines = 0
+        self._postings = {}
+        self._doc_ids = []
+        self._doc_lengths = array('f')
+        self._offsets = array('q')
+        # 1 for the live version of each profile, 0 for superseded and removed ones, by document number
+        self._alive = bytearray()
+        self._live = {}
+        self._digests = {}
+        # Stored analysis ID (see analysis_store) of each live profile
+        self._analysis_ids = {}
+        self._total_length = 0.0
+
+    @contextmanager
+    def _file_lock(self):
+        # Serializes appends and compactions across processes through a lock file. Not reentrant: flock
+        # locks of two opens of the file exclude each other even within a process
+        with open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync(self):
+        # Brings the index up to date with the file, and compacts it once dead lines outnumber the live ones,
+        # so superseded postings do not pile up in a long-lived process. Called with self._lock held, never
+        # with the file lock.
+        self._refresh()
+        if self._dead_lines > max(len(self._live), COMPACT_MIN_DEAD_LINES):
+            self._compact()
+
+    def _refresh(self):
+        # Replays what other processes appended, or reloads a replaced file. Called with self._lock held.
+        if not self._loaded:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._loaded = True
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        file_id = (stat.st_dev, stat.st_ino) if stat else None
+        # A replaced (compacted) or truncated file is read again from the start
+        if file_id != self._file_id or (stat and stat.st_size < self._read_size):
+            self._reset(file_id)
+        if stat and stat.st_size > self._read_size:
+            self._replay()
+
+    def _replay(self):
+        # Indexes the lines appended since the last replay
+        with open(self.path, 'rb') as index_file:
+            index_file.seek(self._read_size)
+            offset = self._read_size
+            for line in index_file:
+                # A line still being written by another process is read on a later replay
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                    if record.get('removed'):
+                        # A tombstone is dead as soon as it is read, like the version it removes
+                        self._unindex(record['id'])
+                        self._dead_lines += 1
+                    else:
+                        self._index(record['id'], record['analysis'], offset, _digest(record['analysis'], record.get('metadata')),
+                                    (record.get('metadata') or {}).get(ANALYSIS_ID_KEY))
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    logger.warning("Skipping malformed line at offset %d of %s: %s", offset, self.path, e)
+                    self._dead_lines += 1
+                offset += len(line)
+            self._read_size = offset
+
+    def _unindex(self, profile_id):
+        # Drops the live version of a profile. Its postings stay until the next compaction; searches skip them.
+        previous = self._live.pop(profile_id, None)
+        if previous is not None:
+            self._total_length -= self._doc_lengths[previous]
+            self._alive[previous] = 0
+            self._dead_lines += 1
+        self._digests.pop(profile_id, None)
+        self._analysis_ids.pop(profile_id, None)
+
+    def _index(self, profile_id, analysis, offset, digest, analysis_id=None):
+        terms = profile_terms(analysis)
+        # Replace any previous version of the profile
+        self._unindex(profile_id)
+
+        doc_number = len(self._doc_ids)
+        length = float(sum(terms.values()))
+        self._doc_ids.append(profile_id)
+        self._doc_lengths.append(length)
+        self._offsets.append(offset)
+        self._alive.append(1)
+        self._live[profile_id] = doc_number
+        self._digests[profile_id] = digest
+        if analysis_id is not None:
+            self._analysis_ids[profile_id] = analysis_id
+        self._total_length += length
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array('I'), array('f'))
+            postings[0].append(doc_number)
+            postings[1].append(weight)
+
+    def add(self, profile_id, analysis, metadata=None):
+        """
+        Persists a profile analysis and adds it to the index, replacing any previous version.
+
+        Parameters:
+        - profile_id (str): A stable identifier, e.g. the normalized LinkedIn ID.
+        - analysis (dict): The result of analyze_linkedin_profile.
+        - metadata (dict): Optional extra information stored with the analysis (e.g. the profile URL).
+
+        Returns:
+        - bool: False if the profile was already indexed with the same analysis and metadata, and nothing was written.
+        """
+        metadata = metadata or {}
+        digest = _digest(analysis, metadata)
+        with self._lock:
+            self._sync()
+            if self._digests.get(profile_id) == digest:
+                return False
+            self._append({'id': profile_id, 'analysis': analysis, 'metadata': metadata, 'indexedAt': time.time()})
+        return True
+
+    def remove(self, profile_id):
+        """
+        Removes a profile from the index, e.g. when its stored analysis is deleted.
+
+        Returns:
+        - bool: False if the profile was not indexed.
+        """
+        with self._lock:
+            self._sync()
+            if profile_id not in self._live:
+                return False
+            self._append({'id': profile_id, 'removed': True, 'indexedAt': time.time()})
+        return True
+
+    def remove_analysis(self, analysis_id):
+        """
+        Removes the profiles indexed with a stored analysis ID (see analysis_store). Returns how many were removed.
+        """
+        with self._lock:
+            self._sync()
+            profile_ids = [profile_id for profile_id, indexed_id in self._analysis_ids.items() if indexed_id == analysis_id]
+            return sum(self.remove(profile_id) for profile_id in profile_ids)
+
+    def _append(self, record):
+        # Appends a line to the file and indexes it, with any line other processes appended before it.
+        # Called with self._lock held.
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._file_lock():
+            with open(self.path, 'ab') as index_file:
+                index_file.write(line)
+        self._sync()
+
+    def compact(self):
+        """
+        Rewrites the file with only the current version of each profile, dropping superseded, removed and
+        malformed lines, and rebuilds the index from it.
+        """
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # Called with self._lock held. Only takes the file lock here, so it is never taken twice.
+        with self._file_lock():
+            self._refresh()
+            if not self._dead_lines:
+                return
+            compacted_path = self.path + '.compacting'
+            with open(self.path, 'rb') as index_file, open(compacted_path, 'wb') as compacted_file:
+                for doc_number in sorted(self._live.values()):
+                    index_file.seek(self._offsets[doc_number])
+                    compacted_file.write(index_file.readline())
+                compacted_file.flush()
+                os.fsync(compacted_file.fileno())
+            os.replace(compacted_path, self.path)
+            logger.info("Compacted %s: dropped %d superseded, removed or malformed lines", self.path, self._dead_lines)
+            self._refresh()
+
+    def search(self, job_analysis, k=10):
+        """
+        Returns the k profiles that best match a job description analysis.
+
+        Parameters:
+        - job_analysis (dict): The result of analyze_linkedin_jd.
+        - k (int): Number of profiles to return.
+
+        Returns:
+        - list: (profile_id, score) tuples, best first.
+        """
+        query = job_query_terms(job_analysis)
+        with self._lock:
+            self._sync()
+            live_count = len(self._live)
+            if not live_count or not query:
+                return []
+            average_length = self._total_length / live_count or 1.0
+            norm_base = BM25_K1 * (1 - BM25_B)
+            norm_scale = BM25_K1 * BM25_B / average_length
+            doc_lengths = self._doc_lengths
+            alive = self._alive
+            scores = {}
+            for term, query_weight in query.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                # Superseded and removed versions neither score nor count in the term's document frequency
+                live_postings = [(doc_number, weight) for doc_number, weight in zip(*postings) if alive[doc_number]]
+                if not live_postings:
+                    continue
+                idf = math.log(1 + (live_count - len(live_postings) + 0.5) / (len(live_postings) + 0.5))
+                if idf < MIN_TERM_IDF:
+                    continue
+                term_weight = query_weight * idf * (BM25_K1 + 1)
+                for doc_number, weight in live_postings:
+                    scores[doc_number] = scores.get(doc_number, 0.0) + term_weight * weight / (weight + norm_base + norm_scale * doc_lengths[doc_number])
+
+            best = heapq.nlargest(k, ((score, doc_number) for doc_number, score in scores.items()))
+            return [(self._doc_ids[doc_number], score) for score, doc_number in best]
+
+    def get(self, profile_id):
+        """
+        Returns the stored record ({'id', 'analysis', 'metadata', 'indexedAt'}) of a profile, or None.
+        """
+        with self._lock:
+            self._sync()
+            doc_number = self._live.get(profile_id)
+            if doc_number is None:
+                return None
+            with open(self.path, 'rb') as index_file:
+                # Offsets are only valid in the file they were read from, which another process may have compacted
+                stat = os.fstat(index_file.fileno())
+                if (stat.st_dev, stat.st_ino) != self._file_id:
+                    return self._reread(profile_id)
+                index_file.seek(self._offsets[doc_number])
+                return json.loads(index_file.readline())
+
+    def _reread(self, profile_id):
+        # get() after the file was replaced since the last sync
+        self._refresh()
+        doc_number = self._live.get(profile_id)
+        if doc_number is None:
+            return None
+        with open(self.path, 'rb') as index_file:
+            index_file.seek(self._offsets[doc_number])
+            return json.loads(index_file.readline())
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self._live)
+
+
+def _digest(analysis, metadata):
+    # Identifies an indexed version of a profile, to skip adding the same analysis again
+    return hashlib.sha256(canonical_json({'analysis': analysis, 'metadata': metadata or {}}).encode('utf-8')).hexdigest()
+
+
+# Index shared by the whole process, loaded on first use
+candidate_index = CandidateIndex(
+    os.getenv("CANDIDATE_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "candidate_index.jsonl")))
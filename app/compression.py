@@ -0,0 +1,86 @@
+"""
+HTTP content encoding: negotiation of the client's Accept-Encoding header and brotli/gzip compression,
+shared by the precompressed static assets (static_assets.py) and the compressed JSON responses.
+
+Brotli needs the optional `brotli` package; without it, everything falls back to gzip.
+"""
+import os
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings this process can produce, best first
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Responses smaller than this are sent as they are: compressing them saves less than it costs
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+
+# Compression levels of dynamic responses, chosen for speed; static assets are compressed once, at the highest levels
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "5"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+
+# File suffix of each precompressed variant
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def negotiate_encoding(accept_encoding, available=ENCODINGS):
+    """
+    Picks the content encoding of a response from the client's Accept-Encoding header.
+
+    Parameters:
+    - accept_encoding (str): The header value, e.g. "gzip, deflate, br" or "br;q=1.0, gzip;q=0.5".
+    - available (tuple): Encodings that can be served, best first (used to break ties).
+
+    Returns:
+    - str: The encoding with the highest quality value the client accepts, or None to send the response as it is.
+    """
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, parameters = item.strip().partition(';')
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition('=')
+        if parameter.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level=None):
+    """
+    Compresses bytes with 'br' or 'gzip'. `level` defaults to the fast levels used for dynamic responses.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=RESPONSE_BROTLI_QUALITY if level is None else level)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL if level is None else level, mtime=0)
+
+
+def compress_body(body, accept_encoding, content_type):
+    """
+    Compresses a JSON response body if the client accepts it and the body is large enough.
+
+    Returns:
+    - tuple: (body, encoding). The encoding is None when the body is returned unchanged.
+    """
+    if not content_type or not content_type.startswith('application/json') or len(body) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return body, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return body, None
+    compressed = compress(body, encoding)
+    if len(compressed) >= len(body):
+        return body, None
+    return compressed, encoding
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+
+def _json_default(value):
+    # Records (see schemas.py) are serialized as their dictionaries, anything else that JSON cannot hold as text
+    to_dict = getattr(value, 'to_dict', None)
+    return to_dict() if callable(to_dict) else str(value)
+
+
+def canonical_json(value):
+    """
+    Serializes a value into a canonical JSON string (sorted keys, no insignificant whitespace),
+    so that two structurally identical dictionaries always produce the same text.
+    """
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=_json_default)
+
+
+def make_cache_key(*parts):
+    """
+    Builds a stable cache key from any number of JSON-serializable parts.
+
+    Parameters:
+    - *parts: The values identifying a cache entry (e.g. task name, prompt version, model, temperature, input dict).
+
+    Returns:
+    - str: A hex SHA-256 digest of the canonicalized parts.
+    """
+    return hashlib.sha256(canonical_json(list(parts)).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """
+    A persistent key/value cache stored in a single SQLite file.
+
+    Values are stored as JSON. Each entry carries an expiry time (TTL) and a last-access time, and
+    the cache is kept under a maximum number of entries and a maximum total size by evicting the
+    least recently used entries first. The entry count and total size are kept up to date by triggers
+    in a one-row `cache_totals` table, so checking the limits after a write does not scan the cache.
+    SQLite's own file locking (in WAL mode) makes the cache safe to share between several processes,
+    such as gunicorn workers, and every thread of every process uses its own connection.
+
+    Parameters:
+    - path (str): Location of the SQLite database file. Parent directories are created if needed.
+    - max_entries (int): Maximum number of entries kept in the cache.
+    - max_bytes (int): Maximum total size of the stored values, in bytes.
+    - default_ttl (float | None): Default time-to-live of an entry in seconds, or None for no expiry.
+    """
+
+    def __init__(self, path, max_entries=10000, max_bytes=256 * 1024 * 1024, default_ttl=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    expires_at REAL
+                )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+            # Expired entries are swept on every write, which must not scan the whole table
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+            self._create_totals(conn)
+
+    @staticmethod
+    def _create_totals(conn):
+        # Running entry count and size, maintained by SQLite itself so that every process sharing the
+        # file sees the same numbers. Created and seeded in one transaction, so a cache file written by
+        # an older version starts from its real totals and no concurrent write is missed.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    entries INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL
+                )''')
+            conn.execute('''
+                INSERT OR IGNORE INTO cache_totals (id, entries, bytes)
+                SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM cache''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS cache_totals_insert AFTER INSERT ON cache BEGIN
+                    UPDATE cache_totals SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+                END''')
+            conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS cache_totals_delete AFTER DELETE ON cache BEGIN
+                    UPDATE cache_totals SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+                END''')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _connection(self):
+        # Connections cannot be shared across threads or across a fork, so keep one per thread and process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            # Without it, the row removed by INSERT OR REPLACE does not fire the delete trigger that
+            # keeps the running totals (see _create_totals)
+            conn.execute('PRAGMA recursive_triggers=ON')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value for a key, or `default` if the key is missing or has expired.
+        """
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count(hit=False)
+            return default
+
+        # Refresh the access time so the entry counts as recently used
+        conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count(hit=True)
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores a JSON-serializable value under a key, then evicts entries if the cache is over its limits.
+
+        Parameters:
+        - key (str): The cache key.
+        - value: The value to store.
+        - ttl (float | None): Time-to-live in seconds. Falls back to the cache's default TTL.
+        """
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        # Compact, as nobody reads the stored text
+        payload = json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=_json_default)
+
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, size, created_at, accessed_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (key, payload, len(payload.encode('utf-8')), now, now, expires_at))
+        self._evict(conn, now)
+
+    def delete(self, key):
+        """
+        Removes a single entry from the cache. Returns True if an entry was removed.
+        """
+        cursor = self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        self._connection().execute('DELETE FROM cache')
+
+    def _evict(self, conn, now):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Drop expired entries first (a range on the expires_at index), then the least recently used
+            # ones until both limits hold. The totals come from the trigger-maintained row, not a scan.
+            conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+            count, total_size = self._totals(conn)
+            if count > self.max_entries or total_size > self.max_bytes:
+                excess_entries = max(count - self.max_entries, 0)
+                excess_bytes = max(total_size - self.max_bytes, 0)
+                victims = []
+                for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed_at ASC'):
+                    if excess_entries <= 0 and excess_bytes <= 0:
+                        break
+                    victims.append((key,))
+                    excess_entries -= 1
+                    excess_bytes -= size
+                conn.executemany('DELETE FROM cache WHERE key = ?', victims)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _totals(conn):
+        return conn.execute('SELECT entries, bytes FROM cache_totals WHERE id = 0').fetchone()
+
+    def stats(self):
+        """
+        Returns a dictionary with the number of entries, their total size, and this process's hit/miss counters.
+        """
+        count, total_size = self._totals(self._connection())
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'entries': count,
+            'bytes': total_size,
+            'hits': hits,
+            'misses': misses,
+            'hitRate': hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,111 @@
+import threading
+
+# Input fields of an extracted LinkedIn profile that each section of the profile analysis is derived from.
+# A nested field is named with a dot (e.g. 'lastProfessionalExperience.title').
+PROFILE_SECTION_DEPENDENCIES = {
+    'fullName': ('fullName',),
+    'location': ('locationName', 'geoCountryName', 'geoLocationName'),
+    'overview': ('headline', 'summary', 'industryName', 'lastProfessionalExperience', 'education', 'projects', 'skills'),
+    'highestDegree': ('education',),
+    'lastProfessionalExperience': ('lastProfessionalExperience',),
+    'languages': ('languages', 'geoCountryName', 'locationName'),
+    'hardSkills': ('skills', 'headline', 'summary', 'projects'),
+    'softSkills': ('headline', 'summary'),
+    'strengths': ('headline', 'summary', 'lastProfessionalExperience', 'projects', 'skills'),
+    'weaknesses': ('headline', 'summary', 'lastProfessionalExperience', 'education', 'languages', 'projects', 'skills'),
+    'improvementSuggestions': ('headline', 'summary', 'lastProfessionalExperience', 'education', 'languages', 'projects', 'skills'),
+    'careerSuggestions': ('headline', 'summary', 'industryName', 'lastProfessionalExperience', 'skills'),
+}
+
+# Input fields of an extracted job posting (with its company) that each section of the job analysis is derived from.
+# Volatile company figures (follower and staff counts) feed no section, so their changes cost nothing.
+JD_SECTION_DEPENDENCIES = {
+    'jobTitle': ('title',),
+    'location': ('descriptionText', 'companyInfo.name', 'companyInfo.description'),
+    'overview': ('title', 'companyName', 'descriptionText'),
+    'companyInfo': ('companyName', 'companyURL', 'companyInfo.name', 'companyInfo.description',
+                    'companyInfo.industry', 'companyInfo.specialties'),
+    'experienceLevel': ('title', 'descriptionText'),
+    'academicRequirements': ('title', 'descriptionText'),
+    'skillsRequired': ('title', 'descriptionText'),
+    'languageRequirements': ('descriptionText', 'companyInfo.name', 'companyInfo.description'),
+    'keyResponsibilities': ('title', 'descriptionText'),
+}
+
+# Outcome of each re-analysis, per kind of analysis: how many needed no model call, part of the sections or all of them
+reanalysis_stats = {
+    kind: {'unchanged': 0, 'partial': 0, 'full': 0, 'sectionsReused': 0, 'sectionsRegenerated': 0}
+    for kind in ('profile', 'job')
+}
+_stats_lock = threading.Lock()
+
+
+def changed_fields(previous, current):
+    """
+    Returns the fields that differ between two extractions of the same profile or job.
+
+    Top-level fields are compared as a whole, except dictionaries, whose own fields are compared
+    one by one and reported with a dot (e.g. 'companyInfo.followerCount').
+
+    Parameters:
+    - previous (dict): The extraction the stored analysis was made from.
+    - current (dict): The fresh extraction.
+
+    Returns:
+    - set: The names of the changed, added or removed fields.
+    """
+    changed = set()
+    for field in set(previous) | set(current):
+        old, new = previous.get(field), current.get(field)
+        if old == new:
+            continue
+        if isinstance(old, dict) and isinstance(new, dict):
+            changed.update(f'{field}.{key}' for key in set(old) | set(new) if old.get(key) != new.get(key))
+        else:
+            changed.add(field)
+    return changed
+
+
+def _depends_on(dependency, field):
+    # A section depending on 'a' is affected by a change of 'a.b', and one depending on 'a.b' by a change of 'a'
+    return dependency == field or field.startswith(dependency + '.') or dependency.startswith(field + '.')
+
+
+def sections_to_regenerate(dependencies, changed):
+    """
+    Returns the sections of an analysis that depend on at least one changed input field, in schema order.
+
+    Parameters:
+    - dependencies (dict): Section -> input fields (PROFILE_SECTION_DEPENDENCIES or JD_SECTION_DEPENDENCIES).
+    - changed (set): Changed input fields, as returned by changed_fields.
+
+    Returns:
+    - list: The names of the sections to regenerate.
+    """
+    return [
+        section for section, fields in dependencies.items()
+        if any(_depends_on(dependency, field) for dependency in fields for field in changed)
+    ]
+
+
+def merge_sections(previous_analysis, update, sections):
+    """
+    Returns the previous analysis with the regenerated sections replaced. A section missing from the
+    update keeps its previous value.
+    """
+    merged = dict(previous_analysis)
+    for section in sections:
+        if section in update:
+            merged[section] = update[section]
+    return merged
+
+
+def record_reanalysis(kind, regenerated, total):
+    """
+    Counts a re-analysis that regenerated `regenerated` of the `total` sections of a profile or job analysis.
+    """
+    with _stats_lock:
+        stats = reanalysis_stats[kind]
+        stats['unchanged' if regenerated == 0 else 'full' if regenerated >= total else 'partial'] += 1
+        stats['sectionsRegenerated'] += regenerated
+        stats['sectionsReused'] += total - regenerated
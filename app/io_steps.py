@@ -0,0 +1,123 @@
+"""
+Analysis code written once for both serving modes.
+
+The analyses that wait on OpenAI, LinkedIn or the PDF extractor are written as steps: generators that
+yield each I/O request they need and receive its result, for example
+
+    text = yield Blocking(extract_resume_text, spooled_resume)
+    results = yield Parallel([first_group_steps, second_group_steps], executor)
+
+run_steps() serves the requests in the calling thread, for the threaded Flask routes, background jobs
+and bulk_ingest.py. run_steps_async() awaits them on an event loop, for the async app (asgi.py), so an
+analysis waiting on OpenAI holds no thread.
+"""
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from metrics import propagate_context
+
+# Threads of the async app running blocking work: LinkedIn calls (linkedin_api is synchronous), PDF extraction
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", "32"))
+blocking_executor = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_WORKERS, thread_name_prefix="blocking")
+
+
+class Blocking:
+    """
+    A blocking call: made directly by run_steps, and in a thread of the blocking pool by run_steps_async.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        self.call = functools.partial(function, *args, **kwargs)
+
+    def run(self):
+        return self.call()
+
+    async def run_async(self):
+        return await asyncio.get_running_loop().run_in_executor(blocking_executor, propagate_context(self.call))
+
+
+class Call:
+    """
+    An I/O request with a blocking implementation and an async one (a function returning an awaitable),
+    e.g. the same completion made with the OpenAI client or with the async OpenAI client.
+    """
+
+    def __init__(self, blocking, asynchronous):
+        self.blocking = blocking
+        self.asynchronous = asynchronous
+
+    def run(self):
+        return self.blocking()
+
+    async def run_async(self):
+        return await self.asynchronous()
+
+
+class Parallel:
+    """
+    Runs several steps concurrently and returns their results in order. The first failure is raised and
+    the steps still running are cancelled. run_steps runs them on `executor`, run_steps_async as tasks.
+    """
+
+    def __init__(self, steps, executor):
+        self.steps = list(steps)
+        self.executor = executor
+
+    def run(self):
+        futures = [self.executor.submit(propagate_context(run_steps), steps) for steps in self.steps]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+        return [future.result() for future in futures]
+
+    async def run_async(self):
+        tasks = [asyncio.ensure_future(run_steps_async(steps)) for steps in self.steps]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def run_steps(steps):
+    """
+    Runs steps to completion, making each request in the calling thread, and returns their result.
+    An exception raised by a request is thrown into the steps, which may handle it.
+    """
+    try:
+        value = error = None
+        while True:
+            try:
+                request = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                value, error = request.run(), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        # Runs the steps' cleanup (e.g. releasing a coalesced flight) right away if they were interrupted
+        steps.close()
+
+
+async def run_steps_async(steps):
+    """
+    Async counterpart of run_steps: each request is awaited, so the event loop serves other requests meanwhile.
+    """
+    try:
+        value = error = None
+        while True:
+            try:
+                request = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                value, error = await request.run_async(), None
+            except Exception as e:
+                value, error = None, e
+    finally:
+        steps.close()
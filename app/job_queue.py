@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Status of a job over its lifetime
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# A job is attempted at most this many times when the worker running it dies
+MAX_ATTEMPTS = 2
+
+# UPDATE ... RETURNING claims a job in one statement from SQLite 3.35 on; older versions claim it in a transaction
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+class UnknownJobTypeError(ValueError):
+    """
+    Raised when a job is submitted with a type that has no registered handler.
+    """
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class JobQueue:
+    """
+    A background job queue stored in a single SQLite file, processed by a pool of worker threads.
+
+    Submitting a job stores it and returns its ID immediately; workers claim queued jobs in submission
+    order, run the handler registered for the job's type, and store the result or the error. Because
+    the queue lives in SQLite, every web worker process can submit jobs and poll any job, and each
+    process contributes its own worker threads, without an external broker. Jobs left running by a
+    process that died are queued again when the queue starts. The web app starts the queue in every
+    process serving requests, so queued and recovered jobs run even if no new job is submitted.
+
+    Parameters:
+    - path (str): Location of the SQLite database file.
+    - handlers (dict): Job type -> function taking the job payload (a dict) and returning a JSON-serializable result.
+    - workers (int): Number of worker threads of this process.
+    - retention (float): Seconds finished jobs are kept before being purged.
+    """
+
+    def __init__(self, path, handlers, workers=4, retention=24 * 3600):
+        self.path = path
+        self.handlers = dict(handlers)
+        self.workers = workers
+        self.retention = retention
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._started_pid = None
+        self._start_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )''')
+        self._connection().execute('CREATE INDEX IF NOT EXISTS jobs_status_submitted_at ON jobs (status, submitted_at)')
+
+    def _connection(self):
+        # Connections cannot be shared across threads or across a fork, so keep one per thread and process
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def start(self):
+        """
+        Starts the worker threads of this process, once. Called automatically by submit().
+        """
+        if self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid == os.getpid():
+                return
+            # After a fork, the threads of the parent do not exist in the child
+            self._owner = f"{socket.gethostname()}:{os.getpid()}"
+            self._started_pid = os.getpid()
+            self._recover()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def _recover(self):
+        # Requeue jobs whose worker process on this host is gone, or fail them once they used up their attempts
+        hostname = socket.gethostname()
+        conn = self._connection()
+        for job_id, owner, attempts in conn.execute(
+                'SELECT id, owner, attempts FROM jobs WHERE status = ?', (RUNNING,)).fetchall():
+            host, _, pid = (owner or '').rpartition(':')
+            if host != hostname or not pid.isdigit() or self._process_alive(int(pid)):
+                continue
+            if attempts >= MAX_ATTEMPTS:
+                conn.execute('UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?',
+                             (FAILED, 'The worker processing this job stopped.', time.time(), job_id, RUNNING))
+            else:
+                conn.execute('UPDATE jobs SET status = ?, owner = NULL, started_at = NULL WHERE id = ? AND status = ?',
+                             (QUEUED, job_id, RUNNING))
+
+    @staticmethod
+    def _process_alive(pid):
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def submit(self, job_type, payload):
+        """
+        Queues a job and returns its ID without waiting for it to run.
+
+        Parameters:
+        - job_type (str): One of the registered handler types.
+        - payload (dict): The JSON-serializable arguments of the handler.
+
+        Returns:
+        - str: The job ID.
+        """
+        if job_type not in self.handlers:
+            raise UnknownJobTypeError(f"Unknown job type '{job_type}'. Expected one of {', '.join(sorted(self.handlers))}.")
+        self.start()
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            'INSERT INTO jobs (id, type, payload, status, submitted_at) VALUES (?, ?, ?, ?, ?)',
+            (job_id, job_type, json.dumps(payload, ensure_ascii=False), QUEUED, time.time()))
+        with self._condition:
+            self._condition.notify_all()
+        return job_id
+
+    def _claim(self):
+        # Atomically move the oldest queued job to running, so no two workers (of any process) take the same job
+        conn = self._connection()
+        if _HAS_RETURNING:
+            return conn.execute(
+                '''UPDATE jobs SET status = ?, owner = ?, started_at = ?, attempts = attempts + 1
+                   WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY submitted_at LIMIT 1) AND status = ?
+                   RETURNING id, type, payload''',
+                (RUNNING, self._owner, time.time(), QUEUED, QUEUED)).fetchone()
+        # BEGIN IMMEDIATE takes the write lock before reading, so no other worker can claim the same row in between
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id, type, payload FROM jobs WHERE status = ? ORDER BY submitted_at LIMIT 1', (QUEUED,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE jobs SET status = ?, owner = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?',
+                             (RUNNING, self._owner, time.time(), row[0]))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError as e:
+                logger.warning("Could not claim a job: %s", e)
+                job = None
+            if job is None:
+                # Also wake up periodically for jobs submitted by other processes
+                with self._condition:
+                    self._condition.wait(timeout=1.0)
+                continue
+
+            job_id, job_type, payload = job
+            try:
+                result = self.handlers[job_type](json.loads(payload))
+                update = (DONE, json.dumps(result, ensure_ascii=False), None)
+            except Exception as e:
+                logger.warning("Job %s (%s) failed: %s", job_id, job_type, e)
+                update = (FAILED, None, str(e))
+            self._connection().execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+                update + (time.time(), job_id))
+            with self._condition:
+                self._condition.notify_all()
+            self._purge()
+
+    def _purge(self):
+        self._connection().execute(
+            'DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?', (DONE, FAILED, time.time() - self.retention))
+
+    def get(self, job_id):
+        """
+        Returns the state of a job, or None if the job does not exist (or was purged).
+
+        The state holds the job's 'id', 'type', 'status' ('queued', 'running', 'done' or 'failed'),
+        its timestamps, its 'position' in the queue while queued, and its 'result' or 'error' once finished.
+        """
+        row = self._connection().execute(
+            'SELECT id, type, status, result, error, submitted_at, started_at, finished_at FROM jobs WHERE id = ?',
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_id, job_type, status, result, error, submitted_at, started_at, finished_at = row
+        job = {
+            'id': job_id,
+            'type': job_type,
+            'status': status,
+            'submittedAt': submitted_at,
+            'startedAt': started_at,
+            'finishedAt': finished_at,
+        }
+        if status == QUEUED:
+            job['position'] = self._connection().execute(
+                'SELECT COUNT(*) FROM jobs WHERE status = ? AND submitted_at <= ?', (QUEUED, submitted_at)).fetchone()[0]
+        if status == DONE:
+            job['result'] = json.loads(result)
+        if status == FAILED:
+            job['error'] = error
+        return job
+
+    def wait(self, job_id, timeout=30.0):
+        """
+        Blocks until a job is finished or `timeout` seconds have passed, then returns its state (see get()).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in (DONE, FAILED) or remaining <= 0:
+                return job
+            # Woken up by local workers; jobs finished by another process are seen on the next poll
+            with self._condition:
+                self._condition.wait(timeout=min(remaining, 0.5))
+
+    def stats(self):
+        """
+        Returns the queue depth, the number of running jobs, and wait and run time statistics
+        (in seconds) of the jobs finished in the last hour.
+        """
+        conn = self._connection()
+        now = time.time()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        oldest_queued = conn.execute('SELECT MIN(submitted_at) FROM jobs WHERE status = ?', (QUEUED,)).fetchone()[0]
+        timings = conn.execute(
+            'SELECT started_at - submitted_at, finished_at - started_at FROM jobs WHERE finished_at >= ? AND started_at IS NOT NULL',
+            (now - 3600,)).fetchall()
+        wait_times = [wait for wait, _ in timings]
+        run_times = [run for _, run in timings]
+        return {
+            'depth': counts.get(QUEUED, 0),
+            'running': counts.get(RUNNING, 0),
+            'done': counts.get(DONE, 0),
+            'failed': counts.get(FAILED, 0),
+            'workers': self.workers,
+            'oldestQueuedAge': now - oldest_queued if oldest_queued else 0.0,
+            'waitTime': {'p50': _percentile(wait_times, 0.5), 'p95': _percentile(wait_times, 0.95), 'max': max(wait_times, default=None)},
+            'runTime': {'p50': _percentile(run_times, 0.5), 'p95': _percentile(run_times, 0.95), 'max': max(run_times, default=None)},
+        }
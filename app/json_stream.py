@@ -0,0 +1,165 @@
+import json
+
+
+class JSONSectionStream:
+    """
+    Incrementally parses a JSON object as it is being generated and reports each section as soon as it closes.
+
+    A section is a member of the top-level object, e.g. "overview" or "hardSkills". Members of selected
+    nested objects can be reported individually instead of as one block, e.g. each criterion of
+    "Details" in a match result.
+
+    Usage:
+        stream = JSONSectionStream(nested_keys=['Details'])
+        for chunk in chunks:
+            for path, value in stream.feed(chunk):
+                ...  # path is ('overview',) or ('Details', 'Skill Matching')
+        result = json.loads(stream.text)
+
+    Parameters:
+    - nested_keys (iterable): Top-level keys whose object members are reported one by one.
+    """
+
+    def __init__(self, nested_keys=()):
+        self.nested_paths = {(key,) for key in nested_keys}
+        self.text = ""
+        self._position = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of generated text and returns the sections completed by it.
+
+        Returns:
+        - list: (path, value) tuples, where path is a tuple of keys and value is the parsed section.
+        """
+        self.text += chunk
+        sections = []
+        text = self.text
+        for index in range(self._position, len(text)):
+            char = text[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(index)
+                continue
+
+            frame = self._stack[-1] if self._stack else None
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char in '{[':
+                # A nested container lives under the key of its parent object
+                if frame is None:
+                    path = ()
+                elif frame['type'] == '{':
+                    path = frame['path'] + (frame['key'],)
+                else:
+                    path = frame['path']
+                self._stack.append({'type': char, 'path': path, 'key': None, 'value_start': None})
+            elif char in '}]':
+                if frame is not None:
+                    if frame['type'] == '{' and frame['value_start'] is not None:
+                        self._close_member(frame, index, sections)
+                    self._stack.pop()
+            elif frame is not None and frame['type'] == '{':
+                if char == ':' and frame['key'] is not None and frame['value_start'] is None:
+                    frame['value_start'] = index + 1
+                elif char == ',' and frame['value_start'] is not None:
+                    self._close_member(frame, index, sections)
+
+        self._position = len(text)
+        return sections
+
+    def _close_string(self, end):
+        # A string closed while an object waits for a key is that key
+        frame = self._stack[-1] if self._stack else None
+        if frame is not None and frame['type'] == '{' and frame['key'] is None:
+            frame['key'] = json.loads(self.text[self._string_start:end + 1])
+
+    def _close_member(self, frame, end, sections):
+        key = frame['key']
+        raw_value = self.text[frame['value_start']:end]
+        frame['key'] = None
+        frame['value_start'] = None
+
+        # Only report members of the top-level object and of the nested objects that were asked for,
+        # and skip a nested object itself since its members have already been reported
+        path = frame['path'] + (key,)
+        if (frame['path'] == () or frame['path'] in self.nested_paths) and path not in self.nested_paths:
+            try:
+                sections.append((path, json.loads(raw_value)))
+            except ValueError:
+                pass
+
+
+def iter_sections(result, nested_keys=()):
+    """
+    Yields the sections of a complete JSON object in the same (path, value) form as JSONSectionStream,
+    so cached results can be replayed through the same code path as streamed ones.
+    """
+    for key, value in result.items():
+        if key in nested_keys and isinstance(value, dict):
+            for nested_key, nested_value in value.items():
+                yield (key, nested_key), nested_value
+        else:
+            yield (key,), value
+
+
+def close_truncated_json(text):
+    """
+    Turns JSON cut off in the middle (e.g. by a completion's token cap) into valid JSON, keeping every
+    complete member (or element) of the top-level object (or array) and dropping the one that was being written.
+
+    Only cuts at a boundary between complete top-level members, then closes the top-level container, so
+    no partial string or number is ever kept, and neither is a nested object or array that was still open:
+    '{"a": 1, "b": {"c": 2, "d": "e' gives {"a": 1}, not {"a": 1, "b": {"c": 2}}. A section missing a
+    part would look complete; a missing section is generated again or reported as invalid.
+
+    Returns:
+    - The parsed value, or None if no complete prefix can be recovered.
+    """
+    stack = []
+    in_string = escaped = False
+    # (cut position, closing brackets) after each complete member of the top-level container
+    cuts = []
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if len(stack) == 1:
+                    cuts.append((index + 1, stack[:]))
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+            if len(stack) == 1:
+                cuts.append((index + 1, stack[:]))
+        elif char in '}]':
+            if stack:
+                stack.pop()
+            if len(stack) <= 1:
+                cuts.append((index + 1, stack[:]))
+        elif char == ',' and len(stack) == 1:
+            cuts.append((index, stack[:]))
+
+    # The longest prefix that parses wins; cuts after a key or a dangling colon simply fail to parse
+    for cut, open_containers in reversed(cuts):
+        try:
+            return json.loads(text[:cut].rstrip().rstrip(',') + ''.join(reversed(open_containers)))
+        except ValueError:
+            continue
+    return None
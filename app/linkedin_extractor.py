@@ -1,21 +1,109 @@
 import os
 import json
-from linkedin_api import Linkedin
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from urllib.parse import urlparse, unquote
 from dotenv import load_dotenv
+from disk_cache import DiskCache, make_cache_key
+from metrics import propagate_context
+from single_flight import single_flight
+from schemas import ExtractedProfile, JobDescription, CompanyInfo, JobPosting
+# Shared pool of LinkedIn sessions. It checks the credentials now but only logs in on the first API call.
+from linkedin_session import linkedin_sessions
 
 
 # Load environment variables from a .env file
 load_dotenv()
 
-# Retrieves LinkedIn credentials from environment variables and initializes the LinkedIn API client with these credentials.
-linkedin_username = os.getenv("LINKEDIN_USERNAME")
-linkedin_password = os.getenv("LINKEDIN_PASSWORD")
-api = Linkedin(linkedin_username, linkedin_password)
+# Shared, bounded pool running independent LinkedIn API calls concurrently
+LINKEDIN_MAX_WORKERS = int(os.getenv("LINKEDIN_MAX_WORKERS", "8"))
+linkedin_executor = ThreadPoolExecutor(max_workers=LINKEDIN_MAX_WORKERS, thread_name_prefix="linkedin")
 
-# Check if credentials are available
-if not linkedin_username or not linkedin_password:
-    raise ValueError("LinkedIn credentials not found in environment variables.")
+# Time limits (in seconds) for a group of concurrent LinkedIn calls, and for the optional company fetch of a job
+LINKEDIN_CALL_TIMEOUT = float(os.getenv("LINKEDIN_CALL_TIMEOUT", "30"))
+LINKEDIN_COMPANY_TIMEOUT = float(os.getenv("LINKEDIN_COMPANY_TIMEOUT", "10"))
+
+def run_concurrently(calls, timeout=LINKEDIN_CALL_TIMEOUT):
+    """
+    Runs independent calls concurrently on the shared LinkedIn pool and returns their results in order.
+
+    If any call fails or the whole group exceeds the timeout, the calls that have not started yet are
+    cancelled and the error is raised. Calls that are already running cannot be interrupted; they finish
+    in the background and their results are discarded.
+
+    Parameters:
+    - calls (list): A list of (function, args) tuples.
+    - timeout (float): Time limit in seconds for the whole group.
+
+    Returns:
+    - list: The result of each call, in the same order as `calls`.
+    """
+    deadline = time.monotonic() + timeout
+    # Spans of the calls are reported with the request that started them
+    futures = [linkedin_executor.submit(propagate_context(function), *args) for function, args in calls]
+    try:
+        return [future.result(timeout=max(deadline - time.monotonic(), 0)) for future in futures]
+    except FutureTimeoutError:
+        raise TimeoutError(f"LinkedIn API calls did not complete within {timeout} seconds")
+    finally:
+        for future in futures:
+            future.cancel()
+
+# How long extracted LinkedIn data stays cached, per kind of entity (in seconds)
+LINKEDIN_CACHE_TTLS = {
+    'profile': float(os.getenv("LINKEDIN_PROFILE_CACHE_TTL", str(6 * 3600))),
+    'job': float(os.getenv("LINKEDIN_JOB_CACHE_TTL", str(6 * 3600))),
+    'company': float(os.getenv("LINKEDIN_COMPANY_CACHE_TTL", str(24 * 3600))),
+}
+
+# Persistent cache of extracted profiles, jobs and companies, shared by every worker process on the machine
+linkedin_cache = DiskCache(
+    os.getenv("LINKEDIN_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "linkedin_cache.sqlite3")),
+    max_entries=int(os.getenv("LINKEDIN_CACHE_MAX_ENTRIES", "50000")),
+)
+
+# Hit/miss counters of the LinkedIn cache, per kind of entity
+linkedin_cache_stats = {kind: {'hits': 0, 'misses': 0} for kind in LINKEDIN_CACHE_TTLS}
+_cache_stats_lock = threading.Lock()
+
+def _cached_extraction(kind, entity_id, extract, use_cache=True):
+    """
+    Returns the cached extraction of a LinkedIn entity, or runs `extract` and caches its result.
+
+    Parameters:
+    - kind (str): 'profile', 'job' or 'company'. Selects the TTL and the hit/miss counters.
+    - entity_id (str): The normalized LinkedIn ID of the entity.
+    - extract (callable): Fetches and structures the entity when it is not cached.
+    - use_cache (bool): When False, the cache is not read but the fresh result still replaces the cached one.
+
+    Concurrent misses for the same entity share a single fetch, e.g. the company of several job
+    postings requested in the same burst.
+
+    Returns:
+    - dict: The extracted entity.
+    """
+    # Without an ID there is nothing to key the cache on
+    if not entity_id:
+        return extract()
+
+    # LinkedIn IDs are case-insensitive, so normalize them before building the key
+    key = make_cache_key(kind, entity_id.strip().lower())
+    if use_cache:
+        cached = linkedin_cache.get(key)
+        with _cache_stats_lock:
+            linkedin_cache_stats[kind]['hits' if cached is not None else 'misses'] += 1
+        if cached is not None:
+            return cached
+
+    def fetch():
+        extracted = extract()
+        linkedin_cache.set(key, extracted, ttl=LINKEDIN_CACHE_TTLS[kind])
+        return extracted
+
+    # Every flight is a fresh fetch, so callers bypassing the cache can join one as well
+    return single_flight.do(f'linkedin_{kind}', key, fetch)
 
 def extract_linkedin_id(profile_url):
     """
@@ -35,7 +123,7 @@ def extract_linkedin_id(profile_url):
     
     return linkedin_id
 
-def linkedin_profile_extractor(profile_url):
+def linkedin_profile_extractor(profile_url, use_cache=True):
     """
     Extracts and structures key information from a LinkedIn profile using its URL.
 
@@ -48,6 +136,7 @@ def linkedin_profile_extractor(profile_url):
 
     Parameters:
     - profile_url (str): The URL of the LinkedIn profile to be analyzed.
+    - use_cache (bool): Set to False to fetch the profile again instead of using the cached extraction.
 
     Returns:
     - dict: A dictionary containing structured information about the LinkedIn profile. This includes:
@@ -68,8 +157,14 @@ def linkedin_profile_extractor(profile_url):
     # Extract the LinkedIn ID from the URL using the refined extraction function
     linkedin_id = extract_linkedin_id(profile_url)
 
-    # Use the API calls with the extracted LinkedIn ID
-    profile = api.get_profile(linkedin_id)
+    return _cached_extraction('profile', linkedin_id, lambda: _extract_profile(linkedin_id), use_cache=use_cache)
+
+def _extract_profile(linkedin_id):
+    # The profile and its skills are independent, so fetch both at the same time
+    profile, skills = run_concurrently([
+        (linkedin_sessions.call, ('get_profile', linkedin_id)),
+        (linkedin_sessions.call, ('get_profile_skills', linkedin_id)),
+    ])
 
     # Basic information extraction remains the same
     extracted_info = {
@@ -123,11 +218,11 @@ def linkedin_profile_extractor(profile_url):
         }
         extracted_info['projects'].append(project_detail)
         
-    # Extract skills using the LinkedIn ID
-    skills = api.get_profile_skills(linkedin_id)
+    # Add the skills fetched alongside the profile
     extracted_info['skills'] = [skill['name'] for skill in skills] if skills else 'No skills listed'
 
-    return extracted_info
+    # Values LinkedIn leaves null or gives in another type become those of the record's fields
+    return ExtractedProfile.from_dict(extracted_info).to_dict()
 
 def extract_linkedin_job_id(job_url):
     
@@ -142,7 +237,7 @@ def extract_linkedin_job_id(job_url):
         
     return job_id
 
-def linkedin_job_description_extractor(job_url):
+def linkedin_job_description_extractor(job_url, use_cache=True):
     
     """
     Extracts key information from a LinkedIn job posting based on the provided job URL. This function is designed
@@ -151,6 +246,7 @@ def linkedin_job_description_extractor(job_url):
 
     Parameters:
     - job_url (str): The URL of the LinkedIn job posting.
+    - use_cache (bool): Set to False to fetch the job again instead of using the cached extraction.
 
     Returns:
     - extracted_job_info (dict): A dictionary containing the extracted information from the job posting, including:
@@ -170,9 +266,12 @@ def linkedin_job_description_extractor(job_url):
     
     # Extract the LinkedIn Job ID from the URL
     job_id = extract_linkedin_job_id(job_url)
-    
+
+    return _cached_extraction('job', job_id, lambda: _extract_job_description(job_id), use_cache=use_cache)
+
+def _extract_job_description(job_id):
     # Simulating fetching job details from LinkedIn API with job_id
-    job_description = api.get_job(job_id)  # This is a placeholder for the actual API call
+    job_description = linkedin_sessions.call('get_job', job_id)
 
     # Accessing company details
     company_details = job_description.get('companyDetails', {}).get('com.linkedin.voyager.deco.jobs.web.shared.WebCompactJobPostingCompany', {}).get('companyResolutionResult', {})
@@ -187,7 +286,7 @@ def linkedin_job_description_extractor(job_url):
         'descriptionText': job_description.get('description', {}).get('text', '')
     }
 
-    return extracted_job_info
+    return JobDescription.from_dict(extracted_job_info).to_dict()
 
 from urllib.parse import urlparse, unquote
 
@@ -202,7 +301,7 @@ def extract_linkedin_company_id(company_url):
     company_id = path_parts[-1] if path_parts[-2] == 'company' else None
     return company_id
 
-def linkedin_company_info_extractor(company_url):
+def linkedin_company_info_extractor(company_url, use_cache=True):
     
     """
     Retrieves detailed information about a company from LinkedIn based on the provided company URL.
@@ -213,6 +312,7 @@ def linkedin_company_info_extractor(company_url):
 
     Parameters:
     - company_url (str): The URL of the company's LinkedIn page.
+    - use_cache (bool): Set to False to fetch the company again instead of using the cached extraction.
 
     Returns:
     - company_info (dict): A dictionary containing key information about the company, such as:
@@ -234,8 +334,12 @@ def linkedin_company_info_extractor(company_url):
     
     # Extract the LinkedIn company ID from the URL
     company_id = extract_linkedin_company_id(company_url)
-    
-    company_data = api.get_company(company_id)  
+
+    # Companies are cached by ID, so many job postings from the same employer share one fetch
+    return _cached_extraction('company', company_id, lambda: _extract_company_info(company_id), use_cache=use_cache)
+
+def _extract_company_info(company_id):
+    company_data = linkedin_sessions.call('get_company', company_id)
     
      # Extracting basic company information
     company_info = {
@@ -247,10 +351,10 @@ def linkedin_company_info_extractor(company_url):
         'followerCount': company_data.get('followingInfo', {}).get('followerCount', 'N/A'),
     }
 
-    return company_info
+    return CompanyInfo.from_dict(company_info).to_dict()
 
 
-def linkedin_job_company_extractor(job_url):
+def linkedin_job_company_extractor(job_url, use_cache=True):
     
     """
     Extracts and combines details of a job description and its associated company information from LinkedIn based on a job URL.
@@ -261,27 +365,37 @@ def linkedin_job_company_extractor(job_url):
 
     Parameters:
     - job_url (str): The URL of the job posting on LinkedIn.
+    - use_cache (bool): Set to False to fetch the job and company again instead of using cached extractions.
 
     Returns:
     - combined_info (dict): A dictionary containing both the job description details and the company information. The company information is nested under the 'companyInfo' key within the returned dictionary.
+      If the company could not be fetched, 'companyInfo' is empty and 'degraded' is ['companyInfo']: analyses of such a job are not cached.
 
     Usage:
     - To obtain comprehensive details about a job and its posting company on LinkedIn, pass the job posting URL to this function.
     """
     
     # Extract job description details
-    job_description_details = linkedin_job_description_extractor(job_url)
+    job_description_details = linkedin_job_description_extractor(job_url, use_cache=use_cache)
     
     # Extract 'companyURL' from job description details
     company_url = job_description_details['companyURL']
     
-    # Then, use the extracted 'companyURL' to get company information
-    company_info_details = linkedin_company_info_extractor(company_url)
+    # Then, use the extracted 'companyURL' to get company information. The company only enriches the job,
+    # so a slow or failing company fetch falls back to an empty 'companyInfo' instead of failing the request.
+    degraded = None
+    try:
+        company_info_details = run_concurrently(
+            [(linkedin_company_info_extractor, (company_url, use_cache))], timeout=LINKEDIN_COMPANY_TIMEOUT)[0]
+    except Exception as e:
+        logging.getLogger(__name__).warning("Company info unavailable for %s: %s", company_url, e)
+        company_info_details, degraded = {}, ['companyInfo']
     
     # Combine job description details with company information
     combined_info = {
         **job_description_details,
-        'companyInfo': company_info_details
+        'companyInfo': company_info_details,
+        'degraded': degraded,
     }
     
-    return combined_info
\ No newline at end of file
+    return JobPosting.from_dict(combined_info).to_dict()
\ No newline at end of file
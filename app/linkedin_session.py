@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import fcntl
+import sqlite3
+import logging
+import threading
+from linkedin_api import Linkedin
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from metrics import span
+from upstream_scheduler import linkedin_scheduler
+
+# Load environment variables from a .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Exceptions raised by linkedin_api (or requests underneath it) when a session has expired or been challenged
+SESSION_ERRORS = {'UnauthorizedException', 'ChallengeException', 'TooManyRedirects'}
+
+
+class LinkedinRateLimitError(RuntimeError):
+    """
+    Raised when every configured LinkedIn account has used up its request budget.
+    """
+
+
+# HTTP statuses LinkedIn throttles with: 429, and its own 999
+RATE_LIMIT_STATUSES = {429, 999}
+
+
+class LinkedinResponseError(RuntimeError):
+    """
+    Raised when linkedin_api answers a failed request with an empty payload, or one carrying an error
+    status, instead of raising. The scheduler classifies it by its status code (see classify_error).
+
+    Attributes:
+    - status_code (int): The payload's status or, for an empty payload, the HTTP status of the response
+      behind it: 429 when LinkedIn throttled the account (a 429 or 999), 404 when it answered but found
+      nothing (e.g. a misspelled or deleted profile), which is not retried and does not slow other calls.
+    """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _check_payload(method, payload, response_status=None):
+    # Raises LinkedinResponseError for the payloads linkedin_api returns in place of an error, so they are
+    # retried or reported rather than cached and analyzed. Lists (e.g. of skills) may legitimately be empty.
+    # linkedin_api drops the status of the requests it fails, so an empty payload is classified by the
+    # HTTP status of the last response (see _record_response_status), None when it is unknown.
+    if not isinstance(payload, dict):
+        return payload
+    status = payload.get('status')
+    if payload and not (isinstance(status, int) and status != 200):
+        return payload
+    if isinstance(status, int):
+        status_code = 429 if status in RATE_LIMIT_STATUSES else status
+    elif response_status in RATE_LIMIT_STATUSES:
+        status_code = 429
+    elif response_status is not None and response_status >= 400:
+        status_code = response_status
+    else:
+        status_code = 404
+    raise LinkedinResponseError(f"LinkedIn {method} failed with status {status_code}"
+                                + ("" if payload else " (empty response)"), status_code)
+
+
+# HTTP status of the last LinkedIn response received by each thread
+_responses = threading.local()
+
+
+def _record_response_status(response, *args, **kwargs):
+    # requests response hook: linkedin_api keeps no trace of the status of the requests it fails
+    _responses.status = response.status_code
+
+
+def _keep_connections_alive(api):
+    # Size the keep-alive pool of the session's requests.Session to the scheduler's concurrency, so concurrent
+    # calls reuse open TLS connections instead of opening (and discarding) one each
+    session = getattr(getattr(api, 'client', None), 'session', None)
+    if session is None:
+        return
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=linkedin_scheduler.concurrency.maximum)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(_record_response_status)
+
+
+class LinkedinSessionPool:
+    """
+    Shares logged-in LinkedIn sessions across requests, worker processes and restarts.
+
+    Sessions are created lazily on the first call that needs them. linkedin_api stores the session
+    cookies of each account in `cookies_dir` and reuses them while they are valid, so a restarted
+    process or a new gunicorn worker does not log in again. A file lock per account ensures only one
+    process logs in at a time; the others then pick up the freshly saved cookies.
+
+    Calls are spread over a pool of accounts. Each account has a budget of requests per hour, counted
+    in a SQLite file shared by every process, and the least used account with budget left serves each
+    call. When a session has expired, it is re-authenticated and the call is retried once. Every call
+    goes through the LinkedIn scheduler, which paces calls and retries rate limits and transient errors.
+
+    Parameters:
+    - accounts (list): A list of {'username': ..., 'password': ...} dictionaries.
+    - cookies_dir (str): Directory where session cookies and the usage database are stored.
+    - requests_per_hour (int): Request budget of each account.
+    """
+
+    def __init__(self, accounts, cookies_dir, requests_per_hour=300):
+        if not accounts:
+            raise ValueError("LinkedIn credentials not found in environment variables.")
+        self.accounts = accounts
+        self.cookies_dir = cookies_dir
+        self.requests_per_hour = requests_per_hour
+        self._clients = {}
+        self._locks = {account['username']: threading.Lock() for account in accounts}
+        self._usage_lock = threading.Lock()
+        self._local = threading.local()
+        os.makedirs(cookies_dir, exist_ok=True)
+
+        with self._usage_db() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS usage (username TEXT NOT NULL, called_at REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS usage_username_called_at ON usage (username, called_at)')
+
+    @classmethod
+    def from_env(cls):
+        """
+        Builds the pool from environment variables.
+
+        LINKEDIN_USERNAME / LINKEDIN_PASSWORD define the primary account. LINKEDIN_ACCOUNTS can add more
+        as a JSON list of {"username": ..., "password": ...} objects.
+        """
+        accounts = []
+        if os.getenv("LINKEDIN_USERNAME") and os.getenv("LINKEDIN_PASSWORD"):
+            accounts.append({'username': os.getenv("LINKEDIN_USERNAME"), 'password': os.getenv("LINKEDIN_PASSWORD")})
+        for account in json.loads(os.getenv("LINKEDIN_ACCOUNTS") or "[]"):
+            if account.get('username') not in {existing['username'] for existing in accounts}:
+                accounts.append({'username': account['username'], 'password': account['password']})
+
+        return cls(
+            accounts,
+            cookies_dir=os.getenv("LINKEDIN_COOKIES_DIR", os.path.join(_CACHE_DIR, "linkedin_cookies")),
+            requests_per_hour=int(os.getenv("LINKEDIN_ACCOUNT_REQUESTS_PER_HOUR", "300")),
+        )
+
+    def _usage_db(self):
+        # One connection per thread and process to the shared usage database
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(os.path.join(self.cookies_dir, "usage.sqlite3"), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _reserve_account(self):
+        # Pick the least used account that still has budget in the last hour, and record the call against it
+        conn = self._usage_db()
+        window_start = time.time() - 3600
+        with self._usage_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('DELETE FROM usage WHERE called_at < ?', (window_start,))
+                usage = dict(conn.execute('SELECT username, COUNT(*) FROM usage GROUP BY username').fetchall())
+                available = [account for account in self.accounts if usage.get(account['username'], 0) < self.requests_per_hour]
+                if not available:
+                    conn.execute('COMMIT')
+                    raise LinkedinRateLimitError("Every LinkedIn account has used up its hourly request budget.")
+                account = min(available, key=lambda candidate: usage.get(candidate['username'], 0))
+                conn.execute('INSERT INTO usage (username, called_at) VALUES (?, ?)', (account['username'], time.time()))
+                conn.execute('COMMIT')
+            except LinkedinRateLimitError:
+                raise
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return account
+
+    def _client(self, account, refresh_cookies=False):
+        username = account['username']
+        with self._locks[username]:
+            if refresh_cookies or username not in self._clients:
+                # Serialize logins of the same account across processes through a lock file
+                with open(os.path.join(self.cookies_dir, f"{username}.lock"), "w") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    try:
+                        logger.info("Opening LinkedIn session for %s", username)
+                        self._clients[username] = Linkedin(
+                            username, account['password'],
+                            refresh_cookies=refresh_cookies,
+                            cookies_dir=self.cookies_dir + os.sep)
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+                _keep_connections_alive(self._clients[username])
+            return self._clients[username]
+
+    def call(self, method, *args, **kwargs):
+        """
+        Calls a linkedin_api method (e.g. 'get_profile') on a session from the pool.
+
+        Parameters:
+        - method (str): Name of the Linkedin client method.
+        - *args, **kwargs: Arguments of the method.
+
+        Returns:
+        - The method's return value.
+
+        Raises LinkedinResponseError (once the scheduler's retries are exhausted, UpstreamUnavailableError) when
+        linkedin_api returns an empty or failed payload.
+        """
+        def checked_call(client):
+            _responses.status = None
+            payload = getattr(client, method)(*args, **kwargs)
+            return _check_payload(method, payload, _responses.status)
+
+        def attempt():
+            # Every attempt is a request of its own, counted against the budget of the account serving it
+            account = self._reserve_account()
+            with span(f'linkedin.{method}'):
+                try:
+                    return checked_call(self._client(account))
+                except Exception as e:
+                    if type(e).__name__ not in SESSION_ERRORS:
+                        raise
+                    # The saved session is no longer valid: log in again and retry once
+                    logger.warning("LinkedIn session for %s expired (%s), re-authenticating", account['username'], e)
+                    return checked_call(self._client(account, refresh_cookies=True))
+
+        return linkedin_scheduler.call(attempt)
+
+    def stats(self):
+        """
+        Returns the number of requests each account made in the last hour, and which accounts have a session open.
+        """
+        window_start = time.time() - 3600
+        usage = dict(self._usage_db().execute(
+            'SELECT username, COUNT(*) FROM usage WHERE called_at >= ? GROUP BY username', (window_start,)).fetchall())
+        return {
+            account['username']: {
+                'requestsLastHour': usage.get(account['username'], 0),
+                'budget': self.requests_per_hour,
+                'sessionOpen': account['username'] in self._clients,
+            }
+            for account in self.accounts
+        }
+
+
+# Pool shared by every extractor in the process. No login happens until the first LinkedIn call.
+linkedin_sessions = LinkedinSessionPool.from_env()
@@ -0,0 +1,312 @@
+import re
+from datetime import date
+
+# Weight of each criterion in the overall compatibility score, identical to the matching prompt
+CRITERIA_WEIGHTS = {
+    'Skill Matching': 25,
+    'Experience Relevance': 25,
+    'Educational Alignment': 15,
+    'Cultural and Soft Skills Fit': 15,
+    'Language and International Experience': 10,
+    'Growth Potential': 10,
+}
+
+# Common spellings of the same skill
+SKILL_ALIASES = {
+    'js': 'javascript', 'ts': 'typescript', 'py': 'python', 'ml': 'machine learning', 'ai': 'artificial intelligence',
+    'dl': 'deep learning', 'nlp': 'natural language processing', 'k8s': 'kubernetes', 'postgres': 'postgresql',
+    'gcp': 'google cloud platform', 'aws': 'amazon web services', 'ms excel': 'excel', 'microsoft excel': 'excel',
+    'node': 'nodejs', 'node js': 'nodejs', 'react js': 'react', 'reactjs': 'react', 'scikit learn': 'sklearn',
+    'team work': 'teamwork', 'problem solving skills': 'problem solving', 'communication skills': 'communication',
+}
+
+# Filler words ignored when comparing skills. Subject words ('data', 'software', 'management'...) are not
+# filler: without them "Data Science" would be covered by "Computer Science"
+GENERIC_SKILL_WORDS = {
+    'and', 'or', 'of', 'in', 'the', 'for', 'with', 'to', 'skills', 'skill', 'knowledge', 'experience', 'tools',
+    'basic', 'advanced', 'strong', 'good', 'excellent',
+}
+
+# Academic levels, from lowest to highest, with the words that identify them
+DEGREE_LEVELS = [
+    ('High School', r"high school|secondary school|a[- ]levels?|baccalaureate"),
+    ('Associate', r"associate|diploma|hnd|vocational"),
+    ('Bachelor', r"bachelor|\bb\.?sc?\b|\bb\.?a\b|\bb\.?eng\b|undergraduate|\blaurea\b(?! magistrale)|licen[cs]e"),
+    ('Master', r"master|\bm\.?sc?\b|\bm\.?a\b|\bmba\b|\bm\.?eng\b|laurea magistrale|postgraduate|graduate degree"),
+    ('Doctorate', r"doctor|ph\.?\s?d|\bdphil\b"),
+]
+_DEGREE_PATTERNS = [re.compile(pattern) for _, pattern in DEGREE_LEVELS]
+
+LANGUAGES = [
+    'english', 'spanish', 'french', 'german', 'italian', 'portuguese', 'dutch', 'swedish', 'norwegian', 'danish',
+    'finnish', 'polish', 'czech', 'slovak', 'hungarian', 'romanian', 'bulgarian', 'greek', 'turkish', 'russian',
+    'ukrainian', 'arabic', 'hebrew', 'persian', 'hindi', 'urdu', 'bengali', 'tamil', 'chinese', 'mandarin',
+    'cantonese', 'japanese', 'korean', 'vietnamese', 'thai', 'indonesian', 'malay', 'filipino', 'catalan', 'croatian',
+    'serbian', 'slovenian', 'lithuanian', 'latvian', 'estonian',
+]
+_LANGUAGE_PATTERN = re.compile(r"\b(" + "|".join(LANGUAGES) + r")\b")
+
+# Month names and their abbreviations, as written in dates like "Mar 2021" or "September 2020"
+_MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+_MONTH_NAME_PATTERN = re.compile(r"\b(" + "|".join(_MONTH_NAMES) + r")[a-z]*\.?\s*(?:\d{1,2},?\s*)?(?:19|20)\d{2}")
+
+# Common stop words ignored when comparing job titles
+_TITLE_STOP_WORDS = {'and', 'or', 'of', 'the', 'a', 'an', 'in', 'for', 'at', 'to', 'with', 'm', 'f', 'd', 'x'}
+
+
+def normalize_skill(skill):
+    """
+    Normalizes a skill name for comparison: lowercase, no parenthesized details or punctuation
+    (except the '+' and '#' of C++ or C#), and common aliases resolved.
+    """
+    text = re.sub(r"\(.*?\)", " ", str(skill).lower()).replace('&', ' and ')
+    text = re.sub(r"[^a-z0-9+#]+", " ", text).strip()
+    return SKILL_ALIASES.get(text, text)
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [item for item in value if item]
+    if isinstance(value, str) and value.strip():
+        return [item.strip() for item in re.split(r"[,;\n]", value) if item.strip()]
+    return []
+
+
+def _skill_matches(required, candidate_skills):
+    # Matched when the normalized names are equal, or when all meaningful words of the required skill are
+    # among those of a candidate skill: "Python" is covered by "Python programming", but "Machine Learning
+    # Engineering" is not covered by "Machine Learning"
+    required_tokens = set(required.split()) - GENERIC_SKILL_WORDS
+    for candidate in candidate_skills:
+        if candidate == required:
+            return True
+        candidate_tokens = set(candidate.split()) - GENERIC_SKILL_WORDS
+        if required_tokens and candidate_tokens and required_tokens <= candidate_tokens:
+            return True
+    return False
+
+
+def skill_overlap(profile_skills, required_skills):
+    """
+    Compares a candidate's skills with the skills required by a job.
+
+    Returns:
+    - tuple: (percentage of required skills the candidate has, matched skills, unmatched skills). Skills
+      are reported with the job's wording. The percentage is None when the job lists no skills.
+    """
+    candidate = {normalize_skill(skill) for skill in _as_list(profile_skills)}
+    candidate.discard('')
+    matched, unmatched = [], []
+    for skill in _as_list(required_skills):
+        (matched if _skill_matches(normalize_skill(skill), candidate) else unmatched).append(skill)
+    total = len(matched) + len(unmatched)
+    return (100.0 * len(matched) / total if total else None), matched, unmatched
+
+
+def _languages_in(values):
+    found = set()
+    for value in _as_list(values):
+        found.update(_LANGUAGE_PATTERN.findall(str(value).lower()))
+    # Mandarin and Cantonese requirements are satisfied by Chinese and vice versa
+    if found & {'mandarin', 'cantonese'}:
+        found.add('chinese')
+    return found
+
+
+def language_coverage(profile_languages, required_languages):
+    """
+    Returns (percentage of the job's languages the candidate speaks, missing languages).
+    The percentage is None when the job names no language.
+    """
+    required = _languages_in(required_languages)
+    if not required:
+        return None, []
+    spoken = _languages_in(profile_languages)
+    missing = sorted(language.title() for language in required - spoken - ({'mandarin', 'cantonese'} if 'chinese' in spoken else set()))
+    return 100.0 * (len(required) - len(missing)) / len(required), missing
+
+
+def degree_level(text):
+    """
+    Returns the rank (0 = High School ... 4 = Doctorate) of the lowest academic level mentioned in a text, or None.
+    """
+    text = str(text or '').lower()
+    for rank, pattern in enumerate(_DEGREE_PATTERNS):
+        if pattern.search(text):
+            return rank
+    return None
+
+
+def education_score(highest_degree, degree_requirement):
+    """
+    Compares the candidate's highest degree with the job's academic requirement.
+
+    Meeting or exceeding the lowest level the job mentions scores 100, each level below it costs 35 points.
+    """
+    if isinstance(highest_degree, dict):
+        degree_text = ' '.join(str(highest_degree.get(key) or '') for key in ('level', 'fieldOfStudy'))
+    else:
+        degree_text = str(highest_degree or '')
+    # Use the highest level mentioned for the candidate, e.g. "Master's" in "Bachelor's and Master's"
+    candidate_levels = [rank for rank, pattern in enumerate(_DEGREE_PATTERNS) if pattern.search(degree_text.lower())]
+    candidate_level = max(candidate_levels) if candidate_levels else None
+
+    requirement_text = degree_requirement.get('degreeLevel') if isinstance(degree_requirement, dict) else degree_requirement
+    required_level = degree_level(requirement_text)
+
+    if required_level is None:
+        return 100.0 if candidate_level is not None else 70.0
+    if candidate_level is None:
+        return 30.0
+    return max(0.0, 100.0 - 35.0 * max(required_level - candidate_level, 0))
+
+
+def _parse_year_month(value):
+    # Accepts "2021-03", "Mar 2021", "March 2021", "2021" or {"year": 2021, "month": 3}. The month is 1 when not given.
+    if isinstance(value, dict):
+        return (value['year'], value.get('month') or 1) if value.get('year') else None
+    text = str(value or '').lower()
+    found = re.search(r"(19|20)\d{2}", text)
+    if not found:
+        return None
+    month = re.search(r"(?:19|20)\d{2}-(\d{1,2})\b", text)
+    if month and 1 <= int(month.group(1)) <= 12:
+        return int(found.group()), int(month.group(1))
+    name = _MONTH_NAME_PATTERN.search(text)
+    return int(found.group()), _MONTH_NAMES.index(name.group(1)) + 1 if name else 1
+
+
+def experience_recency_score(last_experience, today=None):
+    """
+    Scores how recent the candidate's last professional experience is: 100 for a current position,
+    minus 20 points per year since it ended, and 0 when there is no experience.
+    """
+    if not isinstance(last_experience, dict) or not last_experience:
+        return 0.0
+    end = last_experience.get('endDate')
+    if not end or str(end).strip().lower() in ('present', 'current', 'now', 'n/a'):
+        return 100.0
+    parsed = _parse_year_month(end)
+    if parsed is None:
+        return 50.0
+    today = today or date.today()
+    years_since = max((today.year - parsed[0]) + (today.month - parsed[1]) / 12.0, 0)
+    return max(0.0, 100.0 - 20.0 * years_since)
+
+
+def _title_tokens(*texts):
+    tokens = set()
+    for text in texts:
+        for value in _as_list(text) if isinstance(text, list) else [text]:
+            tokens.update(re.findall(r"[a-z0-9+#]+", str(value or '').lower()))
+    return tokens - _TITLE_STOP_WORDS
+
+
+def title_relevance(last_experience, job_title):
+    """
+    Returns the percentage of the job title's words found in the candidate's last title and industries.
+    """
+    job_tokens = _title_tokens(job_title)
+    if not job_tokens or not isinstance(last_experience, dict):
+        return 0.0
+    candidate_tokens = _title_tokens(last_experience.get('title'), last_experience.get('industries') or [])
+    return 100.0 * len(job_tokens & candidate_tokens) / len(job_tokens)
+
+
+def match_status(percentage):
+    """
+    Translates a percentage into the "Match Status" wording used in match results.
+    """
+    if percentage >= 75:
+        return 'Match'
+    if percentage >= 40:
+        return 'Partial Match'
+    return 'No Match'
+
+
+def prescore_match(profile_json, jd_json):
+    """
+    Scores a profile analysis against a job description analysis without calling a model.
+
+    The six criteria of the matching prompt are computed deterministically from the outputs of
+    analyze_linkedin_profile and analyze_linkedin_jd:
+    - Skill Matching: share of required hard skills found in the profile's hard skills;
+    - Experience Relevance: recency of the last position and overlap of its title with the job title;
+    - Educational Alignment: highest degree compared with the required degree level;
+    - Cultural and Soft Skills Fit: share of required soft skills found in the profile's soft skills;
+    - Language and International Experience: share of the job's languages the candidate speaks;
+    - Growth Potential: breadth of the candidate's skills relative to the job, combined with recency.
+    They are combined with CRITERIA_WEIGHTS into the overall score.
+
+    Parameters:
+    - profile_json (dict): The analysis returned by analyze_linkedin_profile.
+    - jd_json (dict): The analysis returned by analyze_linkedin_jd.
+
+    Returns:
+    - dict: A match result with the same structure as job_matching_system, with deterministic
+      "Percentage Match" and "Match Status" values and short rule-based suggestions.
+    """
+    skills_required = jd_json.get('skillsRequired') or {}
+    last_experience = profile_json.get('lastProfessionalExperience') or {}
+
+    hard_score, matched_hard, unmatched_hard = skill_overlap(profile_json.get('hardSkills'), skills_required.get('hardSkills'))
+    soft_score, matched_soft, unmatched_soft = skill_overlap(profile_json.get('softSkills'), skills_required.get('softSkills'))
+    language_score, missing_languages = language_coverage(profile_json.get('languages'), jd_json.get('languageRequirements'))
+    recency = experience_recency_score(last_experience)
+    relevance = title_relevance(last_experience, jd_json.get('jobTitle'))
+    education = education_score(profile_json.get('highestDegree'), jd_json.get('academicRequirements'))
+
+    # Criteria the job gives no information on count as met, rather than penalizing the candidate
+    hard_score = 100.0 if hard_score is None else hard_score
+    soft_score = 100.0 if soft_score is None else soft_score
+    language_score = 100.0 if language_score is None else language_score
+    experience = 0.5 * recency + 0.5 * relevance
+    required_count = len(_as_list(skills_required.get('hardSkills'))) or 1
+    breadth = min(100.0, 100.0 * len(_as_list(profile_json.get('hardSkills'))) / required_count)
+    growth = 0.5 * breadth + 0.5 * recency
+
+    percentages = {
+        'Skill Matching': hard_score,
+        'Experience Relevance': experience,
+        'Educational Alignment': education,
+        'Cultural and Soft Skills Fit': soft_score,
+        'Language and International Experience': language_score,
+        'Growth Potential': growth,
+    }
+    suggestions = {
+        'Experience Relevance': (
+            f"Emphasize experience related to the {jd_json.get('jobTitle')} role in your headline and summary."
+            if relevance < 50 and jd_json.get('jobTitle') else "Keep your most recent role and its achievements prominent."),
+        'Educational Alignment': (
+            f"Highlight education and certifications that meet the requirement: {(jd_json.get('academicRequirements') or {}).get('degreeLevel')}."
+            if education < 100 else "Your education meets the job's academic requirements."),
+        'Cultural and Soft Skills Fit': (
+            "Give concrete examples of: " + ", ".join(unmatched_soft) + "." if unmatched_soft
+            else "Your soft skills cover the ones the job asks for."),
+        'Language and International Experience': (
+            "Mention your level in: " + ", ".join(missing_languages) + "." if missing_languages
+            else "Your languages cover the job's requirements."),
+        'Growth Potential': (
+            "Show recent learning in: " + ", ".join(unmatched_hard[:5]) + "." if unmatched_hard
+            else "Show how you keep your skills up to date."),
+    }
+
+    details = {}
+    for criterion, percentage in percentages.items():
+        percentage = int(round(percentage))
+        details[criterion] = {'Match Status': match_status(percentage), 'Percentage Match': percentage}
+        if criterion == 'Skill Matching':
+            details[criterion]['Matched Skills'] = matched_hard
+            details[criterion]['Unmatched Skills'] = unmatched_hard
+        else:
+            details[criterion]['Suggestions'] = suggestions[criterion]
+
+    overall = sum(percentages[criterion] * weight for criterion, weight in CRITERIA_WEIGHTS.items()) / sum(CRITERIA_WEIGHTS.values())
+    strongest = max(percentages, key=percentages.get)
+    weakest = min(percentages, key=percentages.get)
+    return {
+        "Overall Compatibility Score": int(round(overall)),
+        "Details": details,
+        "Summary": (f"Overall compatibility of {int(round(overall))}%. Strongest alignment: {strongest}; "
+                    f"largest gap: {weakest}. {len(matched_hard)} of {len(matched_hard) + len(unmatched_hard)} required hard skills matched."),
+    }
@@ -0,0 +1,229 @@
+import time
+import bisect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds of the latency histogram buckets, in seconds. Upstream calls range from milliseconds to a minute.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# Upper bounds of the token count histogram buckets. A resume is a few hundred to a few thousand tokens.
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 2000, 4000, 8000)
+
+# Spans of the request being served, collected for its Server-Timing header
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing value per combination of labels.
+    """
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.label_names, key))} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    """
+    A distribution of observed values (e.g. durations) in cumulative buckets, per combination of labels.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = list(zip(self.label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{_format_labels(labels + [("le", _format_value(float(bound)))])} {cumulative}')
+                lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{_format_labels(labels)} {series["count"]}')
+        return lines
+
+
+class Registry:
+    """
+    The metrics of the process, rendered in the Prometheus text exposition format.
+
+    Besides counters and histograms updated as events happen, collectors are functions called at
+    scrape time that return (name, type, documentation, [(labels dict, value), ...]) tuples, for values
+    that other modules already keep (token usage, cache statistics, queue depth...).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, label_names=()):
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.extend([f'# HELP {name} {documentation}', f'# TYPE {name} {metric_type}'])
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+stage_duration = registry.histogram(
+    'linkedin_analyzer_stage_duration_seconds',
+    'Duration of each processing stage (LinkedIn calls, OpenAI calls, PDF extraction, prompt building, JSON parsing).',
+    ('stage',))
+stage_errors = registry.counter(
+    'linkedin_analyzer_stage_errors_total',
+    'Processing stages that raised an exception.',
+    ('stage', 'error'))
+model_call_duration = registry.histogram(
+    'linkedin_analyzer_openai_model_duration_seconds',
+    'Duration of OpenAI calls (including their wait for admission) per analysis task and routed model, by outcome (ok, fallback, error).',
+    ('task', 'model', 'outcome'))
+request_duration = registry.histogram(
+    'linkedin_analyzer_http_request_duration_seconds',
+    'Duration of HTTP requests until the response headers are sent.',
+    ('route', 'method', 'status'))
+resume_saved_tokens = registry.histogram(
+    'linkedin_analyzer_resume_saved_tokens',
+    'Tokens of the text of each resume left out of its structuring prompt by local sectioning and compaction.',
+    buckets=TOKEN_BUCKETS)
+
+
+@contextmanager
+def span(stage):
+    """
+    Times a block of code as a processing stage.
+
+    The duration is added to the stage's latency histogram and to the Server-Timing header of the
+    request being served, and an exception raised in the block is counted as an error of the stage.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        stage_errors.inc(stage=stage, error=type(e).__name__)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        stage_duration.observe(duration, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, duration))
+
+
+def timed(stage):
+    """
+    Decorator timing every call of a function as a processing stage (see span()).
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request_timing():
+    """
+    Starts collecting the spans of the current request. Threads started with propagate_context()
+    add their spans to the same request.
+    """
+    _request_spans.set([])
+
+
+def server_timing_header():
+    """
+    Returns the Server-Timing header value of the current request: the total duration of each stage
+    (in milliseconds) and how many times it ran, or None if no stage was timed.
+    """
+    spans = _request_spans.get()
+    if not spans:
+        return None
+    totals = {}
+    for stage, duration in list(spans):
+        total, count = totals.get(stage, (0.0, 0))
+        totals[stage] = (total + duration, count + 1)
+    return ', '.join(f'{stage};dur={total * 1000:.1f};desc="{count}x"' for stage, (total, count) in totals.items())
+
+
+def propagate_context(function):
+    """
+    Wraps a function submitted to a thread pool so that it runs in the submitting thread's context,
+    and its spans are reported with the request that started it.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # A context can only be entered by one thread at a time; the copies still share the request's span list
+        return context.copy().run(function, *args, **kwargs)
+    return wrapper
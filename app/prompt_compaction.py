@@ -0,0 +1,138 @@
+import os
+import re
+import json
+
+# tiktoken gives exact token counts when it is installed; otherwise ~4 characters per token is a close estimate
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+# Maximum tokens kept from a single free-text field, and for the whole JSON payload of a prompt
+FIELD_TOKEN_BUDGET = int(os.getenv("PROMPT_FIELD_TOKEN_BUDGET", "400"))
+PAYLOAD_TOKEN_BUDGET = int(os.getenv("PROMPT_PAYLOAD_TOKEN_BUDGET", "3000"))
+
+# Smallest per-field budget used when shrinking a payload to fit PAYLOAD_TOKEN_BUDGET
+MIN_FIELD_TOKEN_BUDGET = 50
+
+# Values the extractors use when data is missing. They carry no information for the model.
+PLACEHOLDERS = {
+    'n/a', 'none', 'null', 'not available', 'not specified', 'no skills listed', 'no languages listed',
+    'company name not found', 'company url not found',
+}
+
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def estimate_tokens(text):
+    """
+    Returns the number of tokens of a text, exactly with tiktoken or estimated from its length.
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, budget):
+    """
+    Shortens a text to at most `budget` tokens, cutting at a word boundary and marking the cut with an ellipsis.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    if _encoding is not None:
+        truncated = _encoding.decode(_encoding.encode(text)[:budget])
+    else:
+        truncated = text[:budget * 4]
+    return truncated.rsplit(' ', 1)[0].rstrip(' ,.;:') + '…'
+
+
+def compact_text(text):
+    """
+    Collapses runs of spaces and blank lines, which are frequent in extracted PDF and LinkedIn text.
+    """
+    text = re.sub(r'[ \t ]+', ' ', text)
+    return re.sub(r'\s*\n\s*', '\n', text).strip()
+
+
+def _format_date(date):
+    # {"month": 3, "year": 2021} -> "Mar 2021"
+    year = date.get('year')
+    month = date.get('month')
+    if not year:
+        return None
+    if isinstance(month, int) and 1 <= month <= 12:
+        return f"{_MONTHS[month - 1]} {year}"
+    return str(year)
+
+
+def _is_date(value):
+    return isinstance(value, dict) and value and set(value) <= {'year', 'month', 'day'}
+
+
+def _compact(value, field_budget):
+    if isinstance(value, dict):
+        # {"startDate": {...}, "endDate": {...}} periods become "Mar 2021 - Present"
+        if value and set(value) <= {'startDate', 'endDate'} and all(_is_date(date) or not date for date in value.values()):
+            start = _format_date(value.get('startDate') or {})
+            end = _format_date(value.get('endDate') or {}) or 'Present'
+            return f"{start} - {end}" if start else None
+        if _is_date(value):
+            return _format_date(value)
+
+        compacted = {}
+        for key, item in value.items():
+            item = _compact(item, field_budget)
+            if item not in (None, '', [], {}):
+                compacted[key] = item
+        return compacted
+
+    if isinstance(value, (list, tuple)):
+        compacted = [_compact(item, field_budget) for item in value]
+        return [item for item in compacted if item not in (None, '', [], {})]
+
+    if isinstance(value, str):
+        text = compact_text(value)
+        if text.lower().strip(' .') in PLACEHOLDERS:
+            return None
+        return truncate_to_tokens(text, field_budget)
+
+    return value
+
+
+def compact_payload(value, field_budget=FIELD_TOKEN_BUDGET, payload_budget=PAYLOAD_TOKEN_BUDGET):
+    """
+    Removes what a prompt does not need from a profile, job or analysis dictionary.
+
+    Empty values and placeholders such as "N/A" are dropped, raw LinkedIn date and time period objects
+    become short readable strings, whitespace is collapsed, and each free-text field is truncated to
+    `field_budget` tokens. If the result still exceeds `payload_budget` tokens, the per-field budget
+    is halved until it fits or reaches a floor of MIN_FIELD_TOKEN_BUDGET tokens.
+
+    Parameters:
+    - value: The dictionary (or list) to compact.
+    - field_budget (int): Maximum tokens per free-text field.
+    - payload_budget (int): Target maximum tokens for the whole minified payload.
+
+    Returns:
+    - The compacted copy of the value. The input is not modified.
+    """
+    compacted = _compact(value, field_budget)
+    while field_budget > MIN_FIELD_TOKEN_BUDGET and estimate_tokens(minify(compacted)) > payload_budget:
+        field_budget = max(field_budget // 2, MIN_FIELD_TOKEN_BUDGET)
+        compacted = _compact(value, field_budget)
+    return compacted
+
+
+def minify(value):
+    """
+    Serializes a value as JSON without indentation or insignificant whitespace.
+    """
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+
+def compact_json(value, field_budget=FIELD_TOKEN_BUDGET, payload_budget=PAYLOAD_TOKEN_BUDGET):
+    """
+    Compacts a value with compact_payload and returns it as minified JSON, ready to embed in a prompt.
+    """
+    return minify(compact_payload(value, field_budget, payload_budget))
@@ -1,9 +1,13 @@
 import os
 import json
+import time
 import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urlparse, unquote
-from linkedin_api import Linkedin
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import fitz
 import PyPDF2
@@ -12,6 +16,19 @@ from flask import request
 from linkedin_extractor import (extract_linkedin_id, linkedin_profile_extractor, extract_linkedin_job_id,
                                 linkedin_job_description_extractor, extract_linkedin_company_id,
                                 linkedin_company_info_extractor, linkedin_job_company_extractor)
+from disk_cache import DiskCache, make_cache_key
+from json_stream import JSONSectionStream, iter_sections, close_truncated_json
+from match_scoring import prescore_match
+from resume_extraction import SpooledResume, spool_upload, extract_resume, ResumeTooLargeError
+from resume_sections import format_sectioned_resume, record_sectioning
+from prompt_compaction import compact_json, compact_text, truncate_to_tokens, estimate_tokens, PAYLOAD_TOKEN_BUDGET
+from metrics import span, timed, propagate_context, model_call_duration, resume_saved_tokens
+from io_steps import Blocking, Call, Parallel, run_steps
+from upstream_scheduler import openai_scheduler
+from analysis_store import strip_analysis_id
+from schemas import ProfileAnalysis, JobAnalysis, MatchInsights, MatchResult, check_prompt_schema
+from incremental_analysis import (PROFILE_SECTION_DEPENDENCIES, JD_SECTION_DEPENDENCIES, changed_fields,
+                                  sections_to_regenerate, merge_sections, record_reanalysis)
 
 # Load environment variables
 load_dotenv()
@@ -19,37 +36,703 @@ load_dotenv()
 # Suppress INFO logs
 logging.getLogger("httpx").setLevel(logging.WARNING)
 
-# Securely load and check for environment variables
-linkedin_username = os.getenv("LINKEDIN_USERNAME")
-linkedin_password = os.getenv("LINKEDIN_PASSWORD")
+# Securely load and check for environment variables. LinkedIn credentials are checked by linkedin_session.py.
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-if not all([linkedin_username, linkedin_password, openai_api_key]):
+if not openai_api_key:
     raise ValueError("Missing required credentials.")
 
-api = Linkedin(linkedin_username, linkedin_password)
-client = OpenAI(api_key=openai_api_key)
+# Connection pools of the OpenAI clients: keep-alive connections are reused by every request of the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50"))
+_connection_limits = httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                  max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS, keepalive_expiry=60)
 
-def upload_resume_and_analyze(file):
+# Retries are left to the OpenAI scheduler, which also paces calls against the rate limits
+client = OpenAI(api_key=openai_api_key, max_retries=0, http_client=httpx.Client(limits=_connection_limits))
+
+# Client of the async app (asgi.py), created on first use since its connection pool belongs to the event loop serving it
+async_client = None
+
+def _async_client():
+    global async_client
+    if async_client is None:
+        async_client = AsyncOpenAI(api_key=openai_api_key, max_retries=0, http_client=httpx.AsyncClient(limits=_connection_limits))
+    return async_client
+
+# Version of each prompt template. Bump the number whenever a prompt changes so that
+# analyses produced by the old prompt are no longer served from the cache.
+PROMPT_VERSIONS = {
+    'resume_structuring': 3,
+    'profile_analysis': 2,
+    'jd_analysis': 2,
+    'job_matching': 3,
+    'profile_update': 1,
+    'jd_update': 1,
+}
+
+# Sampling temperature of each analysis task
+TASK_TEMPERATURES = {
+    'resume_structuring': 0.5,
+    'profile_analysis': 0.5,
+    'jd_analysis': 0.5,
+    'job_matching': 0.3,
+    'profile_update': 0.5,
+    'jd_update': 0.5,
+}
+
+# Model tiers the analysis tasks are routed to
+MODEL_TIERS = {
+    'fast': os.getenv("FAST_MODEL", "gpt-4o-mini"),
+    'strong': os.getenv("STRONG_MODEL", "gpt-4-turbo-preview"),
+}
+
+# Tiers tried for each task, in order: the first is the primary model and the next ones are used when it
+# errors or exceeds the task's latency budget. Resume structuring and job descriptions are mostly extraction
+# and summarization, so they run on the fast tier and escalate to the strong one; profile analyses and
+# matches run on the strong tier and fall back to the fast one. Updates are routed like full analyses.
+TASK_MODEL_TIERS = {
+    task: [tier.strip() for tier in os.getenv(f"{task.upper()}_MODEL_TIERS", default).split(',') if tier.strip()]
+    for task, default in {
+        'resume_structuring': 'fast,strong',
+        'profile_analysis': 'strong,fast',
+        'jd_analysis': 'fast,strong',
+        'job_matching': 'strong,fast',
+    }.items()
+}
+TASK_MODEL_TIERS['profile_update'] = TASK_MODEL_TIERS['profile_analysis']
+TASK_MODEL_TIERS['jd_update'] = TASK_MODEL_TIERS['jd_analysis']
+for task, tiers in TASK_MODEL_TIERS.items():
+    if not tiers or any(tier not in MODEL_TIERS for tier in tiers):
+        raise ValueError(f"The model tiers of {task} must be a list of {', '.join(MODEL_TIERS)}")
+
+# Seconds a model may take to answer before the next one of the task's route is tried. The last model of a
+# route has no budget, as there is nothing left to fall back on. For streams, the budget covers the first chunk.
+TASK_LATENCY_BUDGETS = {
+    task: float(os.getenv(f"{task.upper()}_LATENCY_BUDGET", default))
+    for task, default in {
+        'resume_structuring': '20',
+        'profile_analysis': '45',
+        'jd_analysis': '20',
+        'job_matching': '45',
+    }.items()
+}
+TASK_LATENCY_BUDGETS['profile_update'] = TASK_LATENCY_BUDGETS['profile_analysis']
+TASK_LATENCY_BUDGETS['jd_update'] = TASK_LATENCY_BUDGETS['jd_analysis']
+
+# USD per million prompt and completion tokens of each model, used to report the cost of each route.
+# OPENAI_MODEL_PRICES can add or override models as {"model": [prompt price, completion price]}.
+MODEL_PRICES = {
+    'gpt-4-turbo-preview': (10.0, 30.0),
+    'gpt-4-turbo': (10.0, 30.0),
+    'gpt-4o': (2.5, 10.0),
+    'gpt-4o-mini': (0.15, 0.6),
+    'gpt-3.5-turbo': (0.5, 1.5),
+}
+MODEL_PRICES.update({model: tuple(prices) for model, prices in json.loads(os.getenv("OPENAI_MODEL_PRICES") or "{}").items()})
+
+def task_models(task):
+    """
+    Returns the models routed to a task, primary model first.
+    """
+    return [MODEL_TIERS[tier] for tier in TASK_MODEL_TIERS[task]]
+
+# How profile, job and match analyses run: 'single' asks one completion for the whole schema, 'sectioned'
+# splits the schema into groups of sections generated by smaller concurrent completions
+ANALYSIS_EXECUTION_MODES = ('single', 'sectioned')
+ANALYSIS_EXECUTION = os.getenv("ANALYSIS_EXECUTION", "single")
+if ANALYSIS_EXECUTION not in ANALYSIS_EXECUTION_MODES:
+    raise ValueError(f"ANALYSIS_EXECUTION must be one of {', '.join(ANALYSIS_EXECUTION_MODES)}")
+
+# Output token cap of a single-completion analysis
+ANALYSIS_MAX_TOKENS = 1024
+
+# Follow-up completions asked for when an output is cut off by its token cap, before falling back to repairing it
+ANALYSIS_MAX_CONTINUATIONS = int(os.getenv("ANALYSIS_MAX_CONTINUATIONS", "2"))
+
+# Shared pool running the section groups of sectioned analyses
+ANALYSIS_SECTION_WORKERS = int(os.getenv("ANALYSIS_SECTION_WORKERS", "16"))
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_SECTION_WORKERS, thread_name_prefix="analysis")
+
+# Persistent cache of analysis results, shared by every worker process on the machine
+analysis_cache = DiskCache(
+    os.getenv("ANALYSIS_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "analysis_cache.sqlite3")),
+    max_entries=int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    default_ttl=float(os.getenv("ANALYSIS_CACHE_TTL", str(7 * 24 * 3600))),
+)
+
+# Tokens consumed by each analysis task, as reported by the API, plus the input tokens saved by prompt compaction
+token_usage = {
+    task: {'calls': 0, 'promptTokens': 0, 'completionTokens': 0, 'compactionSavedTokens': 0}
+    for task in PROMPT_VERSIONS
+}
+_token_usage_lock = threading.Lock()
+
+# Calls, fallbacks, latency, tokens and cost of each model per analysis task
+model_usage = {task: {} for task in PROMPT_VERSIONS}
+
+def _model_usage(task, model):
+    # The counters of a model for a task, created on its first call. Call with _token_usage_lock held.
+    return model_usage[task].setdefault(model, {
+        'calls': 0, 'fallbacks': 0, 'errors': 0, 'latencySeconds': 0.0,
+        'promptTokens': 0, 'completionTokens': 0, 'costUsd': 0.0,
+    })
+
+def model_route_stats():
+    """
+    Returns the route of each task and a snapshot of its per-model counters, with the average latency of each model.
+    """
+    with _token_usage_lock:
+        return {
+            task: {
+                'route': task_models(task),
+                'models': {
+                    model: dict(counters, costUsd=round(counters['costUsd'], 6), latencySeconds=round(counters['latencySeconds'], 3),
+                                averageLatencySeconds=round(counters['latencySeconds'] / counters['calls'], 3) if counters['calls'] else None)
+                    for model, counters in models.items()
+                },
+            }
+            for task, models in model_usage.items()
+        }
+
+def record_token_usage(task, usage=None, saved_tokens=0, model=None):
+    """
+    Adds a completion's token usage (the `usage` object of an API response) to the per-task counters,
+    and to the counters and cost of the model that produced it.
+    """
+    with _token_usage_lock:
+        if usage is not None:
+            token_usage[task]['calls'] += 1
+            token_usage[task]['promptTokens'] += usage.prompt_tokens
+            token_usage[task]['completionTokens'] += usage.completion_tokens
+            if model is not None:
+                counters = _model_usage(task, model)
+                counters['promptTokens'] += usage.prompt_tokens
+                counters['completionTokens'] += usage.completion_tokens
+                prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+                counters['costUsd'] += (usage.prompt_tokens * prompt_price + usage.completion_tokens * completion_price) / 1e6
+        token_usage[task]['compactionSavedTokens'] += saved_tokens
+    if usage is not None:
+        logging.getLogger(__name__).info("%s used %d prompt and %d completion tokens",
+                                         task, usage.prompt_tokens, usage.completion_tokens)
+
+# Completions cut off by their token cap per analysis task, and how their output was recovered
+truncation_stats = {
+    task: {'completions': 0, 'truncated': 0, 'continuations': 0, 'completedByContinuation': 0, 'repaired': 0, 'failed': 0}
+    for task in PROMPT_VERSIONS
+}
+
+# Record type of the output of each analysis task, which the model's JSON is validated against
+TASK_RECORDS = {
+    'profile_analysis': ProfileAnalysis,
+    'profile_update': ProfileAnalysis,
+    'jd_analysis': JobAnalysis,
+    'jd_update': JobAnalysis,
+    'job_matching': MatchInsights,
+}
+
+# Outputs validated per analysis task, and how many did not fit their record
+validation_stats = {task: {'validated': 0, 'violations': 0} for task in TASK_RECORDS}
+
+def record_truncation(task, **counts):
+    """
+    Adds to the truncation counters of a task, e.g. record_truncation('profile_analysis', truncated=1).
+    """
+    with _token_usage_lock:
+        for name, count in counts.items():
+            truncation_stats[task][name] += count
+
+def _compacted_payload(value, indent=2):
+    # Compacts a prompt payload, returning it and how many tokens it saves compared to the indented JSON
+    compacted = compact_json(value)
+    saved_tokens = estimate_tokens(json.dumps(value, indent=indent, default=str)) - estimate_tokens(compacted)
+    return compacted, max(saved_tokens, 0)
+
+class CompactedPrompt(str):
+    """
+    A prompt carrying the tokens its compacted payloads saved. They are recorded when the prompt is sent
+    to the model, not when it is built, so an analysis answered from the cache saves nothing.
+    """
+    def __new__(cls, prompt, saved_tokens):
+        self = super().__new__(cls, prompt)
+        self.saved_tokens = saved_tokens
+        return self
+
+def analysis_cache_key(task, payload):
+    """
+    Builds the cache key of an analysis from its task name and input payload.
+
+    The key covers the canonicalized input JSON, the task's primary model, its temperature and the version
+    of its prompt template, so changing any of them produces a new key.
+    """
+    return make_cache_key(task, PROMPT_VERSIONS[task], task_models(task)[0], TASK_TEMPERATURES[task], payload)
+
+def invalidate_cached_analysis(task, payload):
+    """
+    Removes the cached analysis for a task and input payload. Returns True if an entry was removed.
+
+    :param task: One of the keys of PROMPT_VERSIONS (e.g. 'profile_analysis').
+    :param payload: The input that was analyzed (e.g. the profile dictionary).
+    """
+    return analysis_cache.delete(analysis_cache_key(task, payload))
+
+def _json_completion(task, prompt, cache_payload, use_cache=True, max_tokens=ANALYSIS_MAX_TOKENS, partial=False):
+    """
+    Runs a JSON-mode chat completion for an analysis task, going through the analysis cache.
+
+    :param task: One of the keys of PROMPT_VERSIONS.
+    :param prompt: The user prompt sent to the model.
+    :param cache_payload: The input the prompt was built from, used to key the cache.
+    :param use_cache: When False, the cache is not read but the fresh result still replaces the cached one.
+    :param max_tokens: Output token cap of the completion.
+    :param partial: Whether the prompt asks for only some sections of the task's record (see _validate_output).
+    :return: The parsed JSON returned by the model.
+    """
+    return run_steps(_json_completion_steps(task, prompt, cache_payload, use_cache, max_tokens, partial))
+
+def _json_completion_steps(task, prompt, cache_payload, use_cache=True, max_tokens=ANALYSIS_MAX_TOKENS, partial=False):
+    # Steps of _json_completion (see io_steps), shared by the threaded and the async serving modes
+    result, _ = yield from _cacheable_completion_steps(task, prompt, cache_payload, use_cache, max_tokens, partial)
+    return result
+
+def _degraded(payload):
+    # Whether the input of an analysis (or of one of its groups or updates, under 'input') was extracted with
+    # parts missing, like a job whose company could not be fetched: its analysis is returned but never cached
+    payload = payload.get('input', payload) if isinstance(payload, dict) else payload
+    return isinstance(payload, dict) and bool(payload.get('degraded'))
+
+def _cacheable_completion_steps(task, prompt, cache_payload, use_cache=True, max_tokens=ANALYSIS_MAX_TOKENS, partial=False):
+    # Steps of _json_completion returning (result, cacheable), for the callers that merge the result into a larger
+    # one: the merged result may only be cached if each of its parts could be
+    key = analysis_cache_key(task, cache_payload)
+    if use_cache:
+        cached_result = analysis_cache.get(key)
+        if cached_result is not None:
+            return cached_result, True
+
+    record_token_usage(task, saved_tokens=getattr(prompt, 'saved_tokens', 0))
+    with span(f'openai.{task}'):
+        response, kwargs = yield from _routed_steps(task, _completion_kwargs(task, prompt, max_tokens))
+    record_token_usage(task, response.usage, model=kwargs['model'])
+    text, continued = response.choices[0].message.content or '', response.choices[0].finish_reason == 'length'
+    if continued:
+        text = yield from _continue_truncated_steps(task, kwargs, text)
+    result, complete = _parse_completion(task, text, continued, partial)
+    # A repaired or invalid result lacks what was cut off or malformed, and a fallback model's result is not
+    # what the key stands for, so they are returned but never cached, like the result of a degraded input
+    cacheable = complete and kwargs['model'] == task_models(task)[0] and not _degraded(cache_payload)
+    if cacheable:
+        analysis_cache.set(key, result)
+    return result, cacheable
+
+def _stream_json_completion(task, prompt, cache_payload, use_cache=True, nested_keys=(), partial=False):
+    """
+    Streaming counterpart of _json_completion: yields each section of the JSON result as soon as the model closes it.
+
+    :param nested_keys: Top-level keys whose members are yielded one by one (e.g. 'Details' of a match result).
+    :return: A generator of ('section', path, value) events followed by a single ('done', None, result) event.
+             Cached results are replayed as the same sequence of events.
+    """
+    result, _ = yield from _streamed_completion(task, prompt, cache_payload, use_cache, nested_keys, partial)
+    yield 'done', None, result
+
+def _streamed_completion(task, prompt, cache_payload, use_cache=True, nested_keys=(), partial=False):
+    # The ('section', path, value) events of _stream_json_completion, returning (result, cacheable) like
+    # _cacheable_completion_steps instead of yielding the 'done' event
+    key = analysis_cache_key(task, cache_payload)
+    if use_cache:
+        cached_result = analysis_cache.get(key)
+        if cached_result is not None:
+            for path, value in iter_sections(cached_result, nested_keys):
+                yield 'section', path, value
+            return cached_result, True
+
+    record_token_usage(task, saved_tokens=getattr(prompt, 'saved_tokens', 0))
+    # The span covers the whole stream, from the request to the last chunk
+    finish_reason = None
+    with span(f'openai.{task}'):
+        stream, kwargs = run_steps(_routed_steps(task, _completion_kwargs(task, prompt), stream=True))
+        parser = JSONSectionStream(nested_keys)
+        try:
+            for chunk in stream:
+                # The last chunk carries the token usage of the whole completion and no choices
+                if getattr(chunk, 'usage', None) is not None:
+                    record_token_usage(task, chunk.usage, model=kwargs['model'])
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    for path, value in parser.feed(delta):
+                        yield 'section', path, value
+        finally:
+            # Frees the stream's concurrency slot even if the client stopped listening before the end
+            stream.close()
+
+    if finish_reason == 'length':
+        # The continuation only appends to the streamed text, so its sections go through the same parser
+        text = run_steps(_continue_truncated_steps(task, kwargs, parser.text))
+        for path, value in parser.feed(text[len(parser.text):]):
+            yield 'section', path, value
+    result, complete = _parse_completion(task, parser.text, finish_reason == 'length', partial)
+    cacheable = complete and kwargs['model'] == task_models(task)[0] and not _degraded(cache_payload)
+    if cacheable:
+        analysis_cache.set(key, result)
+    return result, cacheable
+
+def _continuation_kwargs(kwargs, partial_text):
+    # Replays the conversation with the cut-off output as the assistant's turn and asks for the rest. JSON mode
+    # is off, as it would make the model start a new JSON document instead of resuming in the middle of one.
+    continuation = dict(kwargs, messages=kwargs['messages'] + [
+        {"role": "assistant", "content": partial_text},
+        {"role": "user", "content": "Your answer was cut off. Continue it exactly where it stopped, without repeating "
+                                    "anything already written and without any other text, until the JSON is complete."},
+    ])
+    del continuation['response_format']
+    return continuation
+
+def _join_continuation(partial_text, continuation):
+    # Appends a continuation to the partial output, dropping a code fence or a repeated tail the model may add.
+    # Only a tail of 8+ characters spanning a JSON token boundary counts as repeated, so that a string
+    # legitimately continuing with the same characters (e.g. "...aaaa" + "aaaa...") is left intact.
+    continuation = re.sub(r'^\s*```(?:json)?\s*|\s*```\s*$', '', continuation)
+    for overlap in range(min(len(partial_text), len(continuation), 200), 7, -1):
+        tail = partial_text[-overlap:]
+        if continuation.startswith(tail) and any(char in tail for char in '",:[]{}'):
+            return partial_text + continuation[overlap:]
+    return partial_text + continuation
+
+def _continue_truncated_steps(task, kwargs, text):
+    """
+    Asks the model to continue an output cut off by max_tokens, up to ANALYSIS_MAX_CONTINUATIONS times,
+    so the tokens already generated are kept instead of starting over.
+
+    :return: Steps returning the output text extended by the continuations, which may still be cut off.
+    """
+    record_truncation(task, truncated=1)
+    for _ in range(ANALYSIS_MAX_CONTINUATIONS):
+        continuation_kwargs = _continuation_kwargs(kwargs, text)
+        with span(f'openai.{task}.continuation'):
+            response = yield _openai_request(continuation_kwargs)
+        record_token_usage(task, response.usage, model=continuation_kwargs['model'])
+        record_truncation(task, continuations=1)
+        text = _join_continuation(text, response.choices[0].message.content or '')
+        if response.choices[0].finish_reason != 'length':
+            break
+    return text
+
+def _parse_completion(task, text, continued=False, partial=False):
+    """
+    Parses the JSON output of a completion and validates it against the task's record. Output that is
+    still cut off or does not parse is repaired by keeping its complete members and closing it (see
+    close_truncated_json).
+
+    :param continued: Whether the output was extended by continuations.
+    :param partial: Whether the output holds only some sections of the task's record.
+    :return: The parsed result, and False if it had to be repaired or did not fit the record.
+    :raises ValueError: If nothing can be recovered from the output.
+    """
+    record_truncation(task, completions=1)
+    with span('json.parse'):
+        try:
+            result = json.loads(text)
+        except ValueError:
+            result = close_truncated_json(text)
+        else:
+            record_truncation(task, completedByContinuation=int(continued))
+            return _validate_output(task, result, partial)
+    if not isinstance(result, dict) or not result:
+        record_truncation(task, failed=1)
+        raise ValueError(f"The {task} output was cut off before any section was complete")
+    record_truncation(task, repaired=1)
+    logging.getLogger(__name__).warning("Repaired a truncated %s output, keeping sections %s", task, ', '.join(result))
+    # The sections cut off are missing, which is not worth reporting again
+    result, _ = _validate_output(task, result, partial=True)
+    return result, False
+
+def _validate_output(task, result, partial=False):
+    """
+    Brings the parsed output of a task to the shape of its record (see schemas.Record.normalize): values
+    are coerced to the kind of their field, unknown keys are dropped and, unless the output is partial,
+    missing sections are added empty.
+
+    :return: The normalized result, and False if some of it did not fit the record.
+    """
+    record_type = TASK_RECORDS.get(task)
+    if record_type is None:
+        return result, True
+    if not isinstance(result, dict):
+        raise ValueError(f"The {task} output is not a JSON object")
+    with span('json.validate'):
+        normalized, problems = record_type.normalize(result, partial=partial)
+    with _token_usage_lock:
+        validation_stats[task]['validated'] += 1
+        validation_stats[task]['violations'] += int(bool(problems))
+    if problems:
+        logging.getLogger(__name__).warning("The %s output does not fit %s: %s", task, record_type.__name__, '; '.join(problems))
+    return normalized, not problems
+
+def _openai_request(kwargs, max_retries=None, stream=False):
+    # A completion request through the OpenAI scheduler, made with the client or, in the async app, the async client.
+    # Streams are only served by the threaded routes, so they have a blocking implementation only; they hold their
+    # concurrency slot until they are read to the end or closed.
+    tokens = _token_cost(kwargs)
+    if stream:
+        return Blocking(openai_scheduler.stream, lambda: _open_stream(kwargs), tokens=tokens, max_retries=max_retries)
+    return Call(
+        lambda: openai_scheduler.call(lambda: client.chat.completions.create(**kwargs), tokens=tokens, max_retries=max_retries),
+        lambda: openai_scheduler.acall(lambda: _async_client().chat.completions.create(**kwargs), tokens=tokens, max_retries=max_retries))
+
+def _routed_steps(task, kwargs, stream=False):
+    """
+    Makes a completion request on the models routed to a task, falling back to the next model when one
+    errors or exceeds the task's latency budget.
+
+    Every model but the last gets the budget as its request timeout and is not retried by the scheduler,
+    since moving on to the next model is faster than waiting for the same one again.
+
+    :param kwargs: Completion parameters (see _completion_kwargs); each routed model replaces their model.
+    :param stream: Set to True to open a stream instead of waiting for the whole completion.
+    :return: Steps returning the response (or stream), and the parameters of the model that answered.
+    """
+    models = task_models(task)
+    for index, model in enumerate(models):
+        last = index == len(models) - 1
+        model_kwargs = dict(kwargs, model=model) if last else dict(kwargs, model=model, timeout=TASK_LATENCY_BUDGETS[task])
+        started = time.monotonic()
+        try:
+            result = yield _openai_request(model_kwargs, max_retries=None if last else 0, stream=stream)
+        except Exception as e:
+            _record_model_call(task, model, time.monotonic() - started, 'error' if last else 'fallback')
+            if last:
+                raise
+            logging.getLogger(__name__).warning("%s failed on %s (%s: %s), falling back to %s",
+                                                task, model, type(e).__name__, e, models[index + 1])
+            continue
+        _record_model_call(task, model, time.monotonic() - started, 'ok')
+        return result, model_kwargs
+
+def _record_model_call(task, model, latency, outcome):
+    model_call_duration.observe(latency, task=task, model=model, outcome=outcome)
+    with _token_usage_lock:
+        counters = _model_usage(task, model)
+        counters['calls'] += 1
+        counters['latencySeconds'] += latency
+        if outcome != 'ok':
+            counters['fallbacks' if outcome == 'fallback' else 'errors'] += 1
+
+def _token_cost(kwargs):
+    # OpenAI counts the prompt and the max_tokens of a request against the tokens-per-minute limit
+    return sum(estimate_tokens(message['content']) for message in kwargs['messages']) + kwargs['max_tokens']
+
+def _open_stream(kwargs):
+    # Rate limits and connection errors surface when the first chunk is read, so read it within the scheduled
+    # (and retried) call. Errors later in the stream are not retried, as sections were already yielded.
+    stream = iter(client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs))
+    first_chunk = next(stream, None)
+    return stream if first_chunk is None else itertools.chain([first_chunk], stream)
+
+def _completion_kwargs(task, prompt, max_tokens=ANALYSIS_MAX_TOKENS):
+    # Request parameters shared by the regular and the streaming completions of an analysis task.
+    # The model is the task's primary one; _routed_steps replaces it when falling back.
+    return dict(
+        model=task_models(task)[0],
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": "You are a helpful HR analytics assistant designed to output JSON."},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=TASK_TEMPERATURES[task],
+        max_tokens=max_tokens,
+        seed=42
+    )
+
+def _conforms(expected, value):
+    # A section conforms to the schema when it has the JSON type of its description: an object, a list or a text
+    if isinstance(expected, dict):
+        return isinstance(value, dict)
+    if isinstance(expected, list):
+        return isinstance(value, list)
+    return isinstance(value, str)
+
+def _invalid_sections(schema, result, nested_keys=()):
+    # Paths of the schema sections missing from a result or of the wrong type, down into the nested keys
+    invalid = []
+    for section, expected in schema.items():
+        value = result.get(section)
+        if section in nested_keys and isinstance(expected, dict) and isinstance(value, dict):
+            invalid += [(section, key) for key in expected if not _conforms(expected[key], value.get(key))]
+        elif not _conforms(expected, value):
+            invalid.append((section,))
+    return invalid
+
+def _merge_group(result, group_result, group_schema, nested_keys=()):
+    # Adds the sections a group was asked for to the merged result and returns their (path, value) pairs
+    sections = []
+    for section, expected in group_schema.items():
+        if section not in group_result:
+            continue
+        value = group_result[section]
+        if section in nested_keys and isinstance(expected, dict) and isinstance(value, dict):
+            merged = result.setdefault(section, {})
+            for key in expected:
+                if key in value:
+                    merged[key] = value[key]
+                    sections.append(((section, key), value[key]))
+        else:
+            result[section] = value
+            sections.append(((section,), value))
+    return sections
+
+def _sectioned_completion(task, schema, groups, build_prompt, cache_payload, use_cache=True, nested_keys=()):
+    """
+    Generates a JSON result as several smaller completions running concurrently, one per group of schema sections.
+
+    Output tokens are generated sequentially, so each group finishes in about the time its own sections take and
+    has its own token budget. The merged result is validated against the full schema: groups whose sections are
+    missing or malformed run once more, and sections still invalid after that are left empty.
+
+    :param task: One of the keys of PROMPT_VERSIONS.
+    :param schema: The full JSON schema of the result.
+    :param groups: Dictionary of group name -> (schema of the group's sections, max_tokens).
+    :param build_prompt: Function building the prompt that asks for the sections of a group schema.
+    :param cache_payload: The input the prompts are built from. The merged result is cached under the same key
+                          as a single completion's, so both execution modes share cached results, but only if
+                          every group could be cached itself (see _cacheable_completion_steps) and no section
+                          had to be left empty.
+    :param nested_keys: Top-level keys whose members may be split across groups (e.g. 'Details' of a match).
+    :return: A generator of ('section', path, value) events as each group completes, followed by ('done', None, result).
+    """
+    key = analysis_cache_key(task, cache_payload)
+    if use_cache:
+        cached_result = analysis_cache.get(key)
+        if cached_result is not None:
+            for path, value in iter_sections(cached_result, nested_keys):
+                yield 'section', path, value
+            yield 'done', None, cached_result
+            return
+
+    def run_group(group_schema, max_tokens, use_group_cache):
+        group_payload = {'input': cache_payload, 'sections': group_schema}
+        return run_steps(_cacheable_completion_steps(task, build_prompt(group_schema), group_payload, use_cache=use_group_cache,
+                                                     max_tokens=max_tokens, partial=True))
+
+    result, cacheable_groups = {}, {}
+    pending = dict(groups)
+    for attempt in range(2):
+        # The first attempt may use cached groups; a group run again must not get the same invalid answer back
+        futures = {
+            analysis_executor.submit(propagate_context(run_group), group_schema, max_tokens, use_cache and attempt == 0): name
+            for name, (group_schema, max_tokens) in pending.items()
+        }
+        try:
+            for future in as_completed(futures):
+                group_result, cacheable_groups[futures[future]] = future.result()
+                for path, value in _merge_group(result, group_result, groups[futures[future]][0], nested_keys):
+                    yield 'section', path, value
+        finally:
+            for future in futures:
+                future.cancel()
+
+        pending = {name: group for name, group in groups.items() if _invalid_sections(group[0], result, nested_keys)}
+        if not pending:
+            break
+        logging.getLogger(__name__).warning("%s sections %s are invalid, generating them again",
+                                            task, ', '.join(sorted(pending)))
+
+    cacheable = all(cacheable_groups.values()) and not _invalid_sections(schema, result, nested_keys)
+    result = _complete_sections(schema, result, nested_keys)
+    if cacheable:
+        analysis_cache.set(key, result)
+    yield 'done', None, result
+
+def _sectioned_steps(task, schema, groups, build_prompt, cache_payload, use_cache=True, nested_keys=()):
+    """
+    Steps of a sectioned completion returning only the merged result, for the analyses that are not streamed.
+    The groups run concurrently, on analysis_executor or as tasks of the async app (see _sectioned_completion).
+    """
+    key = analysis_cache_key(task, cache_payload)
+    if use_cache:
+        cached_result = analysis_cache.get(key)
+        if cached_result is not None:
+            return cached_result
+
+    result, cacheable_groups = {}, {}
+    pending = dict(groups)
+    for attempt in range(2):
+        names = list(pending)
+        group_results = yield Parallel([
+            _cacheable_completion_steps(task, build_prompt(pending[name][0]), {'input': cache_payload, 'sections': pending[name][0]},
+                                        use_cache=use_cache and attempt == 0, max_tokens=pending[name][1], partial=True)
+            for name in names
+        ], analysis_executor)
+        for name, (group_result, cacheable_groups[name]) in zip(names, group_results):
+            _merge_group(result, group_result, groups[name][0], nested_keys)
+
+        pending = {name: group for name, group in groups.items() if _invalid_sections(group[0], result, nested_keys)}
+        if not pending:
+            break
+        logging.getLogger(__name__).warning("%s sections %s are invalid, generating them again",
+                                            task, ', '.join(sorted(pending)))
+
+    # Like _sectioned_completion, only a result made of cacheable groups with no section left empty is cached
+    cacheable = all(cacheable_groups.values()) and not _invalid_sections(schema, result, nested_keys)
+    result = _complete_sections(schema, result, nested_keys)
+    if cacheable:
+        analysis_cache.set(key, result)
+    return result
+
+def _complete_sections(schema, result, nested_keys=()):
+    # Keeps the result conforming to the schema even if the model failed to produce a section twice,
+    # with its sections in the schema's order like a single completion's result
+    for path in _invalid_sections(schema, result, nested_keys):
+        expected, parent = schema, result
+        for part in path[:-1]:
+            expected, parent = expected[part], parent.setdefault(part, {})
+        expected = expected[path[-1]]
+        parent[path[-1]] = {} if isinstance(expected, dict) else [] if isinstance(expected, list) else ''
+    return {section: result[section] for section in schema if section in result}
+
+def upload_resume_and_analyze(file, use_cache=True):
+    return run_steps(upload_resume_and_analyze_steps(file, use_cache))
+
+def upload_resume_and_analyze_steps(file, use_cache=True):
+    # Steps of upload_resume_and_analyze (see io_steps)
     if file is None:
         return {'error': 'No resume file provided'}, 400
     
     try:
-        # Read the stream content into a bytes object
-        file_stream = file.read()  # This reads the file content into bytes
-        
-        # Now use the bytes to open the PDF with fitz
-        doc = fitz.open("pdf", file_stream)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        # Copy the upload to a size-capped temporary file, hashing its content on the way (unless the caller already did)
+        spooled_resume = file if isinstance(file, SpooledResume) else (yield Blocking(spool_upload, file))
+        with spooled_resume:
+            # The structured resume is cached by the PDF's content hash, so a re-upload skips both extraction and the model call
+            cache_payload = {'pdfSha256': spooled_resume.sha256}
+            if use_cache:
+                cached_result = analysis_cache.get(analysis_cache_key('resume_structuring', cache_payload))
+                if cached_result is not None:
+                    return cached_result, 200
+
+            # Extract the text and its sections with PyMuPDF in a worker process, with page and time limits
+            resume = yield Blocking(extract_resume, spooled_resume, use_cache=use_cache)
+
+        # The sectioned resume leaves out the page furniture and layout noise. If the sectioning kept nothing,
+        # the whole text is sent, with its layout whitespace collapsed.
+        with span('prompt.resume_structuring'):
+            text = resume['text']
+            resume_text = format_sectioned_resume(resume['sections']) or compact_text(text)
+            resume_text = truncate_to_tokens(resume_text, PAYLOAD_TOKEN_BUDGET)
+        raw_tokens, prompt_tokens = estimate_tokens(text), estimate_tokens(resume_text)
+        record_token_usage('resume_structuring', saved_tokens=max(raw_tokens - prompt_tokens, 0))
+        record_sectioning(resume['sections'], raw_tokens, prompt_tokens)
+        resume_saved_tokens.observe(max(raw_tokens - prompt_tokens, 0))
 
         # OpenAI prompt
-        prompt = f'''Given the following resume text, extract and organize the information into a structured format as shown in the template. Ensure that all relevant details such as full name, headline, summary, industry name, location, experience, education, languages, projects, and skills are accurately captured. Follow the template structure closely, adjusting for any additional categories or missing information as necessary.
+        prompt = f'''Given the following resume, extract and organize the information into a structured format as shown in the template. Ensure that all relevant details such as full name, headline, summary, industry name, location, experience, education, languages, projects, and skills are accurately captured. Follow the template structure closely, adjusting for any additional categories or missing information as necessary.
+
+                The resume was split into its sections ("## Section" lines) beforehand. Its name and contact details, when found, are on the first lines, lists of skills and languages are comma-separated, and dates are written as YYYY-MM.
 
-                Resume Text:
-                {text}
+                Resume:
+                {resume_text}
 
                 Template for Structured Format:
                 {{
@@ -93,175 +776,437 @@ def upload_resume_and_analyze(file):
                 Please structure the information from the resume text accordingly.
                 '''
         
-        # Assuming 'client' is an initialized OpenAI client
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": "You are a helpful HR analytics assistant designed to output JSON."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.5,
-            max_tokens=1024,
-            seed=42
-        )
-
-        # Return the structured data from OpenAI's response
-        return json.loads(response.choices[0].message.content), 200
+        # Return the structured data from OpenAI's response. The cache was already checked above.
+        return (yield from _json_completion_steps('resume_structuring', prompt, cache_payload, use_cache=False)), 200
 
+    except ResumeTooLargeError as e:
+        return {'error': str(e)}, 413
+    except TimeoutError as e:
+        return {'error': f"Failed to process the uploaded file: {e}"}, 504
     except Exception as e:
         return {'error': f"Failed to process the uploaded file: {e}"}, 500
 
+# JSON schema of a profile analysis: each section with the description of its content
+PROFILE_ANALYSIS_SCHEMA = {
+    "fullName": "The full name of the individual.",
+    "location": "City, Country.",
+    "overview": "A detailed and insightful summary of the individual's professional journey, focusing on significant achievements, experiences, and the value they bring to their field.",
+    "highestDegree": {
+        "level": "The highest level of academic achievement (Doctorate, Master's, Bachelor's).",
+        "fieldOfStudy": "Field of study in English.",
+        "institution": "Institution name in the original language.",
+        "graduationDate": "Graduation date (most recent if multiple degrees)."
+    },
+    "lastProfessionalExperience": {
+        "companyName": "Name of the company of the most recent or current job position.",
+        "title": "Job title of the most recent or current position.",
+        "startDate": "Start date of the most recent or current position. Use format YYYY-MM if possible.",
+        "endDate": "End date of the most recent or current position, if applicable. Use format YYYY-MM if possible. Use 'Present' if still working there.",
+        "locationName": "City, Country of the most recent or current position.",
+        "geoLocationName": "Specific geographical location of the most recent or current position.",
+        "industries": ["List of industries related to the most recent or current position."]
+    },
+    "languages": ["List of languages the individual speaks, along with proficiency levels if available. Find the native language if not provided"],
+    "hardSkills": ["List of hard skills relevant to their field and position."],
+    "softSkills": ["List of soft skills that highlight interpersonal and professional competencies. Translate them to english if necessary. If not directly provided, find them on the summary and about section "],
+    "strengths": ["In-depth analysis of key strengths, showcasing specific examples from the profile. If not provided, find them on the summary and about section"],
+    "weaknesses": ["Honest evaluation of potential areas for improvement with constructive feedback."],
+    "improvementSuggestions": ["Actionable advice to enhance the profile, tailored to address identified weaknesses."],
+    "careerSuggestions": ["List of job recommendations or career paths that align with the individual's skills and aspirations. Be creative."]
+}
+
+# JSON schema of a job description analysis
+JD_ANALYSIS_SCHEMA = {
+    "jobTitle": "Clearly state the job title.",
+    "location": "Identify and mention the job location, considering the description or the company's primary location if not explicitly stated.",
+    "overview": "A concise summary highlighting key job responsibilities, technologies involved, and the role's significance within the company.",
+    "companyInfo": {
+        "name": "The company name.",
+        "linkedinUrl": "The LinkedIn URL of the company.",
+        "overview": "A brief summary of the company's mission, vision, and unique qualities.",
+        "specialties": ["List the company's areas of expertise or specializations."]
+    },
+    "experienceLevel": "Detail the required experience level (e.g., entry-level, mid-senior, senior), inferring from responsibilities and skills if not explicitly mentioned.",
+    "academicRequirements": {
+        "degreeLevel": "Infer the necessary academic degree level based on the description, suggesting relevant fields of study for technical roles."
+    },
+    "skillsRequired": {
+        "hardSkills": ["List of hard skills required for the position."],
+        "softSkills": ["List of soft skills important for success in the role."]
+    },
+    "languageRequirements": ["Specify the primary language needed for the role and any additional beneficial languages based on the company's location and culture."],
+    "keyResponsibilities": ["Highlight the 10 major responsibilities associated with the position, formatted for clarity."]
+}
+
+# The schemas the model is asked for must describe the records its output is validated against
+check_prompt_schema(ProfileAnalysis, PROFILE_ANALYSIS_SCHEMA)
+check_prompt_schema(JobAnalysis, JD_ANALYSIS_SCHEMA)
+
+# Groups of sections generated together in the sectioned execution mode, with the output token cap of each group
+PROFILE_SECTION_GROUPS = {
+    'identity': (('fullName', 'location', 'highestDegree', 'lastProfessionalExperience', 'languages'), 450),
+    'skills': (('overview', 'hardSkills', 'softSkills'), 450),
+    'assessment': (('strengths', 'weaknesses'), 500),
+    'suggestions': (('improvementSuggestions', 'careerSuggestions'), 450),
+}
+JD_SECTION_GROUPS = {
+    'role': (('jobTitle', 'location', 'experienceLevel', 'academicRequirements', 'languageRequirements'), 350),
+    'company': (('overview', 'companyInfo'), 450),
+    'skills': (('skillsRequired',), 400),
+    'responsibilities': (('keyResponsibilities',), 500),
+}
+
+def _schema_text(schema, sections=None):
+    # Renders an analysis schema (or only some of its sections) for a prompt
+    if sections is not None:
+        schema = {section: schema[section] for section in sections}
+    return json.dumps(schema, indent=2, ensure_ascii=False)
+
+def _section_groups(schema, groups):
+    # The schema of each group of sections, with its token cap, as expected by _sectioned_completion
+    return {name: ({section: schema[section] for section in sections}, max_tokens) for name, (sections, max_tokens) in groups.items()}
+
+def _sections_note(schema, full_schema):
+    # Tells the model that a prompt only asks for part of the analysis, the rest being generated separately
+    if schema is full_schema:
+        return ''
+    return ' (only these sections; the other sections of the analysis are generated separately)'
+
+def _execution_of(execution):
+    execution = execution or ANALYSIS_EXECUTION
+    if execution not in ANALYSIS_EXECUTION_MODES:
+        raise ValueError(f"execution must be one of {', '.join(ANALYSIS_EXECUTION_MODES)}")
+    return execution
+
 # THIS FUNCTION RETURN JSON
-def analyze_linkedin_profile(profile_dict):
+@timed('prompt.profile_analysis')
+def _profile_analysis_prompt(profile_dict, schema=PROFILE_ANALYSIS_SCHEMA):
     """
-    Analyzes the given LinkedIn profile dictionary using OpenAI.
-
-    :param jd_dict: A dictionary containing LinkedIn profile information.
-    :return: Analysis result from OpenAI.
+    Builds the analysis prompt of a LinkedIn profile dictionary, for the whole schema or a group of its sections.
     """
 
     # Convert the LinkedIn profile dictionary into a textual prompt
     
-    profile_info = json.dumps(profile_dict, indent=2)
+    profile_info, saved_tokens = _compacted_payload(profile_dict)
     
     prompt = f'''
     Analyze the LinkedIn profile provided below and generate a structured analysis in JSON format and structured according to the specified JSON schema. Emphasize the overview, strengths, and weaknesses. The analysis should translate any non-English text to English while preserving Named Entities in their original language. 
     The analysis should provide a clear, detailed overview, highlighting the individual's professional journey, key strengths, areas for improvement, and actionable suggestions for enhancing their profile. 
     Skills listed in the 'skills' section and those implied in the headline, summary, and project descriptions should be emphasized.
 
-    **LinkedIn Profile Data Structure:**
+    **LinkedIn Profile Data Structure (minified JSON; empty fields omitted):**
     {profile_info}
 
-    **Required JSON Analysis Schema:**
+    **Required JSON Analysis Schema{_sections_note(schema, PROFILE_ANALYSIS_SCHEMA)}:**
 
-    {{
-      "fullName": "The full name of the individual.",
-      "location": "City, Country.",
-      "overview": "A detailed and insightful summary of the individual's professional journey, focusing on significant achievements, experiences, and the value they bring to their field.",
-      "highestDegree": {{
-        "level": "The highest level of academic achievement (Doctorate, Master's, Bachelor's).",
-        "fieldOfStudy": "Field of study in English.",
-        "institution": "Institution name in the original language.",
-        "graduationDate": "Graduation date (most recent if multiple degrees)."
-      }},
-      "lastProfessionalExperience": {{
-        "companyName": "Name of the company of the most recent or current job position.",
-        "title": "Job title of the most recent or current position.",
-        "startDate": "Start date of the most recent or current position. Use format YYYY-MM if possible.",
-        "endDate": "End date of the most recent or current position, if applicable. Use format YYYY-MM if possible. Use 'Present' if still working there.",
-        "locationName": "City, Country of the most recent or current position.",
-        "geoLocationName": "Specific geographical location of the most recent or current position.",
-        "industries": ["List of industries related to the most recent or current position."]
-      }},
-      "languages": ["List of languages the individual speaks, along with proficiency levels if available. Find the native language if not provided"],
-      "hardSkills": ["List of hard skills relevant to their field and position."],
-      "softSkills": ["List of soft skills that highlight interpersonal and professional competencies. Translate them to english if necessary. If not directly provided, find them on the summary and about section "],
-      "strengths": ["In-depth analysis of key strengths, showcasing specific examples from the profile. If not provided, find them on the summary and about section"],
-      "weaknesses": ["Honest evaluation of potential areas for improvement with constructive feedback."],
-      "improvementSuggestions": ["Actionable advice to enhance the profile, tailored to address identified weaknesses."],
-      "careerSuggestions": ["List of job recommendations or career paths that align with the individual's skills and aspirations. Be creative."]
-    }}
+    {_schema_text(schema)}
   '''
+    return CompactedPrompt(prompt, saved_tokens)
 
-    response = client.chat.completions.create(
-      model="gpt-4-turbo-preview",
-      response_format={ "type": "json_object" },
-      messages=[
-        {"role": "system", "content": "You are a helpful HR analytics assistant designed to output JSON."},
-        {"role": "user", "content": prompt},
-        
-      ],
-      temperature=0.5,
-      max_tokens=1024,
-      seed = 42
-    )
-    return json.loads(response.choices[0].message.content)
+def _profile_sections(profile_dict):
+    # Task, schema, groups, prompt builder and cache payload of a sectioned profile analysis
+    return ('profile_analysis', PROFILE_ANALYSIS_SCHEMA, _section_groups(PROFILE_ANALYSIS_SCHEMA, PROFILE_SECTION_GROUPS),
+            lambda schema: _profile_analysis_prompt(profile_dict, schema), profile_dict)
+
+def analyze_linkedin_profile(profile_dict, use_cache=True, execution=None):
+    """
+    Analyzes the given LinkedIn profile dictionary using OpenAI.
+
+    :param jd_dict: A dictionary containing LinkedIn profile information.
+    :param use_cache: Set to False to bypass the analysis cache and force a fresh analysis.
+    :param execution: 'single' or 'sectioned' (see ANALYSIS_EXECUTION, the default).
+    :return: Analysis result from OpenAI.
+    """
+    return run_steps(analyze_linkedin_profile_steps(profile_dict, use_cache, execution))
+
+def analyze_linkedin_profile_steps(profile_dict, use_cache=True, execution=None):
+    # Steps of analyze_linkedin_profile (see io_steps)
+    if _execution_of(execution) == 'sectioned':
+        return (yield from _sectioned_steps(*_profile_sections(profile_dict), use_cache=use_cache))
+    prompt = _profile_analysis_prompt(profile_dict)
+    return (yield from _json_completion_steps('profile_analysis', prompt, profile_dict, use_cache=use_cache))
+
+def stream_analyze_linkedin_profile(profile_dict, use_cache=True, execution=None):
+    """
+    Streaming variant of analyze_linkedin_profile, yielding each section of the analysis as soon as it is generated.
+
+    :param profile_dict: A dictionary containing LinkedIn profile information.
+    :param use_cache: Set to False to bypass the analysis cache and force a fresh analysis.
+    :param execution: 'single' or 'sectioned'. Sectioned analyses yield the sections of each group as the group completes.
+    :return: A generator of ('section', path, value) events followed by ('done', None, analysis).
+    """
+    if _execution_of(execution) == 'sectioned':
+        return _sectioned_completion(*_profile_sections(profile_dict), use_cache=use_cache)
+    prompt = _profile_analysis_prompt(profile_dict)
+    return _stream_json_completion('profile_analysis', prompt, profile_dict, use_cache=use_cache)
 
 
     
 # THIS FUNCTION RETURN JSON
 
-def analyze_linkedin_jd(jd_dict):
+@timed('prompt.jd_analysis')
+def _jd_analysis_prompt(jd_dict, schema=JD_ANALYSIS_SCHEMA):
     """
-    Analyzes the given LinkedIn Job Description dictionary using OpenAI.
-
-    :param jd_dict: A dictionary containing LinkedIn Job Description information.
-    :return: Analysis result from OpenAI.
+    Builds the analysis prompt of a LinkedIn job description dictionary, for the whole schema or a group of its sections.
     """
 
     # Convert the LinkedIn JD dictionary into a textual prompt
-    jd_info = json.dumps(jd_dict, indent=2)
+    jd_info, saved_tokens = _compacted_payload(jd_dict)
     
     prompt = f'''
     Analyze the job description provided below and generate a structured analysis in JSON format, following the specified JSON schema. Focus on the job title, detailed job responsibilities, company information, location, experience and academic requirements, necessary skills, and key responsibilities. Translate any non-English text to English while preserving Named Entities in their original language. The analysis should prioritize providing a clear and concise overview, highlighting important details and offering insights into the job and the company.
-    **Job Description Data Structure:**
+    **Job Description Data Structure (minified JSON; empty fields omitted):**
     {jd_info}
 
-    **Required JSON Analysis Schema:**
+    **Required JSON Analysis Schema{_sections_note(schema, JD_ANALYSIS_SCHEMA)}:**
 
-    {{
-      "jobTitle": "Clearly state the job title.",
-      "location": "Identify and mention the job location, considering the description or the company's primary location if not explicitly stated.",
-      "overview": "A concise summary highlighting key job responsibilities, technologies involved, and the role's significance within the company.",
-      "companyInfo": {{
-        "name": "The company name.",
-        "linkedinUrl": "The LinkedIn URL of the company.",
-        "overview": "A brief summary of the company's mission, vision, and unique qualities.",
-        "specialties": ["List the company's areas of expertise or specializations."]
-      }},
-      "experienceLevel": "Detail the required experience level (e.g., entry-level, mid-senior, senior), inferring from responsibilities and skills if not explicitly mentioned.",
-      "academicRequirements": {{
-        "degreeLevel": "Infer the necessary academic degree level based on the description, suggesting relevant fields of study for technical roles."
-      }},
-      "skillsRequired": {{
-        "hardSkills": ["List of hard skills required for the position."],
-        "softSkills": ["List of soft skills important for success in the role."]
-      }},
-      "languageRequirements": ["Specify the primary language needed for the role and any additional beneficial languages based on the company's location and culture."],
-      "keyResponsibilities": ["Highlight the 10 major responsibilities associated with the position, formatted for clarity."]
-    }}
+    {_schema_text(schema)}
 
     The analysis should maintain a professional tone, be comprehensive, and adhere closely to the JSON schema provided, ensuring that all sections are filled with relevant and insightful information.
     '''
-    response = client.chat.completions.create(
-    model="gpt-4-turbo-preview",
-    response_format={ "type": "json_object" },
-    messages=[
-      {"role": "system", "content": "You are a helpful HR analytics assistant designed to output JSON."},
-      {"role": "user", "content": prompt},
-      
-    ],
-    temperature=0.5,
-    max_tokens=1024,
-    seed = 42
-  )
-    return json.loads(response.choices[0].message.content)
-
-
-
-def job_matching_system(profile_json, jd_json):
-    
+    return CompactedPrompt(prompt, saved_tokens)
+
+def _jd_sections(jd_dict):
+    # Task, schema, groups, prompt builder and cache payload of a sectioned job description analysis
+    return ('jd_analysis', JD_ANALYSIS_SCHEMA, _section_groups(JD_ANALYSIS_SCHEMA, JD_SECTION_GROUPS),
+            lambda schema: _jd_analysis_prompt(jd_dict, schema), jd_dict)
+
+def analyze_linkedin_jd(jd_dict, use_cache=True, execution=None):
     """
-    Evaluates the compatibility between a LinkedIn profile and a job description based on specified criteria and weights.
+    Analyzes the given LinkedIn Job Description dictionary using OpenAI.
 
-    This function assesses how well a LinkedIn profile matches with a job description (JD) using criteria such as skill matching,
-    experience relevance, education alignment, soft skills and cultural fit, and language proficiency. Each criterion is assigned a weight, contributing to an overall compatibility score. 
-    The analysis includes a detailed breakdown of match status, percentage matches for each criterion, and suggestions for improving the LinkedIn profile to align more closely with the job description.
+    :param jd_dict: A dictionary containing LinkedIn Job Description information.
+    :param use_cache: Set to False to bypass the analysis cache and force a fresh analysis.
+    :param execution: 'single' or 'sectioned' (see ANALYSIS_EXECUTION, the default).
+    :return: Analysis result from OpenAI.
+    """
+    return run_steps(analyze_linkedin_jd_steps(jd_dict, use_cache, execution))
+
+def analyze_linkedin_jd_steps(jd_dict, use_cache=True, execution=None):
+    # Steps of analyze_linkedin_jd (see io_steps)
+    if _execution_of(execution) == 'sectioned':
+        return (yield from _sectioned_steps(*_jd_sections(jd_dict), use_cache=use_cache))
+    prompt = _jd_analysis_prompt(jd_dict)
+    return (yield from _json_completion_steps('jd_analysis', prompt, jd_dict, use_cache=use_cache))
+
+def stream_analyze_linkedin_jd(jd_dict, use_cache=True, execution=None):
+    """
+    Streaming variant of analyze_linkedin_jd, yielding each section of the analysis as soon as it is generated.
+
+    :param jd_dict: A dictionary containing LinkedIn Job Description information.
+    :param use_cache: Set to False to bypass the analysis cache and force a fresh analysis.
+    :param execution: 'single' or 'sectioned'. Sectioned analyses yield the sections of each group as the group completes.
+    :return: A generator of ('section', path, value) events followed by ('done', None, analysis).
+    """
+    if _execution_of(execution) == 'sectioned':
+        return _sectioned_completion(*_jd_sections(jd_dict), use_cache=use_cache)
+    prompt = _jd_analysis_prompt(jd_dict)
+    return _stream_json_completion('jd_analysis', prompt, jd_dict, use_cache=use_cache)
+
+
+# How each kind of analysis is brought up to date: its full and partial tasks, schema, section dependencies and full analysis
+ANALYSIS_UPDATES = {
+    'profile': {
+        'task': 'profile_analysis', 'update_task': 'profile_update', 'subject': 'LinkedIn profile',
+        'schema': PROFILE_ANALYSIS_SCHEMA, 'dependencies': PROFILE_SECTION_DEPENDENCIES,
+        'analyze': analyze_linkedin_profile_steps, 'stream': stream_analyze_linkedin_profile,
+    },
+    'job': {
+        'task': 'jd_analysis', 'update_task': 'jd_update', 'subject': 'job description',
+        'schema': JD_ANALYSIS_SCHEMA, 'dependencies': JD_SECTION_DEPENDENCIES,
+        'analyze': analyze_linkedin_jd_steps, 'stream': stream_analyze_linkedin_jd,
+    },
+}
+
+@timed('prompt.analysis_update')
+def _analysis_update_prompt(kind, sections, changed, previous_analysis, current_dict):
+    """
+    Builds the prompt regenerating some sections of a previous analysis after its input changed.
+    """
+    update = ANALYSIS_UPDATES[kind]
+    current_info, saved_tokens = _compacted_payload(current_dict)
+
+    prompt = f'''
+    The {update['subject']} below has changed since it was last analyzed. Regenerate only the following sections of its analysis: {', '.join(sections)}. Base them on the current data and keep them consistent with the rest of the previous analysis, in the same style and level of detail. Translate any non-English text to English while preserving Named Entities in their original language.
+
+    **Changed fields:** {', '.join(sorted(changed))}
+
+    **Current Data (minified JSON; empty fields omitted):**
+    {current_info}
+
+    **Previous Analysis:**
+    {compact_json(previous_analysis)}
+
+    **Required JSON Schema (only the sections to regenerate):**
+
+    {_schema_text(update['schema'], sections)}
+    '''
+    return CompactedPrompt(prompt, saved_tokens)
+
+def _plan_reanalysis(kind, previous_dict, previous_analysis, current_dict, use_cache):
+    """
+    Decides how to bring the analysis of a previous extraction up to date with a fresh one.
+
+    Returns:
+    - tuple: ('reuse', analysis) when no model call is needed, ('full', None) when every section depends
+      on a changed field, or ('partial', (sections, prompt, cache_payload)) to regenerate some sections.
+    """
+    update = ANALYSIS_UPDATES[kind]
+    previous_analysis = strip_analysis_id(previous_analysis)
+    changed = changed_fields(previous_dict, current_dict)
+    sections = sections_to_regenerate(update['dependencies'], changed)
+    # Sections missing from the previous analysis (e.g. an older schema) are generated as well
+    sections += [section for section in update['schema'] if section not in previous_analysis and section not in sections]
+
+    if not sections:
+        record_reanalysis(kind, 0, len(update['schema']))
+        return 'reuse', previous_analysis
+    if use_cache:
+        cached_result = analysis_cache.get(analysis_cache_key(update['task'], current_dict))
+        if cached_result is not None:
+            return 'reuse', cached_result
+    record_reanalysis(kind, len(sections), len(update['schema']))
+    if len(sections) == len(update['schema']):
+        return 'full', None
+
+    prompt = _analysis_update_prompt(kind, sections, changed, previous_analysis, current_dict)
+    cache_payload = {'input': current_dict, 'previous': previous_analysis, 'sections': sections}
+    return 'partial', (sections, prompt, cache_payload)
+
+def reanalyze(kind, previous_dict, previous_analysis, current_dict, use_cache=True):
+    """
+    Analyzes a fresh extraction of a profile or job that was already analyzed, regenerating only the
+    sections of the previous analysis that depend on the fields that changed.
+
+    Unchanged inputs cost no model call. The merged analysis is cached like a full analysis of the new input,
+    unless the regenerated sections could not be cached themselves (see _cacheable_completion_steps).
 
     Parameters:
-    - profile_json (dict): A dictionary containing LinkedIn profile data structured in JSON format.
-    - jd_json (dict): A dictionary containing job description data structured in JSON format.
+    - kind (str): 'profile' or 'job'.
+    - previous_dict (dict): The extraction the previous analysis was made from.
+    - previous_analysis (dict): The previous analysis.
+    - current_dict (dict): The fresh extraction.
+    - use_cache (bool): Set to False to bypass the analysis cache for the regenerated sections.
 
     Returns:
-    - dict: A JSON object containing the overall compatibility score, detailed analysis for each criterion, and improvement suggestions.
+    - dict: The up-to-date analysis.
     """
+    return run_steps(reanalyze_steps(kind, previous_dict, previous_analysis, current_dict, use_cache))
 
-    
-    # Prompt for comparison and scoring
+def reanalyze_steps(kind, previous_dict, previous_analysis, current_dict, use_cache=True):
+    # Steps of reanalyze (see io_steps)
+    update = ANALYSIS_UPDATES[kind]
+    plan, details = _plan_reanalysis(kind, previous_dict, previous_analysis, current_dict, use_cache)
+    if plan == 'reuse':
+        return details
+    if plan == 'full':
+        return (yield from update['analyze'](current_dict, use_cache=use_cache))
+
+    sections, prompt, cache_payload = details
+    regenerated, cacheable = yield from _cacheable_completion_steps(update['update_task'], prompt, cache_payload,
+                                                                    use_cache=use_cache, partial=True)
+    merged = merge_sections(strip_analysis_id(previous_analysis), regenerated, sections)
+    if cacheable:
+        analysis_cache.set(analysis_cache_key(update['task'], current_dict), merged)
+    return merged
+
+def stream_reanalyze(kind, previous_dict, previous_analysis, current_dict, use_cache=True):
+    """
+    Streaming variant of reanalyze. The sections kept from the previous analysis are yielded immediately,
+    then each regenerated section as soon as it is generated.
+
+    :return: A generator of ('section', path, value) events followed by ('done', None, analysis).
+    """
+    update = ANALYSIS_UPDATES[kind]
+    plan, details = _plan_reanalysis(kind, previous_dict, previous_analysis, current_dict, use_cache)
+    if plan == 'reuse':
+        for path, value in iter_sections(details):
+            yield 'section', path, value
+        yield 'done', None, details
+        return
+    if plan == 'full':
+        yield from update['stream'](current_dict, use_cache=use_cache)
+        return
+
+    sections, prompt, cache_payload = details
+    previous_analysis = strip_analysis_id(previous_analysis)
+    for section, value in previous_analysis.items():
+        if section not in sections:
+            yield 'section', (section,), value
+    events = _streamed_completion(update['update_task'], prompt, cache_payload, use_cache=use_cache, partial=True)
+    regenerated, cacheable = yield from _section_events(events, sections)
+    merged = merge_sections(previous_analysis, regenerated, sections)
+    if cacheable:
+        analysis_cache.set(analysis_cache_key(update['task'], current_dict), merged)
+    yield 'done', None, merged
+
+def _section_events(events, sections):
+    # Passes on the events of the given top-level sections only, and returns what the events' generator returns
+    while True:
+        try:
+            event, path, value = next(events)
+        except StopIteration as stop:
+            return stop.value
+        if path[0] in sections:
+            yield event, path, value
+
+
+
+# JSON schema of the qualitative part of a match evaluation, written by the model
+MATCH_INSIGHTS_SCHEMA = {
+    "Details": {
+        "Experience Relevance": {
+            "Suggestions": "Recommendations for highlighting relevant experience more effectively."
+        },
+        "Educational Alignment": {
+            "Suggestions": "Advice on emphasizing educational background in relation to job requirements."
+        },
+        "Cultural and Soft Skills Fit": {
+            "Suggestions": "Suggestions for demonstrating cultural fit and soft skills alignment with the job."
+        },
+        "Language and International Experience": {
+            "Suggestions": "Tips on showcasing language skills and international exposure relevant to the job."
+        },
+        "Growth Potential": {
+            "Suggestions": "Insights on projecting learning agility and growth potential in alignment with job demands."
+        }
+    },
+    "Summary": "A concise summary offering an overview of the match analysis, highlighting key points, areas of strong alignment, potential mismatches, and actionable recommendations for improvement."
+}
+check_prompt_schema(MatchInsights, MATCH_INSIGHTS_SCHEMA)
+
+# Groups of criteria (and the summary) written together in the sectioned execution mode, with their output token caps
+MATCH_INSIGHT_GROUPS = {
+    'experience': (('Experience Relevance', 'Educational Alignment'), 400),
+    'fit': (('Cultural and Soft Skills Fit', 'Language and International Experience', 'Growth Potential'), 500),
+    'summary': (('Summary',), 350),
+}
+
+def _match_insight_groups():
+    # The schema of each group: its criteria under 'Details', and the summary at the top level
+    groups = {}
+    for name, (sections, max_tokens) in MATCH_INSIGHT_GROUPS.items():
+        details = {section: MATCH_INSIGHTS_SCHEMA['Details'][section] for section in sections if section in MATCH_INSIGHTS_SCHEMA['Details']}
+        schema = {'Details': details} if details else {}
+        schema.update({section: MATCH_INSIGHTS_SCHEMA[section] for section in sections if section in MATCH_INSIGHTS_SCHEMA})
+        groups[name] = (schema, max_tokens)
+    return groups
+
+@timed('prompt.job_matching')
+def _job_matching_prompt(profile_json, jd_json, scores, schema=MATCH_INSIGHTS_SCHEMA):
+    """
+    Builds the prompt asking for the qualitative part of a match evaluation. The scores computed locally
+    by match_scoring.prescore_match are given to the model, which only writes suggestions and the summary
+    (or, in the sectioned execution mode, the part of them in `schema`).
+    """
+
+    profile_info, profile_saved_tokens = _compacted_payload(profile_json, indent=4)
+    jd_info, jd_saved_tokens = _compacted_payload(jd_json, indent=4)
+
+    # Prompt for the qualitative analysis of precomputed scores
     prompt = f"""
-    Evaluate the compatibility between a detailed LinkedIn profile and a job description, aiming to derive a comprehensive compatibility score on a scale from 0 to 100.
-    Your analysis should factor in various criteria, each with its own weight, to provide both quantitative and qualitative insights into the match.
+    Evaluate the compatibility between a detailed LinkedIn profile and a job description.
+    The compatibility scores below have already been computed; do not recompute or change them. Use them, together with the profile and the job description, to write qualitative insights into the match.
     **Compatibility Criteria:**
     1. Skill Depth and Specialization (25% weight): Assess the depth and specialization of skills, going beyond mere presence to evaluate expertise levels.
     2. Experience Progression and Relevance (25% weight): Evaluate the relevance of career progression and past achievements to the job's requirements.
@@ -270,71 +1215,131 @@ def job_matching_system(profile_json, jd_json):
     5. Language Fluency and International Exposure (10% weight): Review language skills and any experience in international or diverse environments.
     6. Growth Potential and Learning Agility (10% weight): Estimate the candidate's capacity for growth and quick learning in new areas.
 
-    **Analysis Output Schema:**
-
-    {{
-    "Overall Compatibility Score": "An aggregate score reflecting the overall match quality. Provide a numerical score (0-100)",
-    "Details": {{
-      "Skill Matching": {{
-        "Match Status": "Indicate whether there is a match, partial match, or no match.",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the skill match quality.",
-        "Matched Skills": "List skills that directly match between the profile and job description.",
-        "Unmatched Skills": "List skills required by the job that the profile does not possess."
-      }},
-      "Experience Relevance": {{
-        "Match Status": "Match, Partial Match, No Match",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the experience relevance.",
-        "Suggestions": "Recommendations for highlighting relevant experience more effectively."
-      }},
-      "Educational Alignment": {{
-        "Match Status": "Match, Partial Match, No Match",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the educational alignment.",
-        "Suggestions": "Advice on emphasizing educational background in relation to job requirements."
-      }},
-      "Cultural and Soft Skills Fit": {{
-        "Match Status": "Match, Partial Match, No Match",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the cultural and soft skills fit.",
-        "Suggestions": "Suggestions for demonstrating cultural fit and soft skills alignment with the job."
-      }},
-      "Language and International Experience": {{
-        "Match Status": "Match, Partial Match, No Match",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the match of language skills and international experience.",
-        "Suggestions": "Tips on showcasing language skills and international exposure relevant to the job."
-      }},
-      "Growth Potential": {{
-        "Match Status": "Match, Partial Match, No Match",
-        "Percentage Match": "Provide a numerical score (0-100) reflecting the assessment of growth potential.",
-        "Suggestions": "Insights on projecting learning agility and growth potential in alignment with job demands."
-      }}
-    }},
-    "Summary": "A concise summary offering an overview of the match analysis, highlighting key points, areas of strong alignment, potential mismatches, and actionable recommendations for improvement."
-    }}
+    **Computed Scores:**
+    {compact_json(scores)}
+
+    **Analysis Output Schema{_sections_note(schema, MATCH_INSIGHTS_SCHEMA)}:**
 
-    Your response should adhere to this schema, providing a clear, detailed, and insightful analysis based on the detailed LinkedIn profile and job description provided.
+    {_schema_text(schema)}
+
+    Your response should adhere to this schema, providing clear, detailed, and insightful suggestions based on the detailed LinkedIn profile and job description provided.
 
     LinkedIn Profile Summary:
-    {json.dumps(profile_json, indent=4)}
+    {profile_info}
 
     Job Description Summary:
-    {json.dumps(jd_json, indent=4)}
+    {jd_info}
 
     Aim for a professional tone, ensuring the analysis is comprehensive and structured according to the schema.
     """
+    return CompactedPrompt(prompt, profile_saved_tokens + jd_saved_tokens)
 
-        
-        
-    response = client.chat.completions.create(
-      model="gpt-4-turbo-preview",
-      response_format={ "type": "json_object" },
-      messages=[
-        {"role": "system", "content": "You are a helpful HR analytics assistant designed to output JSON."},
-        {"role": "user", "content": prompt},
-        
-      ],
-      temperature=0.3,
-      max_tokens=1024,
-      seed = 42
-    )
+def _match_result(scores, insights=None):
+    """
+    The match result returned to the API: the locally computed scores with the model's suggestions and
+    summary added (the scores always take precedence), validated against schemas.MatchResult.
+
+    :return: The result in the shape of MatchResult. Problems are logged rather than raised, as the
+             scores come from match_scoring and the insights were already validated against MatchInsights.
+    """
+    merged = json.loads(json.dumps(scores))
+    for criterion, detail in ((insights or {}).get('Details') or {}).items():
+        if criterion in merged['Details'] and isinstance(detail, dict) and detail.get('Suggestions'):
+            merged['Details'][criterion]['Suggestions'] = detail['Suggestions']
+    if (insights or {}).get('Summary'):
+        merged['Summary'] = insights['Summary']
+    result, problems = MatchResult.normalize(merged)
+    if problems:
+        logging.getLogger(__name__).warning("The match result does not fit MatchResult: %s", '; '.join(problems))
+    return result
+
+def _match_sections(profile_json, jd_json, scores):
+    # Task, schema, groups, prompt builder and cache payload of sectioned match insights
+    return ('job_matching', MATCH_INSIGHTS_SCHEMA, _match_insight_groups(),
+            lambda schema: _job_matching_prompt(profile_json, jd_json, scores, schema), {'profile': profile_json, 'job': jd_json})
+
+def _match_insights_events(profile_json, jd_json, scores, use_cache, execution):
+    # The model's suggestions and summary, from one streamed completion or from concurrent groups of criteria
+    cache_payload = {'profile': profile_json, 'job': jd_json}
+    if _execution_of(execution) == 'sectioned':
+        return _sectioned_completion(*_match_sections(profile_json, jd_json, scores), use_cache=use_cache, nested_keys=('Details',))
+    prompt = _job_matching_prompt(profile_json, jd_json, scores)
+    return _stream_json_completion('job_matching', prompt, cache_payload, use_cache=use_cache, nested_keys=('Details',))
+
+def job_matching_system(profile_json, jd_json, use_cache=True, mode='full', execution=None):
     
-    return json.loads(response.choices[0].message.content)
+    """
+    Evaluates the compatibility between a LinkedIn profile and a job description based on specified criteria and weights.
+
+    This function assesses how well a LinkedIn profile matches with a job description (JD) using criteria such as skill matching,
+    experience relevance, education alignment, soft skills and cultural fit, and language proficiency. Each criterion is assigned a weight, contributing to an overall compatibility score. 
+    The analysis includes a detailed breakdown of match status, percentage matches for each criterion, and suggestions for improving the LinkedIn profile to align more closely with the job description.
+
+    The scores are computed locally and deterministically by match_scoring.prescore_match. In 'fast' mode they are
+    returned as they are, with rule-based suggestions and no model call. In 'full' mode the model receives the scores
+    and only writes the suggestions and the summary.
+
+    Parameters:
+    - profile_json (dict): A dictionary containing LinkedIn profile data structured in JSON format.
+    - jd_json (dict): A dictionary containing job description data structured in JSON format.
+    - use_cache (bool): Set to False to bypass the analysis cache and force a fresh evaluation.
+    - mode (str): 'full' (default) or 'fast'.
+    - execution (str): 'single' or 'sectioned' (see ANALYSIS_EXECUTION, the default). Sectioned evaluations
+      write the suggestions of groups of criteria and the summary in concurrent completions.
+
+    Returns:
+    - dict: A JSON object containing the overall compatibility score, detailed analysis for each criterion, and improvement suggestions.
+    """
+    return run_steps(job_matching_system_steps(profile_json, jd_json, use_cache, mode, execution))
+
+def job_matching_system_steps(profile_json, jd_json, use_cache=True, mode='full', execution=None):
+    # Steps of job_matching_system (see io_steps)
+    # Stored analyses carry their ID, which must not change the prompt or the cache key
+    profile_json, jd_json = strip_analysis_id(profile_json), strip_analysis_id(jd_json)
+    scores = prescore_match(profile_json, jd_json)
+    if mode == 'fast':
+        return _match_result(scores)
+
+    if _execution_of(execution) == 'sectioned':
+        insights = yield from _sectioned_steps(*_match_sections(profile_json, jd_json, scores), use_cache=use_cache,
+                                               nested_keys=('Details',))
+    else:
+        prompt = _job_matching_prompt(profile_json, jd_json, scores)
+        insights = yield from _json_completion_steps('job_matching', prompt, {'profile': profile_json, 'job': jd_json},
+                                                     use_cache=use_cache)
+    return _match_result(scores, insights)
+
+def stream_job_matching_system(profile_json, jd_json, use_cache=True, mode='full', execution=None):
+    """
+    Streaming variant of job_matching_system.
+
+    The locally computed score and criteria are yielded immediately. In 'full' mode, each criterion of "Details"
+    is yielded again with the model's suggestions as soon as they are generated, followed by the summary.
+
+    Parameters:
+    - profile_json (dict): A dictionary containing LinkedIn profile data structured in JSON format.
+    - jd_json (dict): A dictionary containing job description data structured in JSON format.
+    - use_cache (bool): Set to False to bypass the analysis cache and force a fresh evaluation.
+    - mode (str): 'full' (default) or 'fast'.
+    - execution (str): 'single' or 'sectioned' (see job_matching_system).
+
+    Returns:
+    - generator: ('section', path, value) events followed by ('done', None, match_result).
+    """
+    profile_json, jd_json = strip_analysis_id(profile_json), strip_analysis_id(jd_json)
+    scores = prescore_match(profile_json, jd_json)
+    for path, value in iter_sections(scores, ('Details',)):
+        if mode == 'fast' or path != ('Summary',):
+            yield 'section', path, value
+    if mode == 'fast':
+        yield 'done', None, _match_result(scores)
+        return
 
+    events = _match_insights_events(profile_json, jd_json, scores, use_cache, execution)
+    for event, path, value in events:
+        if event == 'done':
+            yield 'done', None, _match_result(scores, value)
+        elif path[0] == 'Details' and len(path) == 2 and path[1] in scores['Details']:
+            yield 'section', path, _match_result(scores, {'Details': {path[1]: value}})['Details'][path[1]]
+        elif path == ('Summary',):
+            yield 'section', path, value
@@ -0,0 +1,198 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from disk_cache import DiskCache, make_cache_key
+from metrics import span
+from resume_sections import sectionize_resume
+
+# Limits applied to every uploaded resume
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(10 * 1024 * 1024)))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "20"))
+RESUME_MAX_CHARS_PER_PAGE = int(os.getenv("RESUME_MAX_CHARS_PER_PAGE", "20000"))
+RESUME_EXTRACTION_TIMEOUT = float(os.getenv("RESUME_EXTRACTION_TIMEOUT", "30"))
+RESUME_EXTRACTION_WORKERS = int(os.getenv("RESUME_EXTRACTION_WORKERS", "2"))
+
+# Size of the chunks used to copy an upload to disk
+_CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+# Cache of extracted resume text and sections, keyed on the SHA-256 of the PDF
+resume_text_cache = DiskCache(
+    os.getenv("RESUME_TEXT_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "resume_text.sqlite3")),
+    max_entries=int(os.getenv("RESUME_TEXT_CACHE_MAX_ENTRIES", "5000")),
+    default_ttl=float(os.getenv("RESUME_TEXT_CACHE_TTL", str(30 * 24 * 3600))),
+)
+
+
+class ResumeTooLargeError(ValueError):
+    """
+    Raised when an uploaded resume is larger than RESUME_MAX_BYTES.
+    """
+
+
+class SpooledResume:
+    """
+    An uploaded resume copied to a temporary file, with the SHA-256 of its content.
+
+    Use it as a context manager so the temporary file is removed when processing is done.
+    """
+
+    def __init__(self, path, sha256, size):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def spool_upload(file, max_bytes=RESUME_MAX_BYTES, directory=None):
+    """
+    Copies an uploaded file to a temporary file in fixed-size chunks, hashing it on the way.
+
+    Memory use stays constant regardless of the upload size, and the copy stops as soon as the
+    upload exceeds `max_bytes`.
+
+    Parameters:
+    - file: The uploaded file object (anything with a read(size) method).
+    - max_bytes (int): Maximum accepted size in bytes.
+    - directory (str): Where the temporary file is created, the system's temporary directory by default.
+
+    Returns:
+    - SpooledResume: The temporary file's path, content hash and size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    handle, path = tempfile.mkstemp(prefix="resume-", suffix=".pdf", dir=directory)
+    try:
+        with os.fdopen(handle, "wb") as spooled:
+            while True:
+                chunk = file.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ResumeTooLargeError(f"Resume exceeds the maximum size of {max_bytes / (1024 * 1024):.1f} MB")
+                digest.update(chunk)
+                spooled.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledResume(path, digest.hexdigest(), size)
+
+
+def _page_lines(page, page_number, max_chars):
+    # The text lines of a page with the font of most of their characters and their position as a fraction of the page height
+    lines, chars = [], 0
+    height = page.rect.height or 1
+    for block in page.get_text('dict')['blocks']:
+        # Image blocks (type 1) have no lines
+        for line in block.get('lines', ()):
+            spans = [span for span in line['spans'] if span['text'].strip()]
+            if not spans or chars >= max_chars:
+                continue
+            text = ''.join(span['text'] for span in line['spans'])[:max_chars - chars]
+            chars += len(text) + 1
+            main_span = max(spans, key=lambda span: len(span['text']))
+            lines.append({
+                'text': text,
+                'page': page_number,
+                'top': round(line['bbox'][1] / height, 3),
+                'bottom': round(line['bbox'][3] / height, 3),
+                'size': round(main_span['size'], 1),
+                # Bit 4 of the span flags marks bold text; some fonts only say it in their name
+                'bold': bool(main_span['flags'] & 16) or 'bold' in main_span['font'].lower(),
+            })
+    return lines
+
+
+def _extract_pdf(path, max_pages, max_chars_per_page):
+    # Runs in a worker process. PyMuPDF is imported here so the web process never parses PDFs itself.
+    import fitz
+
+    lines = []
+    with fitz.open(path) as doc:
+        for page_number in range(min(doc.page_count, max_pages)):
+            lines += _page_lines(doc[page_number], page_number, max_chars_per_page)
+    # Sectioning is CPU work as well, so it runs here rather than in the web process
+    return {'text': '\n'.join(line['text'] for line in lines), 'sections': sectionize_resume(lines)}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers do not inherit the web server's threads and open sockets
+            _pool = ProcessPoolExecutor(max_workers=RESUME_EXTRACTION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool(pool):
+    # A worker stuck on a pathological PDF cannot be cancelled, so stop the whole pool and start afresh
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for process in list(getattr(pool, '_processes', {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_resume(spooled_resume, use_cache=True):
+    """
+    Extracts the text of a spooled PDF resume in a separate process, with its sections (see resume_sections.py).
+
+    At most RESUME_MAX_PAGES pages and RESUME_MAX_CHARS_PER_PAGE characters per page are read, and
+    the extraction is abandoned after RESUME_EXTRACTION_TIMEOUT seconds. The result is cached by the
+    PDF's content hash, so re-uploading the same resume skips the extraction.
+
+    Parameters:
+    - spooled_resume (SpooledResume): The resume returned by spool_upload.
+    - use_cache (bool): Set to False to extract the resume again.
+
+    Returns:
+    - dict: {'text': the text of the resume, 'sections': the result of sectionize_resume}.
+    """
+    key = make_cache_key('resume_sections', spooled_resume.sha256, RESUME_MAX_PAGES, RESUME_MAX_CHARS_PER_PAGE)
+    if use_cache:
+        cached_resume = resume_text_cache.get(key)
+        if cached_resume is not None:
+            return cached_resume
+
+    pool = _get_pool()
+    future = pool.submit(_extract_pdf, spooled_resume.path, RESUME_MAX_PAGES, RESUME_MAX_CHARS_PER_PAGE)
+    try:
+        with span('pdf.extract'):
+            resume = future.result(timeout=RESUME_EXTRACTION_TIMEOUT)
+    except FutureTimeoutError:
+        logger.warning("Resume text extraction timed out after %s seconds", RESUME_EXTRACTION_TIMEOUT)
+        _reset_pool(pool)
+        raise TimeoutError(f"Resume text extraction did not complete within {RESUME_EXTRACTION_TIMEOUT} seconds")
+
+    resume_text_cache.set(key, resume)
+    return resume
+
+
+def extract_resume_text(spooled_resume, use_cache=True):
+    """
+    Extracts the text of a spooled PDF resume in a separate process (see extract_resume).
+
+    Returns:
+    - str: The extracted text.
+    """
+    return extract_resume(spooled_resume, use_cache)['text']
@@ -0,0 +1,271 @@
+"""
+Local sectioning of resumes, so the structuring prompt gets a compact outline instead of the raw PDF text.
+
+The text of a resume PDF repeats its page furniture on every page (headers, footers, page numbers, the
+contact line) and loses the layout that shows where each section starts. sectionize_resume() works on the
+lines of the PDF with their font and position (see resume_extraction.py): it drops the furniture, finds
+the section headings by their wording and their font, and pulls out what needs no model: the name, the
+contact details, the dates (as YYYY-MM) and the skill and language lists. format_sectioned_resume() renders
+the result as the text sent to the model.
+"""
+import re
+import threading
+from collections import Counter
+
+# Canonical section titles and the headings resumes use for them (lowercase, '&' read as 'and')
+SECTION_HEADINGS = {
+    'Summary': ('summary', 'profile', 'professional summary', 'profile summary', 'about', 'about me', 'objective',
+                'career objective', 'personal statement'),
+    'Experience': ('experience', 'work experience', 'professional experience', 'employment', 'employment history',
+                   'work history', 'career history', 'relevant experience'),
+    'Education': ('education', 'academic background', 'education and training', 'academic qualifications',
+                  'qualifications'),
+    'Skills': ('skills', 'technical skills', 'core skills', 'key skills', 'skills and tools', 'competencies',
+               'core competencies', 'technologies', 'tools', 'tech stack'),
+    'Languages': ('languages', 'language skills', 'language'),
+    'Projects': ('projects', 'personal projects', 'selected projects', 'side projects'),
+    'Certifications': ('certifications', 'certificates', 'licenses and certifications', 'courses', 'training'),
+    'Awards': ('awards', 'honors', 'honours', 'achievements', 'awards and honors'),
+    'Publications': ('publications', 'talks', 'publications and talks'),
+    'Volunteering': ('volunteering', 'volunteer experience', 'volunteer work'),
+    'Interests': ('interests', 'hobbies', 'hobbies and interests'),
+}
+_HEADING_TITLES = {heading: title for title, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Sections whose content is a list of short items, rendered on a single line
+LIST_SECTIONS = {'Skills', 'Languages', 'Interests'}
+
+# Lines within this fraction of the page height from its top or bottom edge are where headers and footers sit
+PAGE_MARGIN = 0.1
+
+# A line in a font this much larger than the body text may be a heading not listed above
+HEADING_SIZE_RATIO = 1.2
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_PHONE = re.compile(r'(?<![\w/])\+?\d[\d ().-]{7,}\d(?![\w/])')
+_LINK = re.compile(r'(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com|gitlab\.com)/[^\s|,;]+|https?://[^\s|,;]+', re.IGNORECASE)
+_PAGE_NUMBER = re.compile(r'^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$', re.IGNORECASE)
+# Labels and separators left on a contact line once its details are taken out
+_CONTACT_LEFTOVERS = re.compile(r'\b(?:e-?mail|phone|tel|mobile|cell|linkedin|github|gitlab|website|web|portfolio)\b|[\s|•·,;:/()-]+',
+                                re.IGNORECASE)
+_BULLET = re.compile(r'^[•●▪■◦○‣➢➤►\-–*·]+\s*')
+_LIST_SEPARATORS = re.compile(r'\s*[,;|•●▪·]\s*|\s+-\s+')
+# "Label: a, b, c" lines of a list section, whose label is not an item
+_LIST_LABEL = re.compile(r'^[^:]{1,30}:\s*(?=.*[,;|•●▪·])')
+
+_MONTH_NUMBERS = {month: number for number, month in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
+_MONTH_YEAR = re.compile(r'\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|'
+                         r'oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?\s+((?:19|20)\d\d)\b', re.IGNORECASE)
+_NUMERIC_MONTH_YEAR = re.compile(r'\b(0?[1-9]|1[0-2])[/.]((?:19|20)\d\d)\b')
+# Years and numeric months, which make periods like "2018.01 - 2021.12" or "03.2018 - 12.2021" look like phone numbers
+_DATE_PART = re.compile(r'\b(?:(?:19|20)\d\d[./-](?:0?[1-9]|1[0-2])|(?:0?[1-9]|1[0-2])[./-](?:19|20)\d\d|(?:19|20)\d\d)\b')
+# The end of a period that is still going on, e.g. "2021-03 - current"
+_PRESENT = re.compile(r'(\s*(?:[-–—]|\bto\b)\s*)(?:present|current|now|today|ongoing)\b', re.IGNORECASE)
+
+# Resumes sectioned, and the lines and tokens of their text before and after
+sectionizer_stats = {'resumes': 0, 'sectioned': 0, 'furnitureLines': 0, 'rawTokens': 0, 'promptTokens': 0}
+_stats_lock = threading.Lock()
+
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _heading_title(text):
+    # The canonical title of a known section heading, e.g. "WORK EXPERIENCE:" or "Experience (cont'd)" -> "Experience"
+    key = re.sub(r"\((?:continued|cont'?d)\)|[^a-z ]+", '', text.lower().replace('&', ' and '))
+    return _HEADING_TITLES.get(_clean(key))
+
+
+def normalize_dates(text):
+    """
+    Writes the month-year dates of a line as YYYY-MM ("March 2021", "Mar. 2021", "03/2021" -> "2021-03"),
+    and the end of an ongoing period as "Present" ("since 2021-03 - current" -> "since 2021-03 - Present").
+    """
+    text = _MONTH_YEAR.sub(lambda match: f"{match.group(2)}-{_MONTH_NUMBERS[match.group(1)[:3].lower()]:02d}", text)
+    text = _NUMERIC_MONTH_YEAR.sub(lambda match: f"{match.group(2)}-{int(match.group(1)):02d}", text)
+    return _PRESENT.sub(r'\1Present', text)
+
+
+def _body_size(lines):
+    # The font size of most of the text
+    sizes = Counter()
+    for line in lines:
+        sizes[line.get('size', 0)] += len(line['text'])
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+
+def _margin_key(line):
+    # Header and footer lines compare equal across pages whatever their numbers (e.g. "Page 2 of 3"), or None for other lines
+    if line.get('top', 0.5) < PAGE_MARGIN or line.get('bottom', 0.5) > 1 - PAGE_MARGIN:
+        return re.sub(r'\d+', '#', line['text'].lower())
+    return None
+
+
+def _furniture(lines):
+    # Page numbers, and the lines found in the margins of several pages
+    pages = {}
+    for line in lines:
+        key = _margin_key(line)
+        if key is not None:
+            pages.setdefault(key, set()).add(line.get('page', 0))
+    return [_PAGE_NUMBER.match(line['text']) is not None or len(pages.get(_margin_key(line), ())) > 1 for line in lines]
+
+
+def _name_line(lines):
+    # The most prominent of the first lines of the resume, if it reads like a name
+    first_lines = []
+    for line in lines:
+        if line.get('page', 0) != lines[0].get('page', 0) or len(first_lines) == 5 or _heading_title(line['text'].rstrip(':')):
+            break
+        if not _PAGE_NUMBER.match(line['text']) and not _contact_details(line['text'])[3]:
+            first_lines.append(line)
+    if not first_lines:
+        return None
+    line = max(first_lines, key=lambda line: line.get('size', 0))
+    if 2 <= len(line['text'].split()) <= 5 and not re.search(r'[\d@|,:]', line['text']):
+        return line
+    return None
+
+
+def _is_phone(candidate):
+    # A run of digits and separators long enough for a phone number, and not just dates
+    return sum(char.isdigit() for char in candidate) >= 9 and re.search(r'\d', _DATE_PART.sub('', candidate)) is not None
+
+
+def _contact_details(text):
+    # The emails, phone numbers and links of a line, and whether the line holds nothing else. Only these
+    # are taken out of the line, so a line with some other number (e.g. a period) is never contact-only
+    emails = _EMAIL.findall(text)
+    rest = _EMAIL.sub(' ', text)
+    links = [link.rstrip('.') for link in _LINK.findall(rest)]
+    rest = _LINK.sub(' ', rest)
+    phones = [_clean(phone) for phone in _PHONE.findall(rest) if _is_phone(phone)]
+    for phone in phones:
+        rest = rest.replace(phone, ' ')
+    found = emails or links or phones
+    return emails, phones, links, bool(found) and not _CONTACT_LEFTOVERS.sub('', rest)
+
+
+def _is_heading(line, body_size):
+    # Short lines that are a known heading, or that stand out like one in a larger font. Bold capitals alone
+    # are not enough for an unknown heading: resumes set employer and school names that way too
+    text = line['text'].rstrip(':')
+    if len(text) > 40 or len(text.split()) > 5 or re.search(r'\d|[.,;]$', text):
+        return False
+    if _heading_title(text):
+        return True
+    return bool(body_size) and line.get('size', 0) >= body_size * HEADING_SIZE_RATIO
+
+
+def _list_items(lines):
+    # The items of a list section, one per separator or line, without "Label:" prefixes or duplicates
+    items, seen = [], set()
+    for line in lines:
+        for item in _LIST_SEPARATORS.split(_LIST_LABEL.sub('', _BULLET.sub('', line))):
+            item = item.strip(' .')
+            if item and item.lower() not in seen:
+                seen.add(item.lower())
+                items.append(item)
+    return items
+
+
+def sectionize_resume(lines):
+    """
+    Splits the lines of a resume into sections and pulls out its fields.
+
+    Parameters:
+    - lines (list): The lines of the resume in reading order, as dictionaries with 'text', 'page', 'top' and
+      'bottom' (positions as fractions of the page height), 'size' (font size) and 'bold'.
+
+    Returns:
+    - dict: {'fields': {'name', 'emails', 'phones', 'links'}, 'preamble': [lines before the first section],
+      'sections': [{'title', 'lines', 'items'}], 'furnitureLines': lines dropped as page furniture}.
+      'items' is the list of a list section (see LIST_SECTIONS), None for the others.
+    """
+    lines = [dict(line, text=_clean(line['text'])) for line in lines]
+    lines = [line for line in lines if line['text']]
+    body_size = _body_size(lines)
+    fields = {'name': None, 'emails': [], 'phones': [], 'links': []}
+
+    # The name is found first, as a header repeating it on every page is furniture
+    name_line = _name_line(lines) if lines else None
+    if name_line is not None:
+        fields['name'] = name_line['text']
+
+    kept, furniture = [], 0
+    for line, is_furniture in zip(lines, _furniture(lines)):
+        if line is name_line:
+            continue
+        if is_furniture:
+            furniture += 1
+            continue
+        emails, phones, links, contact_only = _contact_details(line['text'])
+        for name, values in (('emails', emails), ('phones', phones), ('links', links)):
+            fields[name] += [value for value in values if value not in fields[name]]
+        if not contact_only:
+            kept.append(line)
+
+    preamble, sections, current = [], [], None
+    for line in kept:
+        if _is_heading(line, body_size):
+            current = {'title': _heading_title(line['text'].rstrip(':')) or line['text'].rstrip(':').title(), 'lines': []}
+            sections.append(current)
+            continue
+        text = normalize_dates(line['text'])
+        target = current['lines'] if current is not None else preamble
+        # A line starting in lowercase continues the wrapped line before it. Only a line repeating the one
+        # before it is dropped: two positions may well share a bullet point
+        if target and text[:1].islower() and not _BULLET.match(text):
+            target[-1] = f'{target[-1]} {text}'
+        elif not target or text != target[-1]:
+            target.append(text)
+
+    # Headings repeated on a later page continue the same section
+    merged = {}
+    for section in sections:
+        if section['title'] in merged:
+            previous = merged[section['title']]['lines']
+            previous += section['lines'][1:] if previous and section['lines'][:1] == previous[-1:] else section['lines']
+        else:
+            merged[section['title']] = section
+    sections = [section for section in merged.values() if section['lines']]
+    for section in sections:
+        section['lines'] = [_BULLET.sub('', line) for line in section['lines']]
+        section['items'] = _list_items(section['lines']) if section['title'] in LIST_SECTIONS else None
+    return {'fields': fields, 'preamble': preamble, 'sections': sections, 'furnitureLines': furniture}
+
+
+def format_sectioned_resume(sectioned):
+    """
+    Renders a sectioned resume as the compact text given to the structuring prompt: the fields found
+    locally, the lines before the first section, then each section under a "## Title" line.
+    """
+    fields = sectioned['fields']
+    parts = []
+    if fields['name']:
+        parts.append(f"Name: {fields['name']}")
+    for label, name in (('Email', 'emails'), ('Phone', 'phones'), ('Links', 'links')):
+        if fields[name]:
+            parts.append(f"{label}: {', '.join(fields[name])}")
+    parts += sectioned['preamble']
+    for section in sectioned['sections']:
+        parts.append(f"## {section['title']}")
+        if section['items'] is not None:
+            parts.append(', '.join(section['items']))
+        else:
+            parts += section['lines']
+    return '\n'.join(parts)
+
+
+def record_sectioning(sectioned, raw_tokens, prompt_tokens):
+    """
+    Counts a resume sectioned before its structuring prompt, with the tokens of its raw text and of the prompt's version.
+    """
+    with _stats_lock:
+        sectionizer_stats['resumes'] += 1
+        sectionizer_stats['sectioned'] += int(bool(sectioned['sections']))
+        sectionizer_stats['furnitureLines'] += sectioned['furnitureLines']
+        sectionizer_stats['rawTokens'] += raw_tokens
+        sectionizer_stats['promptTokens'] += prompt_tokens
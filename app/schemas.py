@@ -0,0 +1,548 @@
+"""
+Typed records of the data passed between the extractors, the analyses and the routes.
+
+Each record class lists its fields with the JSON key and kind of each one. Instances are slotted, so a
+record takes a fraction of the memory of the equivalent dictionary, and a misspelled field fails when
+the record is built instead of producing a key nobody reads.
+
+The API, the caches and the stores still exchange plain dictionaries: records are built from them
+with from_dict() (or normalize(), which returns a dictionary again) and turned back with to_dict()
+and to_json(). Building a record from model output validates it: every value is coerced to the kind
+of its field when that is possible (a number where text is expected, a single string where a list is
+expected, a missing section), and what cannot be coerced is reported as a problem and replaced by the
+field's empty value. A value coerced from a different structure (an object or a list flattened into
+text, a single value wrapped into a list) is kept, but reported as a problem too.
+"""
+import re
+import json
+
+
+class SchemaError(ValueError):
+    """
+    Raised when data does not fit a record and cannot be coerced to it.
+
+    Attributes:
+    - problems (list): One "path: description" string per invalid value.
+    """
+
+    def __init__(self, record_type, problems):
+        super().__init__(f"Invalid {record_type.__name__}: {'; '.join(problems)}")
+        self.problems = problems
+
+
+def _path(path, key):
+    return f'{path}.{key}' if path else key
+
+
+def _text_of(value):
+    # Flattens a JSON value into text: objects and lists become their non-empty leaves separated by commas
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, list):
+        return ', '.join(text for text in map(_text_of, value) if text)
+    return str(value)
+
+
+def _sorted_json(value):
+    # A JSON value with the keys of its objects sorted, so the record serializes the same way whatever order they came in
+    if isinstance(value, dict):
+        return {key: _sorted_json(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [_sorted_json(item) for item in value]
+    return value
+
+
+class Text:
+    """A string. Numbers, objects and lists are turned into text (objects and lists with a problem); a missing value is empty."""
+
+    def coerce(self, value, path, problems, partial=False):
+        if isinstance(value, (dict, list)):
+            problems.append(f'{path}: expected text, got {type(value).__name__}')
+        return _text_of(value)
+
+    def default(self):
+        return ''
+
+    def dump(self, value):
+        return value
+
+
+class TextList:
+    """A list of strings. A single value becomes a one-item list (with a problem), and every item is turned into text."""
+
+    def coerce(self, value, path, problems, partial=False):
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            problems.append(f'{path}: expected a list, got {type(value).__name__}')
+            value = [value]
+        texts = (TEXT.coerce(item, f'{path}[{index}]', problems) for index, item in enumerate(value))
+        return [text for text in texts if text]
+
+    def default(self):
+        return []
+
+    def dump(self, value):
+        return value
+
+
+class Number:
+    """An integer or a float. Numeric text such as "85" or "85%" is read as its number."""
+
+    _NUMBER = re.compile(r'-?\d+(\.\d+)?')
+
+    def coerce(self, value, path, problems, partial=False):
+        if isinstance(value, bool) or value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return value
+        found = self._NUMBER.search(value) if isinstance(value, str) else None
+        if found is None:
+            problems.append(f'{path}: expected a number, got {type(value).__name__}')
+            return None
+        return float(found.group()) if found.group(1) else int(found.group())
+
+    def default(self):
+        return None
+
+    def dump(self, value):
+        return value
+
+
+class Json:
+    """Any JSON value, kept as it is (with sorted object keys), for data whose shape varies between sources."""
+
+    def coerce(self, value, path, problems, partial=False):
+        return _sorted_json(value)
+
+    def default(self):
+        return None
+
+    def dump(self, value):
+        return value
+
+
+class ListOf:
+    """A list of records of one type."""
+
+    def __init__(self, record_type):
+        self.record_type = record_type
+
+    def coerce(self, value, path, problems, partial=False):
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            problems.append(f'{path}: expected a list, got {type(value).__name__}')
+            return []
+        return [self.record_type.coerce(item, f'{path}[{index}]', problems, partial) for index, item in enumerate(value)]
+
+    def default(self):
+        return []
+
+    def dump(self, value):
+        return [item.to_dict() for item in value]
+
+
+TEXT = Text()
+TEXT_LIST = TextList()
+NUMBER = Number()
+JSON = Json()
+
+
+class Field:
+    """
+    A field of a record: its JSON key, its kind (TEXT, TEXT_LIST, NUMBER, JSON, ListOf(...) or a record
+    class) and the name of its attribute, which defaults to the key made into an identifier.
+    An optional field is left out of the JSON while it is None.
+    """
+
+    __slots__ = ('key', 'kind', 'attribute', 'optional')
+
+    def __init__(self, key, kind=TEXT, attribute=None, optional=False):
+        self.key = key
+        self.kind = kind
+        self.attribute = attribute or (key if key.isidentifier() else re.sub(r'\W+', '_', key.strip()).lower())
+        self.optional = optional
+
+
+class RecordType(type):
+    """
+    Metaclass of the records: gives each class the slots of its FIELDS (after those of its base classes).
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        own_fields = tuple(namespace.get('FIELDS', ()))
+        namespace['__slots__'] = tuple(field.attribute for field in own_fields)
+        record_type = super().__new__(mcs, name, bases, namespace)
+        inherited = tuple(field for base in bases for field in getattr(base, 'fields', ()))
+        record_type.fields = inherited + own_fields
+        record_type.keys = tuple(field.key for field in record_type.fields)
+        record_type._by_attribute = {field.attribute: field for field in record_type.fields}
+        return record_type
+
+    # A record class is also the kind of the fields holding one
+    def coerce(cls, value, path, problems, partial=False):
+        if isinstance(value, cls):
+            return value
+        if value is None or value == {}:
+            return None
+        if not isinstance(value, dict):
+            problems.append(f'{path}: expected an object, got {type(value).__name__}')
+            return None
+        return cls._parse(value, path, problems, partial)
+
+    def default(cls):
+        return None
+
+    def dump(cls, value):
+        # An absent record is written as an empty object, like the sections the model leaves empty
+        return value.to_dict() if value is not None else {}
+
+
+class Record(metaclass=RecordType):
+    """
+    Base class of the records. Subclasses define FIELDS, a tuple of Field.
+
+    Records are built with their attribute names as keyword arguments (values are coerced to their
+    field's kind, raising SchemaError if one cannot be), or from a JSON dictionary with from_dict().
+    """
+
+    FIELDS = ()
+
+    def __init__(self, **values):
+        problems = []
+        for field in self.fields:
+            value = values.pop(field.attribute, None)
+            # Fields missing from nested dictionaries take their empty value (partial=None), as when building a record in code
+            if value is None:
+                setattr(self, field.attribute, None if field.optional else field.kind.default())
+            else:
+                setattr(self, field.attribute, field.kind.coerce(value, field.key, problems, None))
+        if values:
+            raise TypeError(f"{type(self).__name__} has no field {', '.join(sorted(values))}")
+        if problems:
+            raise SchemaError(type(self), problems)
+
+    @classmethod
+    def _parse(cls, data, path, problems, partial):
+        record = cls.__new__(cls)
+        for field in cls.fields:
+            if field.key in data:
+                setattr(record, field.attribute, field.kind.coerce(data[field.key], _path(path, field.key), problems, partial))
+            elif not partial:
+                if partial is False and not field.optional:
+                    problems.append(f'{_path(path, field.key)}: missing')
+                setattr(record, field.attribute, None if field.optional else field.kind.default())
+        return record
+
+    @classmethod
+    def from_dict(cls, data, strict=False, partial=False):
+        """
+        Builds a record from a JSON dictionary. Keys that are not fields are ignored.
+
+        Parameters:
+        - data (dict): The dictionary, e.g. parsed model output.
+        - strict (bool): Raise SchemaError instead of replacing invalid or missing values by empty ones.
+        - partial (bool): Leave the missing fields unset (e.g. for the sections of a sectioned analysis).
+
+        Returns:
+        - Record: The record.
+        """
+        record, problems = cls.parse(data, partial)
+        if strict and problems:
+            raise SchemaError(cls, problems)
+        return record
+
+    @classmethod
+    def parse(cls, data, partial=False):
+        """
+        Like from_dict, but returns the problems found instead of raising them.
+
+        Returns:
+        - tuple: (record, problems), problems being a list of "path: description" strings.
+        """
+        if not isinstance(data, dict):
+            raise SchemaError(cls, [f'expected an object, got {type(data).__name__}'])
+        problems = []
+        return cls._parse(data, '', problems, partial), problems
+
+    @classmethod
+    def normalize(cls, data, partial=False):
+        """
+        Validates a JSON dictionary and returns it in the shape of the record, with its problems.
+
+        Returns:
+        - tuple: (dict, problems).
+        """
+        record, problems = cls.parse(data, partial)
+        return record.to_dict(), problems
+
+    def to_dict(self):
+        """
+        Returns the record as a JSON dictionary, with its keys in the order of the fields.
+        """
+        result = {}
+        for field in self.fields:
+            try:
+                value = getattr(self, field.attribute)
+            except AttributeError:
+                # Left unset by a partial parse
+                continue
+            if value is None and field.optional:
+                continue
+            result[field.key] = field.kind.dump(value)
+        return result
+
+    def to_json(self):
+        """
+        Serializes the record into compact JSON, the same text for equal records: fields in their order,
+        the objects of JSON fields with sorted keys, no insignificant whitespace.
+        """
+        return json.dumps(self.to_dict(), separators=(',', ':'), ensure_ascii=False, allow_nan=False)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_dict()!r})'
+
+
+# Extracted LinkedIn data (see linkedin_extractor.py)
+
+class Experience(Record):
+    FIELDS = (
+        Field('companyName'),
+        Field('title'),
+        # LinkedIn dates are {"month": ..., "year": ...} objects; 'Present' while the position is current
+        Field('startDate', JSON),
+        Field('endDate', JSON),
+        Field('locationName'),
+        Field('geoLocationName'),
+        Field('industries', JSON),
+    )
+
+
+class Education(Record):
+    FIELDS = (
+        Field('schoolName'),
+        Field('timePeriod', JSON),
+        Field('degreeName'),
+        Field('fieldOfStudy'),
+    )
+
+
+class Project(Record):
+    FIELDS = (
+        Field('title'),
+        Field('timePeriod', JSON),
+        Field('description'),
+    )
+
+
+class ExtractedProfile(Record):
+    FIELDS = (
+        Field('fullName'),
+        Field('headline'),
+        Field('summary'),
+        Field('industryName'),
+        Field('locationName'),
+        Field('geoCountryName'),
+        Field('geoLocationName'),
+        Field('education', ListOf(Education)),
+        # A list of languages, or a note that the profile lists none
+        Field('languages', JSON),
+        Field('projects', ListOf(Project)),
+        Field('skills', JSON),
+        Field('lastProfessionalExperience', Experience),
+    )
+
+
+class CompanyInfo(Record):
+    FIELDS = (
+        Field('name'),
+        Field('description'),
+        # Counts, or 'N/A' when LinkedIn does not give them
+        Field('staffCount', JSON),
+        Field('industry'),
+        Field('specialties', JSON),
+        Field('followerCount', JSON),
+    )
+
+
+class JobDescription(Record):
+    FIELDS = (
+        Field('title'),
+        Field('companyName'),
+        Field('companyURL'),
+        Field('descriptionText'),
+    )
+
+
+class JobPosting(JobDescription):
+    FIELDS = (
+        Field('companyInfo', CompanyInfo),
+        # The parts that could not be extracted (e.g. ['companyInfo'] when the company fetch failed)
+        Field('degraded', TEXT_LIST, optional=True),
+    )
+
+
+# Analysis results (see the schemas of prompt_engineering.py)
+
+class Degree(Record):
+    FIELDS = (
+        Field('level'),
+        Field('fieldOfStudy'),
+        Field('institution'),
+        Field('graduationDate'),
+    )
+
+
+class LastExperience(Record):
+    FIELDS = (
+        Field('companyName'),
+        Field('title'),
+        Field('startDate'),
+        Field('endDate'),
+        Field('locationName'),
+        Field('geoLocationName'),
+        Field('industries', TEXT_LIST),
+    )
+
+
+class ProfileAnalysis(Record):
+    FIELDS = (
+        Field('fullName'),
+        Field('location'),
+        Field('overview'),
+        Field('highestDegree', Degree),
+        Field('lastProfessionalExperience', LastExperience),
+        Field('languages', TEXT_LIST),
+        Field('hardSkills', TEXT_LIST),
+        Field('softSkills', TEXT_LIST),
+        Field('strengths', TEXT_LIST),
+        Field('weaknesses', TEXT_LIST),
+        Field('improvementSuggestions', TEXT_LIST),
+        Field('careerSuggestions', TEXT_LIST),
+    )
+
+
+class CompanyOverview(Record):
+    FIELDS = (
+        Field('name'),
+        Field('linkedinUrl'),
+        Field('overview'),
+        Field('specialties', TEXT_LIST),
+    )
+
+
+class AcademicRequirements(Record):
+    FIELDS = (
+        Field('degreeLevel'),
+    )
+
+
+class SkillsRequired(Record):
+    FIELDS = (
+        Field('hardSkills', TEXT_LIST),
+        Field('softSkills', TEXT_LIST),
+    )
+
+
+class JobAnalysis(Record):
+    FIELDS = (
+        Field('jobTitle'),
+        Field('location'),
+        Field('overview'),
+        Field('companyInfo', CompanyOverview),
+        Field('experienceLevel'),
+        Field('academicRequirements', AcademicRequirements),
+        Field('skillsRequired', SkillsRequired),
+        Field('languageRequirements', TEXT_LIST),
+        Field('keyResponsibilities', TEXT_LIST),
+    )
+
+
+class CriterionInsight(Record):
+    FIELDS = (
+        # A paragraph or a list of tips, as the model writes them
+        Field('Suggestions', JSON),
+    )
+
+
+class InsightDetails(Record):
+    FIELDS = (
+        Field('Experience Relevance', CriterionInsight),
+        Field('Educational Alignment', CriterionInsight),
+        Field('Cultural and Soft Skills Fit', CriterionInsight),
+        Field('Language and International Experience', CriterionInsight),
+        Field('Growth Potential', CriterionInsight),
+    )
+
+
+class MatchInsights(Record):
+    FIELDS = (
+        Field('Details', InsightDetails),
+        Field('Summary'),
+    )
+
+
+class CriterionScore(Record):
+    FIELDS = (
+        Field('Match Status'),
+        Field('Percentage Match', NUMBER),
+        Field('Matched Skills', TEXT_LIST, optional=True),
+        Field('Unmatched Skills', TEXT_LIST, optional=True),
+        Field('Suggestions', JSON, optional=True),
+    )
+
+
+class ScoreDetails(Record):
+    FIELDS = (
+        Field('Skill Matching', CriterionScore),
+        Field('Experience Relevance', CriterionScore),
+        Field('Educational Alignment', CriterionScore),
+        Field('Cultural and Soft Skills Fit', CriterionScore),
+        Field('Language and International Experience', CriterionScore),
+        Field('Growth Potential', CriterionScore),
+    )
+
+
+class MatchResult(Record):
+    FIELDS = (
+        Field('Overall Compatibility Score', NUMBER),
+        Field('Details', ScoreDetails),
+        Field('Summary'),
+    )
+
+
+def check_prompt_schema(record_type, schema, path=''):
+    """
+    Checks that a prompt's JSON schema (section -> description) asks for exactly the fields of a record,
+    with matching shapes, so the prompt and the code reading its output cannot drift apart.
+
+    Raises SchemaError listing the differences.
+    """
+    problems = []
+    fields = {field.key: field for field in record_type.fields}
+    for key in schema.keys() - fields.keys():
+        problems.append(f'{_path(path, key)}: in the prompt schema but not a field of {record_type.__name__}')
+    for key in fields.keys() - schema.keys():
+        problems.append(f'{_path(path, key)}: a field of {record_type.__name__} missing from the prompt schema')
+    for key in fields.keys() & schema.keys():
+        kind, expected = fields[key].kind, schema[key]
+        if isinstance(kind, RecordType):
+            if not isinstance(expected, dict):
+                problems.append(f'{_path(path, key)}: the prompt schema does not describe an object')
+            else:
+                try:
+                    check_prompt_schema(kind, expected, _path(path, key))
+                except SchemaError as e:
+                    problems += e.problems
+        elif isinstance(expected, list) != (kind is TEXT_LIST):
+            problems.append(f'{_path(path, key)}: the prompt schema and {record_type.__name__} disagree on whether it is a list')
+    if problems:
+        raise SchemaError(record_type, problems)
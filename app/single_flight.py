@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from collections import Counter
+
+
+class FlightAbandonedError(RuntimeError):
+    """
+    Raised to the callers waiting on a computation whose leader stopped before producing a result
+    (e.g. a streaming client that disconnected).
+    """
+
+
+class Flight:
+    """
+    One in-flight computation. Its leader computes the result; every other caller waits for it.
+    """
+
+    def __init__(self, op, key):
+        self.op = op
+        self.key = key
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        # Wake-ups of the callers waiting on an event loop, called once the result is published
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the leader has finished, then returns its result or raises its exception.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for the in-flight {self.op} computation")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    async def wait_async(self):
+        """
+        Async counterpart of wait(): suspends the calling task, not its thread, until the leader has finished.
+        """
+        loop = asyncio.get_running_loop()
+        finished = loop.create_future()
+        with self._callbacks_lock:
+            if not self._done.is_set():
+                self._callbacks.append(lambda: loop.call_soon_threadsafe(
+                    lambda: finished.done() or finished.set_result(None)))
+                pending = True
+            else:
+                pending = False
+        if pending:
+            await finished
+        return self.wait()
+
+    def _publish(self, result, error):
+        self._result = result
+        self._error = error
+        with self._callbacks_lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except RuntimeError:
+                # The event loop of that caller was closed in the meantime
+                pass
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent computations within a process.
+
+    The first caller for an (operation, key) pair becomes the leader of a flight and computes the
+    result; callers arriving while it is in flight wait for that result instead of repeating the
+    upstream calls. Once the leader finishes, the flight is closed and the next caller starts a new
+    one, so results are shared only between requests that actually overlap.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._leaders = Counter()
+        self._coalesced = Counter()
+
+    def begin(self, op, key):
+        """
+        Joins the flight of (op, key), starting it if none is in progress.
+
+        Returns:
+        - tuple: (flight, leader). The leader must call finish(); the others call flight.wait().
+        """
+        with self._lock:
+            flight = self._flights.get((op, key))
+            if flight is not None:
+                self._coalesced[op] += 1
+                return flight, False
+            flight = self._flights[(op, key)] = Flight(op, key)
+            self._leaders[op] += 1
+            return flight, True
+
+    def finish(self, flight, result=None, error=None):
+        """
+        Publishes the leader's result (or exception) to the waiting callers and closes the flight.
+        """
+        if error is not None and not isinstance(error, Exception):
+            # GeneratorExit, KeyboardInterrupt...: the leader went away rather than failed
+            error = FlightAbandonedError(f"The {flight.op} computation this request was waiting on was cancelled")
+        with self._lock:
+            if self._flights.get((flight.op, flight.key)) is flight:
+                del self._flights[(flight.op, flight.key)]
+        flight._publish(result, error)
+
+    def do(self, op, key, fn):
+        """
+        Returns fn(), sharing a single execution between concurrent callers with the same (op, key).
+        """
+        flight, leader = self.begin(op, key)
+        if not leader:
+            return flight.wait()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(flight, error=e)
+            raise
+        self.finish(flight, result=result)
+        return result
+
+    def stats(self):
+        """
+        Returns, for each operation, the number of computations run and the number of calls saved by joining one in flight.
+        """
+        with self._lock:
+            return {
+                op: {'computed': self._leaders[op], 'saved': self._coalesced[op], 'inFlight': sum(1 for flight_op, _ in self._flights if flight_op == op)}
+                for op in set(self._leaders) | set(self._coalesced)
+            }
+
+
+# Coalescer shared by every request thread of the process
+single_flight = SingleFlight()
@@ -53,6 +53,130 @@ function updateLoadingProgress(indicator, text, percentage) {
 }
 
 
+// Sends a request to a streaming endpoint and reads the Server-Sent Events it returns.
+// onSection is called with the accumulated result every time a new section arrives; the promise resolves with the complete result.
+async function streamAnalysis(url, options, onSection) {
+    const response = await fetch(url, options);
+    if (!response.ok || !response.body) {
+        throw new Error(`Request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    const partialResult = {};
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line; keep any incomplete event in the buffer
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const rawEvent of events) {
+            let eventName = 'message';
+            let eventData = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) {
+                    eventName = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    eventData += line.slice(5).trim();
+                }
+            });
+            const payload = eventData ? JSON.parse(eventData) : null;
+
+            if (eventName === 'section') {
+                setSection(partialResult, payload.path, payload.value);
+                onSection(partialResult);
+            } else if (eventName === 'done') {
+                return payload;
+            } else if (eventName === 'error') {
+                throw new Error(payload && payload.error ? payload.error : 'Analysis failed');
+            }
+        }
+    }
+    throw new Error('The analysis stream ended unexpectedly');
+}
+
+// Stores a streamed section in the partial result, creating intermediate objects for nested paths such as ["Details", "Skill Matching"].
+function setSection(target, path, value) {
+    let node = target;
+    path.slice(0, -1).forEach(key => {
+        node[key] = node[key] || {};
+        node = node[key];
+    });
+    node[path[path.length - 1]] = value;
+}
+
+// Formats a list as "- item" lines, falling back to the given text when the value is not a list.
+function bulletList(items, fallback = 'Not available') {
+    return Array.isArray(items) ? items.map(item => `- ${item}`).join('<br>') : (items || fallback);
+}
+
+// Builds the profile report. Missing sections are shown as placeholders, so the report can be rendered while the analysis is still streaming.
+function renderProfileReport(data) {
+    // Define institution name based on whether it's an object with original or translated fields, or just a string
+    let institutionName = '';
+    if (data.highestDegree && typeof data.highestDegree.institution === 'object' && data.highestDegree.institution) {
+        institutionName = data.highestDegree.institution.original || data.highestDegree.institution.translated;
+    } else if (data.highestDegree && typeof data.highestDegree.institution === 'string') {
+        institutionName = data.highestDegree.institution;
+    }
+    const experience = data.lastProfessionalExperience || {};
+
+    return `
+        <h3 class="result-title">Profile Report</h3>
+        <p><strong>Full Name:</strong> ${data.fullName || 'N/A'}</p>
+        <p><strong>Location:</strong> ${data.location || 'N/A'}</p>
+        <p><strong>Highest Degree:</strong> ${data.highestDegree ? `${data.highestDegree.level} - ${data.highestDegree.fieldOfStudy} - ${institutionName}` : 'N/A'}</p>
+        <div><strong>Last Professional Experience:</strong> ${experience.companyName || 'N/A'} - ${experience.title || 'N/A'} - from ${experience.startDate || 'N/A'} to ${experience.endDate || 'Present'} - ${experience.locationName || 'N/A'}${Array.isArray(experience.industries) && experience.industries.length > 0 ? ' - Industry: ' + experience.industries.join(', ') : ''}</div>
+        <hr>
+        <div style="display: flex; justify-content: space-between;">
+            <div style="flex: 1;"><strong>Hard Skills:</strong><br>${Array.isArray(data.hardSkills) ? data.hardSkills.join(', ') : 'Not available'}</div>
+            <div style="flex: 1; text-align: right;"><strong>Soft Skills:</strong><br>${Array.isArray(data.softSkills) ? data.softSkills.join(', ') : 'Not available'}</div>
+        </div>
+        <hr>
+        <div style="display: flex; flex-direction: column;">
+            <div><strong>Strengths:</strong><br>${bulletList(data.strengths)}</div>
+            <div style="margin-top: 10px;"><strong>Weaknesses:</strong><br>${bulletList(data.weaknesses)}</div>
+        </div>
+        <hr>
+        <p><strong>Improvement Suggestions:</strong><br>${bulletList(data.improvementSuggestions, 'N/A')}</p>
+        <p><strong>Career Suggestions:</strong><br>${bulletList(data.careerSuggestions, 'N/A')}</p>
+        `;
+}
+
+// Builds the job description report, tolerating sections that have not been streamed yet.
+function renderJobReport(data) {
+    const skills = data.skillsRequired || {};
+    const company = data.companyInfo || {};
+
+    return `
+        <h3 class="result-title">Job Description Report</h3>
+        <p><strong>Job Title:</strong> ${data.jobTitle || 'N/A'}</p>
+        <p><strong>Location:</strong> ${data.location || 'N/A'}</p>
+        <p><strong>Overview:</strong> ${data.overview || 'N/A'}</p>
+        <hr>
+        <p><strong>Experience Level:</strong> ${data.experienceLevel || 'N/A'}</p>
+        <p><strong>Academic Requirements:</strong> Degree Level: ${data.academicRequirements ? data.academicRequirements.degreeLevel || 'Not specified' : 'N/A'}</p>
+        <div class="flex-container">
+            <div style="flex: 1;"><strong>Hard Skills Required:</strong><br>${Array.isArray(skills.hardSkills) ? bulletList(skills.hardSkills) : 'Not available'}</div>
+            <div style="flex: 1;" class="right-align"><strong>Soft Skills Required:</strong><br>${Array.isArray(skills.softSkills) ? bulletList(skills.softSkills) : 'Not available'}</div>
+        </div>
+        <p><strong>Key Responsibilities:</strong><br>${Array.isArray(data.keyResponsibilities) ? bulletList(data.keyResponsibilities) : 'Not available'}</p>
+        <hr>
+        <p style="text-align: center; font-weight: bold;">Company Info</p>
+        <p><strong>Company Name:</strong> ${company.name || 'N/A'}</p>
+        <p><strong>LinkedIn URL:</strong> <a href="${company.linkedinUrl || '#'}" target="_blank">${company.linkedinUrl || 'N/A'}</a></p>
+        <p><strong>Company Overview:</strong> ${company.overview || 'N/A'}</p>
+        <p><strong>Specialties:</strong> ${Array.isArray(company.specialties) ? company.specialties.join(', ') : 'Not available'}</p>
+    `;
+}
+
 function analyzeProfile() {
     const profileUrl = document.getElementById('profile_url').value;
 
@@ -61,74 +185,36 @@ function analyzeProfile() {
     const button = document.querySelector('#linkedinInput button');
     button.classList.add('button-clicked');
 
-    fetch('/extract_analyze_profile', {
+    const resultDiv = document.getElementById('profileAnalysisResult');
+    const containerDiv = document.getElementById('profileContainer');
+
+    // Render each section of the report as soon as it is streamed
+    const renderPartial = data => {
+        containerDiv.style.display = 'block';
+        resultDiv.style.display = 'block';
+        resultDiv.innerHTML = renderProfileReport(data);
+    };
+
+    streamAnalysis('/extract_analyze_profile/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ profile_url: profileUrl })
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Failed to load profile data');
-        }
-        return response.json();
-    })
+    }, renderPartial)
     .then(data => {
         console.log(data); // Log the data for debugging purposes
-        window.profileAnalysisResult = data; // Optionally save the data for future use
-        const resultDiv = document.getElementById('profileAnalysisResult');
-        resultDiv.innerHTML = ''; // Clear previous content
-        resultDiv.style.display = 'block';
-
-        // Define institution name based on whether it's an object with original or translated fields, or just a string
-        let institutionName = '';
-        if (data.highestDegree && typeof data.highestDegree.institution === 'object') {
-            institutionName = data.highestDegree.institution.original || data.highestDegree.institution.translated;
-        } else if (data.highestDegree && typeof data.highestDegree.institution === 'string') {
-            institutionName = data.highestDegree.institution;
-        }
-
-        // Construct the rest of the content
-        let content = `
-            <h3 class="result-title">Profile Report</h3>
-            <p><strong>Full Name:</strong> ${data.fullName || 'N/A'}</p>
-            <p><strong>Location:</strong> ${data.location || 'N/A'}</p>
-            <p><strong>Highest Degree:</strong> ${data.highestDegree ? `${data.highestDegree.level} - ${data.highestDegree.fieldOfStudy} - ${institutionName}` : 'N/A'}</p>
-            <div><strong>Last Professional Experience:</strong> ${data.lastProfessionalExperience.companyName || 'N/A'} - ${data.lastProfessionalExperience.title || 'N/A'} - from ${data.lastProfessionalExperience.startDate || 'N/A'} to ${data.lastProfessionalExperience.endDate || 'Present'} - ${data.lastProfessionalExperience.locationName || 'N/A'}${Array.isArray(data.lastProfessionalExperience.industries) && data.lastProfessionalExperience.industries.length > 0 ? ' - Industry: ' + data.lastProfessionalExperience.industries.join(', ') : ''}</div>
-            <hr>
-            <div style="display: flex; justify-content: space-between;">
-                <div style="flex: 1;"><strong>Hard Skills:</strong><br>${Array.isArray(data.hardSkills) ? data.hardSkills.join(', ') : 'Not available'}</div>
-                <div style="flex: 1; text-align: right;"><strong>Soft Skills:</strong><br>${Array.isArray(data.softSkills) ? data.softSkills.join(', ') : 'Not available'}</div>
-            </div>
-            <hr>
-            <div style="display: flex; flex-direction: column;">
-                <div><strong>Strengths:</strong><br>${Array.isArray(data.strengths) ? data.strengths.map(strength => `- ${strength}`).join('<br>') : 'Not available'}</div>
-                <div style="margin-top: 10px;"><strong>Weaknesses:</strong><br>${Array.isArray(data.weaknesses) ? data.weaknesses.map(weakness => `- ${weakness}`).join('<br>') : 'Not available'}</div>
-            </div>
-            <hr>
-            <p><strong>Improvement Suggestions:</strong><br>${Array.isArray(data.improvementSuggestions) ? data.improvementSuggestions.map(suggestion => `- ${suggestion}`).join('<br>') : data.improvementSuggestions || 'N/A'}</p>
-            <p><strong>Career Suggestions:</strong><br>${Array.isArray(data.careerSuggestions) ? data.careerSuggestions.map(suggestion => `- ${suggestion}`).join('<br>') : 'N/A'}</p>
-            `;
-        // Make the result container visible
-        const containerDiv = document.getElementById('profileContainer');
-        containerDiv.style.display = 'block';
-        
-        // Append the constructed content to the result div
-        resultDiv.innerHTML += content;
+        window.profileAnalysisResult = data; // Save the data for matching
+        window.profileAnalysisId = data.analysisId; // Matching refers to the stored analysis by ID
+        renderPartial(data);
 
         // Ensure the loading indicator reaches 100% before hiding
         updateLoadingProgress(indicator, text, 100);
-
-        // Stop the loading indicator
-        clearInterval(progressInterval);
-        stopLoadingIndicator('profile-analysis'); 
-        button.classList.remove('button-clicked');
     })
     .catch(error => {
         console.error('Error:', error);
-        const resultDiv = document.getElementById('profileAnalysisResult');
-        resultDiv.innerHTML = `<p>Error occurred: ${error}</p>`;
-        
-        // Stop the loading indicator in case of error
+        resultDiv.innerHTML = `<p>Error occurred: ${error.message}</p>`;
+    })
+    .finally(() => {
+        // Stop the loading indicator after content is rendered or in case of error
         clearInterval(progressInterval);
         stopLoadingIndicator('profile-analysis');
         button.classList.remove('button-clicked');
@@ -145,64 +231,36 @@ function analyzeJob() {
     const button = document.querySelector('#job_url + button');
     button.classList.add('button-clicked');
 
-    fetch('/extract_analyze_job', {
+    const resultDiv = document.getElementById('jobAnalysisResult');
+    const containerDiv = document.getElementById('jobContainer');
+
+    // Render each section of the report as soon as it is streamed
+    const renderPartial = data => {
+        containerDiv.style.display = 'block';
+        resultDiv.style.display = 'block';
+        resultDiv.innerHTML = renderJobReport(data);
+    };
+
+    streamAnalysis('/extract_analyze_job/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ job_url: jobUrl })
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Failed to load job data');
-        }
-        return response.json();
-    })
+    }, renderPartial)
     .then(data => {
-        console.log(data); 
-
-        window.jobAnalysisResult = data; // Save the job analysis result for potential future use
-        const resultDiv = document.getElementById('jobAnalysisResult');
-        resultDiv.style.display = 'block';
-
-        let content = `
-        <h3 class="result-title">Job Description Report</h3>
-        <p><strong>Job Title:</strong> ${data.jobTitle || 'N/A'}</p>
-        <p><strong>Location:</strong> ${data.location || 'N/A'}</p>
-        <p><strong>Overview:</strong> ${data.overview || 'N/A'}</p>
-        <hr>
-        <p><strong>Experience Level:</strong> ${data.experienceLevel || 'N/A'}</p>
-        <p><strong>Academic Requirements:</strong> Degree Level: ${data.academicRequirements ? data.academicRequirements.degreeLevel || 'Not specified' : 'N/A'}</p>
-        <div class="flex-container">
-            <div style="flex: 1;"><strong>Hard Skills Required:</strong><br>${Array.isArray(data.skillsRequired.hardSkills) ? data.skillsRequired.hardSkills.map(skill => `- ${skill}`).join('<br>') : 'Not available'}</div>
-            <div style="flex: 1;" class="right-align"><strong>Soft Skills Required:</strong><br>${Array.isArray(data.skillsRequired.softSkills) ? data.skillsRequired.softSkills.map(skill => `- ${skill}`).join('<br>') : 'Not available'}</div>
-        </div>
-        <p><strong>Key Responsibilities:</strong><br>${Array.isArray(data.keyResponsibilities) ? data.keyResponsibilities.map(responsibility => `- ${responsibility}`).join('<br>') : 'Not available'}</p>
-        <hr>
-        <p style="text-align: center; font-weight: bold;">Company Info</p>
-        <p><strong>Company Name:</strong> ${data.companyInfo ? data.companyInfo.name || 'N/A' : 'N/A'}</p>
-        <p><strong>LinkedIn URL:</strong> <a href="${data.companyInfo && data.companyInfo.linkedinUrl ? data.companyInfo.linkedinUrl : '#'}" target="_blank">${data.companyInfo && data.companyInfo.linkedinUrl || 'N/A'}</a></p>
-        <p><strong>Company Overview:</strong> ${data.companyInfo ? data.companyInfo.overview || 'N/A' : 'N/A'}</p>
-        <p><strong>Specialties:</strong> ${Array.isArray(data.companyInfo && data.companyInfo.specialties) ? data.companyInfo.specialties.join(', ') : 'Not available'}</p>
-    `;
-
-        // Make the result container visible
-        const containerDiv = document.getElementById('jobContainer');
-        containerDiv.style.display = 'block'; 
-
-        resultDiv.innerHTML = content;
+        console.log(data);
+        window.jobAnalysisResult = data; // Save the job analysis result for matching
+        window.jobAnalysisId = data.analysisId; // Matching refers to the stored analysis by ID
+        renderPartial(data);
 
         // Ensure the loading indicator reaches 100% before hiding
         updateLoadingProgress(indicator, text, 100);
-
-        // Stop the loading indicator after content is rendered
-        clearInterval(progressInterval);
-        stopLoadingIndicator('job-analysis');
-        button.classList.remove('button-clicked');
     })
     .catch(error => {
         console.error('Error:', error);
-        const resultDiv = document.getElementById('jobAnalysisResult');
-        resultDiv.innerHTML = `<p>Error occurred: ${error}</p>`;
-        // Stop the loading indicator in case of error
+        resultDiv.innerHTML = `<p>Error occurred: ${error.message}</p>`;
+    })
+    .finally(() => {
+        // Stop the loading indicator after content is rendered or in case of error
         clearInterval(progressInterval);
         stopLoadingIndicator('job-analysis');
         button.classList.remove('button-clicked');
@@ -229,51 +287,29 @@ function uploadAndAnalyzeResume() {
     }
     formData.append('resume', resumeFile);
 
-    fetch('/upload_analyze_resume', {
+    const resultDiv = document.getElementById('profileAnalysisResult');
+    const containerDiv = document.getElementById('profileContainer');
+
+    // Render each section of the report as soon as it is streamed
+    const renderPartial = data => {
+        containerDiv.style.display = 'block';
+        resultDiv.style.display = 'block';
+        resultDiv.innerHTML = renderProfileReport(data);
+    };
+
+    streamAnalysis('/upload_analyze_resume/stream', {
         method: 'POST',
         body: formData
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Network response was not ok');
-        }
-        return response.json();
-    })
+    }, renderPartial)
     .then(data => {
         console.log(data); 
-        
-        window.profileAnalysisResult = data; // Save the analysis result for potential future use
-        const resultDiv = document.getElementById('profileAnalysisResult');
-        resultDiv.innerHTML = ''; // Clear previous content to ensure no overlap of data
-        resultDiv.style.display = 'block'; // Make sure the result container is visible
-
-        // Construct content with the given format
-        let content = `
-        <h3 class="result-title">Profile Report</h3>
-        <p><strong>Full Name:</strong> ${data.fullName || 'N/A'}</p>
-        <p><strong>Location:</strong> ${data.location || 'N/A'}</p>
-        <p><strong>Highest Degree:</strong> ${data.highestDegree ? `${data.highestDegree.level} - ${data.highestDegree.fieldOfStudy} - ${data.highestDegree.institution}` : 'N/A'}</p>
-        <hr>
-        <div style="display: flex; justify-content: space-between;">
-            <div style="flex: 1;"><strong>Hard Skills:</strong><br>${Array.isArray(data.hardSkills) ? data.hardSkills.join(', ') : 'Not available'}</div>
-            <div style="flex: 1; text-align: right;"><strong>Soft Skills:</strong><br>${Array.isArray(data.softSkills) ? data.softSkills.join(', ') : 'Not available'}</div>
-        </div>
-        <hr>
-        <div style="display: flex; flex-direction: column;">
-            <div><strong>Strengths:</strong><br>${Array.isArray(data.strengths) ? data.strengths.map(strength => `- ${strength}`).join('<br>') : 'Not available'}</div>
-            <div style="margin-top: 10px;"><strong>Weaknesses:</strong><br>${Array.isArray(data.weaknesses) ? data.weaknesses.map(weakness => `- ${weakness}`).join('<br>') : 'Not available'}</div>
-        </div>
-        <hr>
-        <p><strong>Improvement Suggestions:</strong><br>${Array.isArray(data.improvementSuggestions) ? data.improvementSuggestions.map(suggestion => `- ${suggestion}`).join('<br>') : data.improvementSuggestions || 'N/A'}</p>
-        <p><strong>Career Suggestions:</strong><br>${Array.isArray(data.careerSuggestions) ? data.careerSuggestions.map(suggestion => `- ${suggestion}`).join('<br>') : 'N/A'}</p>
-        `;
-        resultDiv.innerHTML = content;
+        window.profileAnalysisResult = data; // Save the analysis result for matching
+        window.profileAnalysisId = data.analysisId; // Matching refers to the stored analysis by ID
+        renderPartial(data);
         updateLoadingProgress(indicator, text, 100);
-
     })
     .catch(error => {
         console.error('Error:', error);
-        const resultDiv = document.getElementById('profileAnalysisResult');
         resultDiv.innerHTML = `<p>Error occurred: ${error.message}</p>`;
     })
     .finally(() => {
@@ -312,41 +348,43 @@ function matchProfiles() {
     // Check if profile and job data are present
     if (!profileData || !jobData) {
         alert('Profile or Job Data is missing!');
-        showLoadingIndicator(false);
+        clearInterval(progressInterval);
+        stopLoadingIndicator('match');
         button.classList.remove('button-clicked');
         return;
     }
 
-    // Attempt to match profiles
-    fetch('/match_profiles', {
+    // Refer to the stored analyses by ID when the server returned one, instead of sending them back
+    const body = {};
+    if (window.profileAnalysisId) {
+        body.profile_id = window.profileAnalysisId;
+    } else {
+        body.profile_data = profileData;
+    }
+    if (window.jobAnalysisId) {
+        body.job_id = window.jobAnalysisId;
+    } else {
+        body.job_data = jobData;
+    }
+
+    // Attempt to match profiles, rendering each criterion as soon as it is streamed
+    streamAnalysis('/match_profiles/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-            profile_data: profileData,
-            job_data: jobData
-        })
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Failed to load match data');
-        }
-        return response.json();
-    })
+        body: JSON.stringify(body)
+    }, displayMatchResult)
     .then(data => {
         displayMatchResult(data); // Display the match result
 
         // Ensure the loading indicator reaches 100% before hiding
         updateLoadingProgress(indicator, text, 100);
-
-        // Stop the loading indicator after content is rendered
-        clearInterval(progressInterval);
-        stopLoadingIndicator('match');
-        button.classList.remove('button-clicked');
     })
     .catch(error => {
         console.error('Error:', error);
         document.getElementById('matchResult').innerHTML = `<p>Error occurred: ${error.message}</p>`;
-        // Stop the loading indicator in case of error
+    })
+    .finally(() => {
+        // Stop the loading indicator after content is rendered or in case of error
         clearInterval(progressInterval);
         stopLoadingIndicator('match');
         button.classList.remove('button-clicked');
@@ -360,6 +398,10 @@ function displayMatchResult(data) {
     const matchDiv = document.getElementById('matchResult');
     matchDiv.style.display = 'block'; 
 
+    // Sections that have not been streamed yet are left out or shown as placeholders
+    const details = data.Details || {};
+    const hasScore = data["Overall Compatibility Score"] !== undefined;
+
     // Extract the numerical value of the overall score for the color function
     const overallScore = parseInt(data["Overall Compatibility Score"], 10);
     const overallScoreColor = getScoreColor(overallScore);
@@ -373,14 +415,14 @@ function displayMatchResult(data) {
         border-radius: 10px;
         margin-bottom: 20px;
         box-sizing: border-box;
-        ">Overall Compatibility Score: <span style="color: ${overallScoreColor};">${data["Overall Compatibility Score"]}%</span>
+        ">Overall Compatibility Score: <span style="color: ${overallScoreColor};">${hasScore ? `${data["Overall Compatibility Score"]}%` : '...'}</span>
         </div>
-        ${generateMatchSection('Skill Matching', data.Details['Skill Matching'], true)}
-        ${generateMatchSection('Professional Relevance', data.Details['Experience Relevance'])}
-        ${generateMatchSection('Educational Alignment', data.Details['Educational Alignment'])}
-        ${generateMatchSection('Cultural and Soft Skills Fit', data.Details['Cultural and Soft Skills Fit'])}
-        ${generateMatchSection('Language and International Experience', data.Details['Language and International Experience'])}
-        ${generateMatchSection('Growth Potential', data.Details['Growth Potential'])}
+        ${generateMatchSection('Skill Matching', details['Skill Matching'], true)}
+        ${generateMatchSection('Professional Relevance', details['Experience Relevance'])}
+        ${generateMatchSection('Educational Alignment', details['Educational Alignment'])}
+        ${generateMatchSection('Cultural and Soft Skills Fit', details['Cultural and Soft Skills Fit'])}
+        ${generateMatchSection('Language and International Experience', details['Language and International Experience'])}
+        ${generateMatchSection('Growth Potential', details['Growth Potential'])}
         <div style="
         border: 1px;
         padding: 10px;
@@ -388,7 +430,7 @@ function displayMatchResult(data) {
         margin-bottom: 20px;
         ">
             <div style="text-align: center; font-weight: bold;">Summary</div>
-            <p style="text-align: justify; margin: 10px 0;">${data.Summary}</p>
+            <p style="text-align: justify; margin: 10px 0;">${data.Summary || '...'}</p>
         </div>
     `;
 
@@ -419,6 +461,10 @@ function getScoreColor(score) {
 
 
 function generateMatchSection(title, sectionData) {
+    // The section may not have been streamed yet
+    if (!sectionData) {
+        return '';
+    }
     const sectionColor = getScoreColor(sectionData["Percentage Match"]);
     
     // Transform the array of suggestions into a single string with bullet points, or directly use the string
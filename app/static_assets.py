@@ -0,0 +1,171 @@
+"""
+Build step of the static assets: content-hashed file names and precompressed variants.
+
+Run from the app/ directory after changing anything under static/ (and as part of every deployment):
+
+    python static_assets.py
+
+Each file of static/ is copied to static_build/ under a name carrying a hash of its content (e.g.
+css/style.3f2a9c1b0d4e.css), with brotli (.br) and gzip (.gz) variants of the text files written next to
+it. A changed file gets a new name, so the app serves the built files with an immutable one-year cache
+lifetime and browsers never ask for them again. static_build/manifest.json maps each original name to
+its built name. Without a build, the app serves static/ as it is.
+"""
+import os
+import re
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import compression
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", os.path.join(APP_DIR, "static_build"))
+MANIFEST_NAME = "manifest.json"
+
+# Files whose content compresses well; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.html', '.svg', '.json', '.txt', '.map', '.xml', '.ico'}
+
+# Files of static/ that are not assets
+IGNORED_NAMES = {'.DS_Store', 'Thumbs.db'}
+
+# Cache-Control header of the built files, whose content never changes under a given name
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# url(...) references of a stylesheet
+_CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def fingerprinted_name(name, content):
+    """
+    Returns the name of a file with a hash of its content inserted before the extension.
+    """
+    stem, extension = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{extension}'
+
+
+def _rewrite_css_urls(css, css_name, files):
+    # Point the stylesheet's references to other assets at their built names, relative to the built stylesheet
+    def replace(match):
+        reference = match.group(2).strip()
+        if re.match(r'^([a-z]+:|/|#)', reference, re.IGNORECASE):
+            return match.group(0)
+        path, _, suffix = reference.partition('?')
+        target = os.path.normpath(os.path.join(os.path.dirname(css_name), path)).replace(os.sep, '/')
+        if target not in files:
+            return match.group(0)
+        relative = os.path.relpath(files[target]['path'], os.path.dirname(css_name) or '.').replace(os.sep, '/')
+        return f'url("{relative}")'
+    return _CSS_URL.sub(replace, css)
+
+
+def build_assets(static_dir=STATIC_DIR, build_dir=STATIC_BUILD_DIR):
+    """
+    Builds the fingerprinted and precompressed assets (see the module documentation), replacing any earlier build.
+
+    Returns:
+    - dict: The manifest, {'files': {original name: {'path': built name, 'encodings': [...]}}}.
+    """
+    names = []
+    for directory, _, file_names in os.walk(static_dir):
+        for file_name in file_names:
+            if file_name not in IGNORED_NAMES:
+                names.append(os.path.relpath(os.path.join(directory, file_name), static_dir).replace(os.sep, '/'))
+    # Stylesheets last, so the assets they reference already have their built names
+    names.sort(key=lambda name: (name.endswith('.css'), name))
+
+    staging_dir = build_dir.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    files = {}
+    for name in names:
+        with open(os.path.join(static_dir, name), 'rb') as source:
+            content = source.read()
+        if name.endswith('.css'):
+            content = _rewrite_css_urls(content.decode('utf-8'), name, files).encode('utf-8')
+
+        built_name = fingerprinted_name(name, content)
+        built_path = os.path.join(staging_dir, built_name)
+        os.makedirs(os.path.dirname(built_path), exist_ok=True)
+        with open(built_path, 'wb') as built:
+            built.write(content)
+
+        encodings = []
+        if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            for encoding in compression.ENCODINGS:
+                compressed = compression.compress(content, encoding, level=11 if encoding == 'br' else 9)
+                # A variant that is not smaller would only cost a file read
+                if len(compressed) < len(content):
+                    with open(built_path + compression.SUFFIXES[encoding], 'wb') as variant:
+                        variant.write(compressed)
+                    encodings.append(encoding)
+        files[name] = {'path': built_name, 'encodings': encodings, 'bytes': len(content)}
+
+    manifest = {'files': files}
+    with open(os.path.join(staging_dir, MANIFEST_NAME), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    # Swap the complete build in, so a running server never sees a partial one
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.rename(staging_dir, build_dir)
+    return manifest
+
+
+class AssetManifest:
+    """
+    The built assets the app serves, read from the manifest of a build.
+
+    Parameters:
+    - build_dir (str): The build directory; if it holds no manifest, asset_url() returns the original static URLs.
+    """
+
+    def __init__(self, build_dir=STATIC_BUILD_DIR):
+        self.build_dir = build_dir
+        try:
+            with open(os.path.join(build_dir, MANIFEST_NAME)) as manifest_file:
+                self.files = json.load(manifest_file)['files']
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+        # Built name -> encodings available, to serve only the files of the build
+        self._built = {entry['path']: entry['encodings'] for entry in self.files.values()}
+
+    def built_name(self, name):
+        """
+        Returns the built name of a static file, or None if it was not built.
+        """
+        entry = self.files.get(name)
+        return entry['path'] if entry else None
+
+    def variant(self, built_name, accept_encoding):
+        """
+        Picks the file to send for a built asset given the client's Accept-Encoding header.
+
+        Returns:
+        - tuple: (file name in the build directory, content encoding or None), or (None, None) if it is not a built asset.
+        """
+        if built_name not in self._built:
+            return None, None
+        encoding = compression.negotiate_encoding(accept_encoding, available=tuple(self._built[built_name]))
+        if encoding is None:
+            return built_name, None
+        return built_name + compression.SUFFIXES[encoding], encoding
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the fingerprinted and precompressed static assets.')
+    parser.add_argument('--static-dir', default=STATIC_DIR, help='Directory of the source assets.')
+    parser.add_argument('--build-dir', default=STATIC_BUILD_DIR, help='Directory receiving the built assets.')
+    args = parser.parse_args(argv)
+
+    manifest = build_assets(args.static_dir, args.build_dir)
+    for name, entry in sorted(manifest['files'].items()):
+        sizes = ', '.join(f"{encoding} {os.path.getsize(os.path.join(args.build_dir, entry['path'] + compression.SUFFIXES[encoding]))} B"
+                          for encoding in entry['encodings'])
+        print(f"{name} -> {entry['path']} ({entry['bytes']} B{', ' + sizes if sizes else ''})")
+    if compression.brotli is None:
+        print("The brotli package is not installed: only gzip variants were written.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
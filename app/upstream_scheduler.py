@@ -0,0 +1,505 @@
+import os
+import time
+import asyncio
+import heapq
+import random
+import logging
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes: waiting interactive calls are always admitted before waiting batch calls
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+
+# Lane of the calls made by the current request, job or thread (see priority_lane)
+_priority = contextvars.ContextVar('upstream_priority', default=INTERACTIVE)
+
+# Kinds of retryable failures
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+# Kind of the failures retrying would not fix, and of cancelled calls: they say nothing about the upstream's load
+FAILED = 'failed'
+
+# Exception class names (from requests, linkedin_api and openai) of retryable failures
+RATE_LIMIT_ERRORS = {'RateLimitError', 'TooManyRequests'}
+TRANSIENT_ERRORS = {
+    'Timeout', 'ReadTimeout', 'ConnectTimeout', 'ConnectionError', 'ChunkedEncodingError',
+    'APITimeoutError', 'APIConnectionError', 'InternalServerError',
+}
+
+
+class UpstreamUnavailableError(RuntimeError):
+    """
+    Raised when an upstream call keeps failing with retryable errors, or cannot be admitted in time.
+
+    Attributes:
+    - retry_after (float): Seconds after which trying again makes sense, if known.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority_lane(priority):
+    """
+    Runs a block with its upstream calls in a priority lane (INTERACTIVE or BATCH). Threads started
+    with metrics.propagate_context() inherit the lane.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _status_code(error):
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error):
+    """
+    Returns RATE_LIMITED for a 429, TRANSIENT for a timeout, connection error or 5xx, and None for
+    errors that retrying would not fix.
+    """
+    status = _status_code(error)
+    if type(error).__name__ in RATE_LIMIT_ERRORS or status == 429:
+        return RATE_LIMITED
+    if type(error).__name__ in TRANSIENT_ERRORS or isinstance(error, TimeoutError) or status == 408 or (status or 0) >= 500:
+        return TRANSIENT
+    return None
+
+
+def retry_after(error):
+    """
+    Returns the delay in seconds requested by the Retry-After (or OpenAI's retry-after-ms) header of
+    the response attached to an error, or None.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return max(float(headers['retry-after-ms']) / 1000, 0.0)
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            # An HTTP date rather than a number of seconds
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    A budget of `per_minute` units refilled continuously, holding at most one minute's worth.
+    Not thread-safe: the scheduler uses it under its own lock.
+    """
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        # Seconds until `amount` units are available. A request larger than the bucket waits for a full bucket.
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class AdaptiveConcurrency:
+    """
+    An additive-increase, multiplicative-decrease limit of concurrent calls.
+
+    Every call that completes within the latency target raises the limit by 1/limit (about +1 per
+    round of calls). A rate-limited or failed call halves it, and a call slower than the target cuts
+    it by 10%; decreases happen at most once per observed latency, so one burst of errors counts once.
+    """
+
+    def __init__(self, maximum, minimum=1, latency_target=None):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.latency_target = latency_target
+        self.limit = float(maximum)
+        self._next_decrease = 0.0
+
+    def _decrease(self, factor, latency):
+        now = time.monotonic()
+        if now >= self._next_decrease:
+            self.limit = max(float(self.minimum), self.limit * factor)
+            self._next_decrease = now + max(latency, 1.0)
+
+    def on_success(self, latency):
+        if self.latency_target and latency > self.latency_target:
+            self._decrease(0.9, latency)
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+
+    def on_overload(self, latency):
+        self._decrease(0.5, latency)
+
+
+class UpstreamScheduler:
+    """
+    Admits, paces and retries the calls of one upstream API (LinkedIn or OpenAI).
+
+    Each call waits for a concurrency slot (an adaptive AIMD limit), a request from the
+    requests-per-minute bucket and, when a token cost is given, tokens from the tokens-per-minute
+    bucket. Waiting calls are admitted by priority lane, then in arrival order. Rate-limited and
+    transient failures are retried with exponential backoff and full jitter; a Retry-After delay is
+    honored and pauses every call to the upstream, since they would be throttled as well.
+
+    Limits are per process: divide the upstream's quotas by the number of worker processes. Threads (call)
+    and event loop tasks (acall) share the same budgets and queue.
+
+    Parameters:
+    - name (str): Name of the upstream, used in logs, errors and statistics.
+    - requests_per_minute (float): Request budget.
+    - tokens_per_minute (float): Token budget, or None for upstreams that do not count tokens.
+    - max_concurrency (int): Upper bound of the adaptive concurrency limit.
+    - latency_target (float): Seconds above which a call is taken as a sign of overload.
+    - max_retries (int): Retries of a call after its first attempt.
+    - backoff_base, backoff_max (float): Backoff of the first retry, and cap of any backoff, in seconds.
+    - max_queue_wait (float): Seconds a call may wait to be admitted before failing.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute=None, max_concurrency=8, latency_target=None,
+                 max_retries=3, backoff_base=0.5, backoff_max=30.0, max_queue_wait=120.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency, latency_target=latency_target)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_queue_wait = max_queue_wait
+        self._cond = threading.Condition()
+        self._waiters = []
+        # (event loop, asyncio.Event) of the tasks waiting in acall, woken like the threads waiting on _cond
+        self._async_waiters = set()
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._stats = {'calls': 0, 'retries': 0, 'rateLimited': 0, 'transientErrors': 0, 'gaveUp': 0, 'queueWaitSeconds': 0.0}
+
+    def _admission_delay(self, tokens, now):
+        # Seconds until the budgets allow the call, once a concurrency slot is free
+        delay = max(self._paused_until - now, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.wait_time(tokens, now))
+        return delay
+
+    def _notify(self):
+        # Wakes every waiting thread and task so the first in line can check whether it may go. Call with _cond held.
+        self._cond.notify_all()
+        for loop, wakeup in self._async_waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # That task's event loop was closed
+                pass
+
+    def _admit(self, entry, tokens, started):
+        # Admits a waiter if it is first in line, a concurrency slot is free and the budgets allow it. Returns None
+        # once admitted, else the seconds after which to check again (infinity: when a call finishes). Call with _cond held.
+        now = time.monotonic()
+        if self._waiters[0] is not entry or self._in_flight >= int(self.concurrency.limit):
+            return float('inf')
+        delay = self._admission_delay(tokens, now)
+        if delay > 0:
+            return delay
+        heapq.heappop(self._waiters)
+        self.requests.take(1)
+        if self.tokens is not None and tokens:
+            self.tokens.take(tokens)
+        self._in_flight += 1
+        self._stats['calls'] += 1
+        self._stats['queueWaitSeconds'] += now - started
+        # The next waiter may be admissible too
+        self._notify()
+        return None
+
+    def _saturated(self):
+        now = time.monotonic()
+        return UpstreamUnavailableError(
+            f"{self.name} is saturated: the call waited {self.max_queue_wait:.0f} seconds to be admitted",
+            retry_after=self._paused_until - now if self._paused_until > now else None)
+
+    def _dequeue(self, entry):
+        # Removes a waiter that gave up. Call with _cond held.
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._notify()
+
+    def _acquire(self, tokens, priority):
+        entry = (PRIORITIES[priority], next(self._sequence), priority)
+        started = time.monotonic()
+        deadline = started + self.max_queue_wait
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    wait = self._admit(entry, tokens, started)
+                    if wait is None:
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._saturated()
+                    self._cond.wait(min(wait, remaining))
+            except BaseException:
+                self._dequeue(entry)
+                raise
+
+    async def _acquire_async(self, tokens, priority):
+        # Same as _acquire, waiting on an asyncio.Event so the event loop keeps serving other tasks
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        entry = (PRIORITIES[priority], next(self._sequence), priority)
+        started = time.monotonic()
+        deadline = started + self.max_queue_wait
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            self._async_waiters.add((loop, wakeup))
+        try:
+            while True:
+                # Cleared before checking, so a wake-up sent after the check is not missed
+                wakeup.clear()
+                with self._cond:
+                    wait = self._admit(entry, tokens, started)
+                if wait is None:
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._saturated()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), min(wait, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._cond:
+                self._dequeue(entry)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.discard((loop, wakeup))
+
+    def _release(self, latency, failure):
+        # Frees a concurrency slot. Successes (failure None) raise the limit, rate limits and transient errors
+        # lower it, and other failures (FAILED) leave it as it is.
+        with self._cond:
+            self._in_flight -= 1
+            if failure is None:
+                self.concurrency.on_success(latency)
+            elif failure != FAILED:
+                self.concurrency.on_overload(latency)
+                self._stats['rateLimited' if failure == RATE_LIMITED else 'transientErrors'] += 1
+            self._notify()
+
+    def _pause(self, seconds):
+        # Hold back every call to the upstream, e.g. until its Retry-After delay has passed
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, function, tokens=0, priority=None, max_retries=None):
+        """
+        Runs `function` (a call to the upstream) once admitted, retrying it on rate limits and transient errors.
+
+        Parameters:
+        - function (callable): Makes the upstream call; called again for every retry.
+        - tokens (int): Estimated token cost of the call, counted against the tokens-per-minute budget.
+        - priority (str): INTERACTIVE or BATCH. Defaults to the lane of the current context (see priority_lane).
+        - max_retries (int): Overrides the scheduler's retries, e.g. 0 when the caller has a fallback of its own.
+
+        Returns:
+        - The function's return value.
+
+        Raises UpstreamUnavailableError when the retries are exhausted or the call cannot be admitted in time;
+        any other error of the function is raised as it is.
+        """
+        priority = priority or _priority.get()
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in itertools.count():
+            self._acquire(tokens, priority)
+            started = time.monotonic()
+            try:
+                result = function()
+            except Exception as e:
+                time.sleep(self._after_failure(e, attempt, max_retries, time.monotonic() - started))
+                continue
+            except BaseException:
+                self._release(time.monotonic() - started, FAILED)
+                raise
+            self._release(time.monotonic() - started, None)
+            return result
+
+    def stream(self, function, tokens=0, priority=None, max_retries=None):
+        """
+        Like call(), for a function opening a stream (an iterable, e.g. of completion chunks). Opening the
+        stream is retried; the concurrency slot is then held until the stream is exhausted, fails or is
+        closed, since the upstream is serving it until then.
+
+        Returns:
+        - iterator: The stream's items. Close it when not reading it to the end.
+        """
+        priority = priority or _priority.get()
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in itertools.count():
+            self._acquire(tokens, priority)
+            started = time.monotonic()
+            try:
+                stream = function()
+            except Exception as e:
+                time.sleep(self._after_failure(e, attempt, max_retries, time.monotonic() - started))
+                continue
+            except BaseException:
+                self._release(time.monotonic() - started, FAILED)
+                raise
+            return _HeldStream(self, stream, started)
+
+    async def acall(self, function, tokens=0, priority=None, max_retries=None):
+        """
+        Async counterpart of call(), for event loop tasks: `function` returns an awaitable (e.g. a request of
+        an async client), and waiting for admission or a backoff suspends the task instead of its thread.
+        """
+        priority = priority or _priority.get()
+        max_retries = self.max_retries if max_retries is None else max_retries
+        for attempt in itertools.count():
+            await self._acquire_async(tokens, priority)
+            started = time.monotonic()
+            try:
+                result = await function()
+            except Exception as e:
+                await asyncio.sleep(self._after_failure(e, attempt, max_retries, time.monotonic() - started))
+                continue
+            except BaseException:
+                # Cancelled, e.g. because the client disconnected: the slot is free again
+                self._release(time.monotonic() - started, FAILED)
+                raise
+            self._release(time.monotonic() - started, None)
+            return result
+
+    def _after_failure(self, error, attempt, max_retries, latency):
+        # Releases the slot of a failed attempt and returns the delay before the next one, or raises if there is none
+        failure = classify_error(error)
+        self._release(latency, failure or FAILED)
+        if failure is None:
+            raise error
+        requested_delay = retry_after(error)
+        delay = requested_delay if requested_delay is not None else self._backoff(attempt)
+        if failure == RATE_LIMITED:
+            self._pause(delay)
+        if attempt >= max_retries:
+            with self._cond:
+                self._stats['gaveUp'] += 1
+            raise UpstreamUnavailableError(
+                f"{self.name} call failed after {attempt + 1} attempts: {error}", retry_after=requested_delay) from error
+        with self._cond:
+            self._stats['retries'] += 1
+        logger.warning("%s call failed (%s: %s), retrying in %.1f seconds", self.name, type(error).__name__, error, delay)
+        return delay
+
+    def stats(self):
+        """
+        Returns the current concurrency limit, the calls in flight and queued per lane, and the retry counters.
+        """
+        with self._cond:
+            queued = {lane: 0 for lane in PRIORITIES}
+            for _, _, lane in self._waiters:
+                queued[lane] += 1
+            return dict(self._stats, queueWaitSeconds=round(self._stats['queueWaitSeconds'], 3), concurrencyLimit=round(self.concurrency.limit, 2), inFlight=self._in_flight,
+                        queued=queued, pausedFor=round(max(self._paused_until - time.monotonic(), 0.0), 2))
+
+
+class _HeldStream:
+    """
+    Iterates a stream opened by UpstreamScheduler.stream, releasing its concurrency slot once: as a success
+    when the stream is exhausted, as a classified failure when reading it fails, and without changing the
+    limit when it is closed (or garbage collected) before its end.
+    """
+
+    def __init__(self, scheduler, stream, started):
+        self._scheduler = scheduler
+        self._stream = iter(stream)
+        self._started = started
+        self._released = False
+
+    def _release(self, failure):
+        if not self._released:
+            self._released = True
+            self._scheduler._release(time.monotonic() - self._started, failure)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._released:
+            raise StopIteration
+        try:
+            return next(self._stream)
+        except StopIteration:
+            self._release(None)
+            raise
+        except BaseException as e:
+            self._release((classify_error(e) or FAILED) if isinstance(e, Exception) else FAILED)
+            raise
+
+    def close(self):
+        self._release(FAILED)
+        close = getattr(self._stream, 'close', None)
+        if close is not None:
+            close()
+
+    def __del__(self):
+        self._release(FAILED)
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, str(default)))
+
+
+# Shared by every LinkedIn call of the process (on top of the hourly budget of each account)
+linkedin_scheduler = UpstreamScheduler(
+    'LinkedIn',
+    requests_per_minute=_env_float("LINKEDIN_REQUESTS_PER_MINUTE", 60),
+    max_concurrency=int(os.getenv("LINKEDIN_MAX_CONCURRENCY", "8")),
+    latency_target=_env_float("LINKEDIN_LATENCY_TARGET", 5),
+    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "3")),
+    max_queue_wait=_env_float("UPSTREAM_MAX_QUEUE_WAIT", 120),
+)
+
+# Shared by every OpenAI completion of the process
+openai_scheduler = UpstreamScheduler(
+    'OpenAI',
+    requests_per_minute=_env_float("OPENAI_REQUESTS_PER_MINUTE", 500),
+    tokens_per_minute=_env_float("OPENAI_TOKENS_PER_MINUTE", 150000),
+    max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "32")),
+    latency_target=_env_float("OPENAI_LATENCY_TARGET", 60),
+    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "3")),
+    max_queue_wait=_env_float("UPSTREAM_MAX_QUEUE_WAIT", 120),
+)